@@ -0,0 +1,106 @@
+"""スキーマモデルの生成コスト(バリデーションあり / なし)を計測するマイクロベンチマーク
+
+使い方: poetry run python benchmarks/bench_construction.py
+"""
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from race_gamble_core import BetStrategyResults, BetType, Odds, Order
+from race_gamble_core.orders.order_index import get_order_courses_table
+from race_gamble_core.schemas.order import _get_all_order_patterns
+
+
+def _measure(func: Callable[[], object], num_repeats: int = 5) -> float:
+    # num_repeats回実行した中で最短の実行時間(秒)を返す
+    elapsed_times = []
+    for _ in range(num_repeats):
+        start = time.perf_counter()
+        func()
+        elapsed_times.append(time.perf_counter() - start)
+    return min(elapsed_times)
+
+
+def _report(name: str, elapsed: float, num_instances: int) -> None:
+    print(f"{name:<48} {elapsed * 1e3:10.3f} ms  {elapsed / num_instances * 1e6:8.3f} us/instance")
+
+
+def bench_order(num_racers: int = 18) -> None:
+    list_courses = get_order_courses_table(BetType.sanrentan, num_racers).tolist()
+    n = len(list_courses)
+    print(f"# Order (sanrentan, num_racers={num_racers}, {n} instances)")
+
+    def validated():
+        return [
+            Order(bet_type=BetType.sanrentan, first_course=f, second_course=s, third_course=t)
+            for f, s, t in list_courses
+        ]
+
+    def trusted():
+        return [Order.construct_trusted(BetType.sanrentan, f, s, t) for f, s, t in list_courses]
+
+    def interned():
+        return [Order.intern(BetType.sanrentan, f, s, t) for f, s, t in list_courses]
+
+    def all_patterns_old():
+        # 以前のget_all_order_patternsの実装(全順列をバリデーション付きで生成し、setで重複除去してソート)
+        return sorted(set(validated()))
+
+    def all_patterns_uncached():
+        _get_all_order_patterns.cache_clear()
+        return Order.get_all_order_patterns(BetType.sanrentan, num_racers)
+
+    def all_patterns():
+        return Order.get_all_order_patterns(BetType.sanrentan, num_racers)
+
+    _report("validated", _measure(validated), n)
+    _report("construct_trusted", _measure(trusted), n)
+    _report("intern (cached)", _measure(interned), n)
+    _report("get_all_order_patterns (validated + set + sort)", _measure(all_patterns_old), n)
+    _report("get_all_order_patterns (first call)", _measure(all_patterns_uncached), n)
+    _report("get_all_order_patterns (cached)", _measure(all_patterns), n)
+
+
+def bench_odds(num_instances: int = 100_000) -> None:
+    print(f"# Odds ({num_instances} instances)")
+    order = Order.intern(BetType.sanrentan, 1, 2, 3)
+    list_odds = np.random.default_rng(0).uniform(1, 1000, num_instances).tolist()
+
+    _report("validated", _measure(lambda: [Odds(order=order, odds=o) for o in list_odds]), num_instances)
+    _report("construct_trusted", _measure(lambda: [Odds.construct_trusted(order, o) for o in list_odds]), num_instances)
+
+
+def bench_bet_strategy_results(num_rows: int = 1_000_000) -> None:
+    print(f"# BetStrategyResults ({num_rows} rows)")
+    rng = np.random.default_rng(0)
+    race_identifiers = rng.integers(0, num_rows // 10, num_rows)
+    confirmed_odds = rng.uniform(1, 100, num_rows)
+    flag_ground_truth_orders = rng.random(num_rows) < 0.1
+    bet_amounts = rng.integers(0, 3, num_rows) * 100
+
+    list_race_identifiers = race_identifiers.astype(str).tolist()
+    list_confirmed_odds = confirmed_odds.tolist()
+    list_flag_ground_truth_orders = flag_ground_truth_orders.tolist()
+    list_bet_amounts = bet_amounts.tolist()
+
+    def validated():
+        return BetStrategyResults(
+            race_identifiers=list_race_identifiers,
+            confirmed_odds=list_confirmed_odds,
+            flag_ground_truth_orders=list_flag_ground_truth_orders,
+            bet_amounts=list_bet_amounts,
+        )
+
+    def from_arrays():
+        return BetStrategyResults.from_arrays(race_identifiers, confirmed_odds, flag_ground_truth_orders, bet_amounts)
+
+    _report("validated (lists)", _measure(validated, num_repeats=1), num_rows)
+    _report("from_arrays", _measure(from_arrays), num_rows)
+
+
+if __name__ == "__main__":
+    bench_order()
+    bench_odds()
+    bench_bet_strategy_results()
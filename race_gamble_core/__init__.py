@@ -1,6 +1,19 @@
-from .schemas.evaluation_results import BetStrategyResults, EvaluationStatisticResults
+from .schemas.evaluation_results import BetStrategyResults, EvaluationStatisticArrays, EvaluationStatisticResults
 from .schemas.odds import Odds
+from .schemas.odds_board import OddsBoard
 from .schemas.order import Order
 from .schemas.bet_type import BetType
+from .evaluation.streaming import EvaluationStatisticAccumulator
+from .evaluation.sweep import StrategySweepEvaluator
 
-__all__ = ["BetStrategyResults", "EvaluationStatisticResults", "Odds", "Order", "BetType"]
+__all__ = [
+    "BetStrategyResults",
+    "EvaluationStatisticAccumulator",
+    "EvaluationStatisticArrays",
+    "EvaluationStatisticResults",
+    "Odds",
+    "OddsBoard",
+    "Order",
+    "BetType",
+    "StrategySweepEvaluator",
+]
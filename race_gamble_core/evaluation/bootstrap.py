@@ -0,0 +1,182 @@
+from concurrent.futures import ProcessPoolExecutor
+from enum import StrEnum
+
+import numpy as np
+from numpy.typing import NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..schemas.evaluation_results import BetStrategyResults, return_amount_units_to_yen, to_return_amount_units
+
+# 1チャンクで生成する(リサンプル数 x レース数)の重み行列の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**24
+
+
+class BootstrapMethod(StrEnum):
+    multinomial = "multinomial"  # レースを復元抽出する通常のブートストラップ
+    poisson = "poisson"  # 各レースの重みをPoisson(1)で与えるブートストラップ
+
+
+class BootstrapResults(BaseModel):
+    """ブートストラップで得られた評価指標の標本を保持するクラス"""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    total_profit: NDArray[np.float64]  # 総利益金額
+    total_roi: NDArray[np.float64]  # 総利益率
+    tekityu_rate: NDArray[np.float64]  # 的中率
+    sharp_ratio: NDArray[np.float64]  # シャープレシオ
+
+    @property
+    def num_resamples(self) -> int:
+        return int(self.total_roi.size)
+
+    def confidence_interval(self, metric: str, confidence_level: float = 0.95) -> tuple[float, float]:
+        """パーセンタイル法による信頼区間を返す
+
+        Args:
+            metric (str): 指標名("total_profit", "total_roi", "tekityu_rate", "sharp_ratio")
+            confidence_level (float): 信頼水準
+
+        Returns:
+            tuple[float, float]: (下限, 上限)
+        """
+        if metric not in BootstrapResults.model_fields:
+            raise ValueError(f"metric {metric} is not supported")
+        if not 0 < confidence_level < 1:
+            raise ValueError("confidence_level must be in (0, 1)")
+        alpha = (1 - confidence_level) / 2
+        lower, upper = np.quantile(getattr(self, metric), [alpha, 1 - alpha])
+        return float(lower), float(upper)
+
+
+def bootstrap_statistic_results(
+    results: BetStrategyResults,
+    num_resamples: int = 10000,
+    seed: int | None = None,
+    method: BootstrapMethod = BootstrapMethod.multinomial,
+    num_workers: int = 1,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> BootstrapResults:
+    """レース単位のブロックブートストラップで、総利益率・的中率・シャープレシオの標本を得る
+
+    同じレースのベットはまとめてリサンプルされる。レース単位の集計値に(リサンプル数, レース数)の重み行列を掛けることで、
+    全リサンプルの統計値を行列積で計算する。チャンクごとに独立した乱数列を割り当てるため、
+    num_workersを変えても同じseedなら同じ結果になる。
+
+    Args:
+        results (BetStrategyResults): 買い付け戦略の結果
+        num_resamples (int): リサンプル数
+        seed (int | None): 乱数シード
+        method (BootstrapMethod): 重みの生成方法
+        num_workers (int): チャンクを並列に処理するプロセス数
+        max_chunk_elements (int): 1チャンクの重み行列の要素数の上限
+
+    Returns:
+        BootstrapResults: 評価指標のブートストラップ標本
+    """
+    if num_resamples <= 0:
+        raise ValueError("num_resamples must be positive")
+    method = BootstrapMethod(method)
+
+    race_matrix = _aggregate_race_matrix(results)
+    num_races = race_matrix.shape[0]
+    chunk_size = max(1, max_chunk_elements // max(1, num_races))
+    chunk_sizes = [min(chunk_size, num_resamples - start) for start in range(0, num_resamples, chunk_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    args = [(race_matrix, size, seq, method) for size, seq in zip(chunk_sizes, seed_sequences)]
+    if num_workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            list_totals = list(executor.map(resample_race_totals, *zip(*args)))
+    else:
+        list_totals = [resample_race_totals(*arg) for arg in args]
+
+    totals = np.concatenate(list_totals, axis=0)
+    return _calc_bootstrap_metrics(totals)
+
+
+def resample_race_totals(
+    race_matrix: NDArray[np.float64], num_resamples: int, seed_sequence: np.random.SeedSequence, method: BootstrapMethod
+) -> NDArray[np.float64]:
+    """レース単位の集計行列から、リサンプルごとのレース集計値の合計を(リサンプル数, 列数)の行列で返す
+
+    Args:
+        race_matrix (NDArray[np.float64]): (レース数, 列数)のレース単位の集計行列
+        num_resamples (int): リサンプル数
+        seed_sequence (np.random.SeedSequence): 乱数列のシード
+        method (BootstrapMethod): 重みの生成方法
+
+    Returns:
+        NDArray[np.float64]: リサンプルごとの各列の合計
+    """
+    rng = np.random.default_rng(seed_sequence)
+    num_races = race_matrix.shape[0]
+    if num_races == 0:
+        return np.zeros((num_resamples, race_matrix.shape[1]))
+
+    match method:
+        case BootstrapMethod.multinomial:
+            # 復元抽出したレースのインデックス行列から、リサンプルごとの各レースの出現回数を数える
+            indices = rng.integers(0, num_races, size=(num_resamples, num_races))
+            indices += (np.arange(num_resamples) * num_races)[:, np.newaxis]
+            weights = np.bincount(indices.ravel(), minlength=num_resamples * num_races).reshape(
+                num_resamples, num_races
+            )
+        case BootstrapMethod.poisson:
+            weights = rng.poisson(1.0, size=(num_resamples, num_races))
+        case _:
+            raise ValueError(f"method {method} is not supported")
+
+    return weights.astype(np.float64) @ race_matrix
+
+
+def _aggregate_race_matrix(results: BetStrategyResults) -> NDArray[np.float64]:
+    # (レース数, 6)のレース単位の集計行列を作る。列は
+    # (賭け金, 払い戻し(to_return_amount_unitsの単位), 購入回数, 的中回数, 中心化した払い戻しの和, 中心化した払い戻しの二乗和)
+    # 払い戻しは整数単位の値なので、重み行列との行列積は合計が2^53単位(約9000億円)未満なら厳密になる。
+    # 分散は全ベットの平均払い戻し金額を引いた値の和と二乗和から求め、大きな払い戻しでの桁落ちを抑える
+    race_codes, race_uniques = results.get_race_codes()
+    num_races = race_uniques.size
+    confirmed_odds, flag_ground_truth_orders, bet_amounts = results.get_columns()
+
+    flag_bet_targets = bet_amounts > 0
+    bet_race_codes = race_codes[flag_bet_targets]
+    return_amounts = np.where(flag_ground_truth_orders, bet_amounts * confirmed_odds, 0.0)[flag_bet_targets]
+    centered_return_amounts = return_amounts - (return_amounts.mean() if return_amounts.size > 0 else 0.0)
+
+    return_units = np.zeros(num_races, dtype=np.int64)
+    np.add.at(return_units, bet_race_codes, to_return_amount_units(return_amounts))
+    return np.column_stack(
+        [
+            np.bincount(race_codes, weights=bet_amounts, minlength=num_races),
+            return_units,
+            np.bincount(bet_race_codes, minlength=num_races),
+            np.bincount(race_codes[flag_bet_targets & flag_ground_truth_orders], minlength=num_races),
+            np.bincount(bet_race_codes, weights=centered_return_amounts, minlength=num_races),
+            np.bincount(bet_race_codes, weights=centered_return_amounts**2, minlength=num_races),
+        ]
+    ).astype(np.float64)
+
+
+def _calc_bootstrap_metrics(totals: NDArray[np.float64]) -> BootstrapResults:
+    # 各列は_aggregate_race_matrixの列の合計
+    total_bet_amount, total_return_units, num_bets, num_tekityu, centered_sum, centered_sq_sum = totals.T
+    # 総利益金額はcalc_statistic_resultsと同じ規則で、整数単位の総払い戻し金額を切り捨ててから求める
+    total_return_amount = return_amount_units_to_yen(np.rint(total_return_units).astype(np.int64))
+    total_profit = (total_return_amount - total_bet_amount).astype(np.float64)
+
+    safe_num_bets = np.where(num_bets > 0, num_bets, 1)
+    centered_mean = centered_sum / safe_num_bets
+    return_amount_variance = np.maximum(centered_sq_sum / safe_num_bets - centered_mean**2, 0.0)
+    return_amount_std = np.sqrt(return_amount_variance)
+
+    return BootstrapResults(
+        total_profit=total_profit,
+        total_roi=np.divide(
+            total_profit, total_bet_amount, out=np.zeros_like(total_profit), where=total_bet_amount > 0
+        ),
+        tekityu_rate=np.divide(num_tekityu, num_bets, out=np.zeros_like(num_tekityu), where=num_bets > 0),
+        sharp_ratio=np.divide(
+            total_profit, return_amount_std, out=np.zeros_like(total_profit), where=return_amount_std > 0
+        ),
+    )
@@ -0,0 +1,240 @@
+from collections.abc import Hashable, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..orders.order_index import get_num_combinations
+from ..schemas.bet_type import BetType
+from ..utils.factorize import factorize_group_keys
+
+DEFAULT_NUM_BINS = 10
+# log-lossの計算で確率0の対数を避けるための下限
+DEFAULT_MIN_PROB = 1e-12
+# 1チャンクで展開する(レース数 x 組み合わせ数)の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**22
+
+
+class ReliabilityBins(BaseModel):
+    """信頼性曲線(reliability diagram)のビンごとの集計結果"""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    bin_edges: NDArray[np.float64]  # (ビン数 + 1,)のビンの境界
+    counts: NDArray[np.int64]  # ビンに入った買い目の数
+    mean_predicted_probs: NDArray[np.float64]  # ビン内の推定確率の平均(買い目がないビンは0)
+    observed_frequencies: NDArray[np.float64]  # ビン内の的中頻度(買い目がないビンは0)
+
+    @property
+    def expected_calibration_error(self) -> float:
+        # 買い目数で重み付けした、推定確率の平均と的中頻度の差の絶対値の平均(ECE)
+        total = int(self.counts.sum())
+        if total == 0:
+            return 0.0
+        return float(np.sum(self.counts * np.abs(self.mean_predicted_probs - self.observed_frequencies)) / total)
+
+
+class CalibrationResults(BaseModel):
+    """券種ごとの確率モデルの評価結果(スコアリングルールとキャリブレーション)
+
+    log-loss・Brierスコアは的中着順が確定したレースの平均。市場確率を渡した場合は、
+    的中買い目の対数尤度の差(モデル - 市場)も計算する。正の値はモデルが市場よりも的中買い目に高い確率を与えていることを表す。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    bet_type: BetType
+    num_races: int  # 評価したレース数(的中着順がないレースは除く)
+    log_loss: float  # 的中買い目の推定確率の負の対数の平均
+    brier_score: float  # レースごとの全買い目の(推定確率 - 的中フラグ)^2の和の平均
+    reliability: ReliabilityBins
+    market_log_loss: float | None = None  # 市場確率のlog-loss
+    log_likelihood_ratio: float | None = None  # 的中買い目の対数尤度の差(モデル - 市場)の合計
+    mean_log_likelihood_ratio: float | None = None  # 的中買い目の対数尤度の差の平均
+
+
+def calc_calibration_results(
+    estimated_probs: ArrayLike,
+    winning_order_idx: ArrayLike,
+    bet_type: BetType,
+    num_racers: int = 6,
+    market_probs: ArrayLike | None = None,
+    num_bins: int = DEFAULT_NUM_BINS,
+    min_prob: float = DEFAULT_MIN_PROB,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> CalibrationResults:
+    """レースごとの全買い目の推定確率から、log-loss・Brierスコア・信頼性曲線・市場との対数尤度比を計算する
+
+    Args:
+        estimated_probs (ArrayLike): (レース数, 組み合わせ数)の推定確率。列の並びはorder_idxの順
+        winning_order_idx (ArrayLike): (レース数,)の的中買い目のorder_idx。-1のレース(不成立など)は評価から除く
+        bet_type (BetType): 券種
+        num_racers (int): 出走数
+        market_probs (ArrayLike | None): (レース数, 組み合わせ数)のオッズから求めた市場確率。
+            レースごとに合計が1になるように正規化してから使う
+        num_bins (int): 信頼性曲線のビン数([0, 1]の等間隔)
+        min_prob (float): 対数をとる確率の下限
+        max_chunk_elements (int): 1チャンクで展開する(レース数 x 組み合わせ数)の要素数の上限
+
+    Returns:
+        CalibrationResults: 確率モデルの評価結果
+    """
+    group_codes = np.zeros(np.size(winning_order_idx), dtype=np.intp)
+    return _calc_calibration_by_codes(
+        estimated_probs,
+        winning_order_idx,
+        bet_type,
+        num_racers,
+        market_probs,
+        group_codes,
+        1,
+        num_bins,
+        min_prob,
+        max_chunk_elements,
+    )[0]
+
+
+def calc_calibration_results_by(
+    estimated_probs: ArrayLike,
+    winning_order_idx: ArrayLike,
+    bet_type: BetType,
+    group_keys: ArrayLike | Sequence[ArrayLike],
+    num_racers: int = 6,
+    market_probs: ArrayLike | None = None,
+    num_bins: int = DEFAULT_NUM_BINS,
+    min_prob: float = DEFAULT_MIN_PROB,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> dict[Hashable, CalibrationResults]:
+    """レースのグループ(会場、月など)ごとに確率モデルの評価結果を計算する
+
+    group_keysはレースごとのキー(複数キーの場合はキーごとの配列のリスト)。全グループを1パスで集計する。
+
+    Returns:
+        dict[Hashable, CalibrationResults]: グループキー(複数キーの場合はタプル)から評価結果へのマッピング
+    """
+    group_codes, group_keys = factorize_group_keys(group_keys, np.size(winning_order_idx))
+    num_groups = len(group_keys)
+    list_results = _calc_calibration_by_codes(
+        estimated_probs,
+        winning_order_idx,
+        bet_type,
+        num_racers,
+        market_probs,
+        group_codes,
+        num_groups,
+        num_bins,
+        min_prob,
+        max_chunk_elements,
+    )
+
+    return dict(zip(group_keys, list_results))
+
+
+def _calc_calibration_by_codes(
+    estimated_probs: ArrayLike,
+    winning_order_idx: ArrayLike,
+    bet_type: BetType,
+    num_racers: int,
+    market_probs: ArrayLike | None,
+    group_codes: NDArray[np.intp],
+    num_groups: int,
+    num_bins: int,
+    min_prob: float,
+    max_chunk_elements: int,
+) -> list[CalibrationResults]:
+    estimated_probs = np.asarray(estimated_probs, dtype=np.float64)
+    winning_order_idx = np.asarray(winning_order_idx, dtype=np.int64)
+    if estimated_probs.ndim != 2 or winning_order_idx.shape != (estimated_probs.shape[0],):
+        raise ValueError("estimated_probs must be shape (n_races, n_combinations), winning_order_idx (n_races,)")
+    num_races, num_combinations = estimated_probs.shape
+    if num_combinations != get_num_combinations(bet_type, num_racers):
+        raise ValueError(f"number of combinations must be {get_num_combinations(bet_type, num_racers)} for {bet_type}")
+    if np.any((winning_order_idx < -1) | (winning_order_idx >= num_combinations)):
+        raise ValueError(f"winning_order_idx must be -1 or in [0, {num_combinations})")
+    if np.any((estimated_probs < 0) | (estimated_probs > 1)):
+        raise ValueError("estimated_probs must be in [0, 1]")
+    if market_probs is not None:
+        market_probs = np.asarray(market_probs, dtype=np.float64)
+        if market_probs.shape != estimated_probs.shape:
+            raise ValueError("market_probs must be the same shape as estimated_probs")
+    if num_bins <= 0:
+        raise ValueError("num_bins must be positive")
+
+    # 的中着順が確定したレースだけを評価する
+    flag_valid = winning_order_idx >= 0
+    valid_races = np.flatnonzero(flag_valid)
+    num_valid_races = np.bincount(group_codes[valid_races], minlength=num_groups)
+    log_loss_sums = np.zeros(num_groups)
+    brier_sums = np.zeros(num_groups)
+    market_log_loss_sums = np.zeros(num_groups)
+    bin_counts = np.zeros(num_groups * num_bins, dtype=np.int64)
+    bin_prob_sums = np.zeros(num_groups * num_bins)
+    bin_hit_counts = np.zeros(num_groups * num_bins, dtype=np.int64)
+    bin_edges = np.linspace(0.0, 1.0, num_bins + 1)
+
+    chunk_size = max(1, max_chunk_elements // max(1, num_combinations))
+    for start in range(0, valid_races.size, chunk_size):
+        races = valid_races[start : start + chunk_size]
+        chunk_group_codes = group_codes[races]
+        probs = estimated_probs[races]
+        rows = np.arange(races.size)
+        winners = winning_order_idx[races]
+        winner_probs = probs[rows, winners]
+
+        log_loss_sums += np.bincount(
+            chunk_group_codes, weights=-np.log(np.maximum(winner_probs, min_prob)), minlength=num_groups
+        )
+        # Σ_c (p_c - y_c)^2 = Σ_c p_c^2 - 2 p_winner + 1
+        brier = np.einsum("ij,ij->i", probs, probs) - 2 * winner_probs + 1
+        brier_sums += np.bincount(chunk_group_codes, weights=brier, minlength=num_groups)
+
+        # グループごとにビン番号をずらし、1回のbincountで(グループ数, ビン数)に集計する
+        bin_idx = np.digitize(probs, bin_edges[1:-1]) + (chunk_group_codes * num_bins)[:, np.newaxis]
+        bin_counts += np.bincount(bin_idx.ravel(), minlength=bin_counts.size)
+        bin_prob_sums += np.bincount(bin_idx.ravel(), weights=probs.ravel(), minlength=bin_prob_sums.size)
+        bin_hit_counts += np.bincount(bin_idx[rows, winners], minlength=bin_hit_counts.size)
+
+        if market_probs is not None:
+            market = market_probs[races]
+            market_sums = market.sum(axis=1)
+            market_winner_probs = np.zeros(races.size)
+            np.divide(market[rows, winners], market_sums, out=market_winner_probs, where=market_sums > 0)
+            market_log_loss_sums += np.bincount(
+                chunk_group_codes, weights=-np.log(np.maximum(market_winner_probs, min_prob)), minlength=num_groups
+            )
+
+    bin_counts = bin_counts.reshape(num_groups, num_bins)
+    bin_prob_sums = bin_prob_sums.reshape(num_groups, num_bins)
+    bin_hit_counts = bin_hit_counts.reshape(num_groups, num_bins)
+    mean_predicted_probs = np.zeros(bin_prob_sums.shape)
+    np.divide(bin_prob_sums, bin_counts, out=mean_predicted_probs, where=bin_counts > 0)
+    observed_frequencies = np.zeros(bin_prob_sums.shape)
+    np.divide(bin_hit_counts, bin_counts, out=observed_frequencies, where=bin_counts > 0)
+    safe_num_races = np.maximum(num_valid_races, 1)
+
+    list_results = []
+    for i in range(num_groups):
+        market_fields = {}
+        if market_probs is not None:
+            log_likelihood_ratio = market_log_loss_sums[i] - log_loss_sums[i]
+            market_fields = {
+                "market_log_loss": float(market_log_loss_sums[i] / safe_num_races[i]),
+                "log_likelihood_ratio": float(log_likelihood_ratio),
+                "mean_log_likelihood_ratio": float(log_likelihood_ratio / safe_num_races[i]),
+            }
+        list_results.append(
+            CalibrationResults(
+                bet_type=bet_type,
+                num_races=int(num_valid_races[i]),
+                log_loss=float(log_loss_sums[i] / safe_num_races[i]),
+                brier_score=float(brier_sums[i] / safe_num_races[i]),
+                reliability=ReliabilityBins(
+                    bin_edges=bin_edges,
+                    counts=bin_counts[i],
+                    mean_predicted_probs=mean_predicted_probs[i],
+                    observed_frequencies=observed_frequencies[i],
+                ),
+                **market_fields,
+            )
+        )
+    return list_results
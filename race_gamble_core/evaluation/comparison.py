@@ -0,0 +1,230 @@
+from enum import StrEnum
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..schemas.evaluation_results import BetStrategyResults
+from .bootstrap import BootstrapMethod, resample_race_totals
+
+# 1チャンクで展開する(戦略数 x 買い目数)、(リサンプル数 x レース数)の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**22
+
+
+class ComparisonTest(StrEnum):
+    bootstrap = "bootstrap"  # レースを復元抽出するペアードブートストラップ
+    permutation = "permutation"  # レースごとの損益の差の符号を入れ替えるペアード並べ替え検定
+
+
+class StrategyComparisonResults(BaseModel):
+    """同じレース・買い目に対する複数の戦略の比較結果
+
+    戦略のペア(i, j)(i < j)ごとの値は、pair_indicesの順に並ぶ。差は「戦略i - 戦略j」。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    test: ComparisonTest
+    num_resamples: int
+    race_identifiers: NDArray  # (レース数,)のレース識別子
+    race_profits: NDArray[np.float64]  # (戦略数, レース数)のレースごとの損益
+    total_bet_amounts: NDArray[np.int64]  # (戦略数,)の総賭け金
+    total_profits: NDArray[np.float64]  # (戦略数,)の総損益
+    pair_indices: NDArray[np.int64]  # (ペア数, 2)の比較する戦略のインデックス(i, j)
+    profit_differences: NDArray[np.float64]  # (ペア数,)の総損益の差
+    roi_differences: NDArray[np.float64]  # (ペア数,)の総利益率の差
+    p_values: NDArray[np.float64]  # (ペア数,)の総損益の差が0であることの両側検定のp値
+    profit_difference_intervals: NDArray[np.float64] | None  # (ペア数, 2)の総損益の差の信頼区間(bootstrapのみ)
+    roi_difference_intervals: NDArray[np.float64] | None  # (ペア数, 2)の総利益率の差の信頼区間(bootstrapのみ)
+    num_common_bets: NDArray[np.int64]  # (ペア数,)の両方の戦略が買った買い目の数
+    bet_jaccard_indices: NDArray[np.float64]  # (ペア数,)の買い目の集合のJaccard係数
+
+    @property
+    def num_strategies(self) -> int:
+        return int(self.total_profits.size)
+
+    @property
+    def total_rois(self) -> NDArray[np.float64]:
+        rois = np.zeros_like(self.total_profits)
+        np.divide(self.total_profits, self.total_bet_amounts, out=rois, where=self.total_bet_amounts > 0)
+        return rois
+
+    def get_pair_position(self, i: int, j: int) -> int:
+        """戦略i, j(i < j)のペアの位置を返す"""
+        if not 0 <= i < j < self.num_strategies:
+            raise ValueError(f"0 <= i < j < {self.num_strategies} must be satisfied")
+        # i < j のペアを辞書順に並べたときの位置
+        return int(i * (2 * self.num_strategies - i - 1) // 2 + (j - i - 1))
+
+    def get_race_profit_differences(self, i: int, j: int) -> NDArray[np.float64]:
+        """戦略i, jのレースごとの損益の差(戦略i - 戦略j)を返す"""
+        return self.race_profits[i] - self.race_profits[j]
+
+
+def compare_strategies(
+    results: BetStrategyResults,
+    bet_amount_matrix: ArrayLike,
+    test: ComparisonTest = ComparisonTest.bootstrap,
+    num_resamples: int = 10000,
+    seed: int | None = None,
+    confidence_level: float = 0.95,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> StrategyComparisonResults:
+    """レース・確定オッズ・的中フラグを共有する複数の戦略を、同じレース上でペアごとに比較する
+
+    各戦略をレースごとの損益・賭け金に集計し、全ペアの差を検定する。リサンプルの統計量はレースについて線形なので、
+    (リサンプル数, レース数)の重み行列と(レース数, 戦略数)の集計値の行列積で全戦略の統計量を求めてから、
+    ペアの差をとる。ペアごとにリサンプルを繰り返す必要はない。
+
+    Args:
+        results (BetStrategyResults): 共有するレース識別子・確定オッズ・的中フラグ(bet_amountsは使わない)
+        bet_amount_matrix (ArrayLike): (戦略数, 買い目数)の買い付け金額行列。各行が1つの戦略のbet_amounts
+        test (ComparisonTest): 検定の方法
+        num_resamples (int): リサンプル数
+        seed (int | None): 乱数シード
+        confidence_level (float): 信頼区間の信頼水準(bootstrapのみ)
+        max_chunk_elements (int): 1チャンクで展開する要素数の上限
+
+    Returns:
+        StrategyComparisonResults: 戦略の比較結果
+    """
+    test = ComparisonTest(test)
+    bet_amount_matrix = np.asarray(bet_amount_matrix)
+    num_records = len(results.bet_amounts)
+    if bet_amount_matrix.ndim != 2 or bet_amount_matrix.shape[1] != num_records:
+        raise ValueError(f"bet_amount_matrix must be shape (n_strategies, {num_records})")
+    if bet_amount_matrix.shape[0] < 2:
+        raise ValueError("at least 2 strategies are required")
+    if bet_amount_matrix.dtype.kind not in "iu":
+        raise ValueError("bet_amount_matrix must be integer array")
+    if num_resamples <= 0:
+        raise ValueError("num_resamples must be positive")
+    if not 0 < confidence_level < 1:
+        raise ValueError("confidence_level must be in (0, 1)")
+
+    race_codes, race_uniques = results.get_race_codes()
+    confirmed_odds, flag_ground_truth_orders, _ = results.get_columns()
+    race_bets, race_returns, num_common_bets, num_bets = _aggregate_strategies(
+        bet_amount_matrix, race_codes, confirmed_odds, flag_ground_truth_orders, max_chunk_elements
+    )
+    race_profits = race_returns - race_bets
+
+    num_strategies = bet_amount_matrix.shape[0]
+    pair_i, pair_j = np.triu_indices(num_strategies, k=1)
+    total_bets = race_bets.sum(axis=1)
+    total_profits = race_profits.sum(axis=1)
+    total_rois = _divide_or_zero(total_profits, total_bets)
+    profit_differences = total_profits[pair_i] - total_profits[pair_j]
+
+    # レースごとの(損益, 賭け金)を並べた(レース数, 2 x 戦略数)の行列に重みを掛けて、全戦略のリサンプル統計量を得る
+    race_matrix = np.concatenate([race_profits, race_bets], axis=0).T
+    num_races = race_matrix.shape[0]
+    chunk_size = max(1, max_chunk_elements // max(1, num_races))
+    chunk_sizes = [min(chunk_size, num_resamples - start) for start in range(0, num_resamples, chunk_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+
+    profit_difference_intervals = roi_difference_intervals = None
+    match test:
+        case ComparisonTest.bootstrap:
+            totals = np.concatenate(
+                [
+                    resample_race_totals(race_matrix, size, seq, BootstrapMethod.multinomial)
+                    for size, seq in zip(chunk_sizes, seed_sequences)
+                ]
+            )
+            resampled_profits, resampled_bets = totals[:, :num_strategies], totals[:, num_strategies:]
+            resampled_rois = _divide_or_zero(resampled_profits, resampled_bets)
+            resampled_differences = resampled_profits[:, pair_i] - resampled_profits[:, pair_j]
+            # 差が0の側に入る割合の2倍を両側のp値とする
+            p_values = 2 * np.minimum(
+                np.mean(resampled_differences <= 0, axis=0), np.mean(resampled_differences >= 0, axis=0)
+            )
+            alpha = (1 - confidence_level) / 2
+            profit_difference_intervals = np.quantile(resampled_differences, [alpha, 1 - alpha], axis=0).T
+            roi_difference_intervals = np.quantile(
+                resampled_rois[:, pair_i] - resampled_rois[:, pair_j], [alpha, 1 - alpha], axis=0
+            ).T
+        case ComparisonTest.permutation:
+            # 帰無仮説(戦略i, jのレースごとの損益の分布が同じ)の下では、レースごとの差の符号は入れ替え可能
+            totals = np.concatenate(
+                [_flip_sign_totals(race_profits.T, size, seq) for size, seq in zip(chunk_sizes, seed_sequences)]
+            )
+            resampled_differences = totals[:, pair_i] - totals[:, pair_j]
+            num_extreme = np.count_nonzero(np.abs(resampled_differences) >= np.abs(profit_differences) - 1e-9, axis=0)
+            p_values = (num_extreme + 1) / (num_resamples + 1)
+        case _:
+            raise ValueError(f"test {test} is not supported")
+
+    union_bets = num_bets[pair_i] + num_bets[pair_j] - num_common_bets[pair_i, pair_j]
+    return StrategyComparisonResults(
+        test=test,
+        num_resamples=num_resamples,
+        race_identifiers=race_uniques,
+        race_profits=race_profits,
+        total_bet_amounts=total_bets.astype(np.int64),
+        total_profits=total_profits,
+        pair_indices=np.column_stack([pair_i, pair_j]).astype(np.int64),
+        profit_differences=profit_differences,
+        roi_differences=total_rois[pair_i] - total_rois[pair_j],
+        p_values=np.minimum(p_values, 1.0),
+        profit_difference_intervals=profit_difference_intervals,
+        roi_difference_intervals=roi_difference_intervals,
+        num_common_bets=num_common_bets[pair_i, pair_j],
+        bet_jaccard_indices=_divide_or_zero(num_common_bets[pair_i, pair_j], union_bets),
+    )
+
+
+def _aggregate_strategies(
+    bet_amount_matrix: NDArray,
+    race_codes: NDArray[np.intp],
+    confirmed_odds: NDArray,
+    flag_ground_truth_orders: NDArray[np.bool_],
+    max_chunk_elements: int,
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.int64], NDArray[np.int64]]:
+    # 戦略ごと・レースごとの(賭け金, 払い戻し)と、戦略のペアごとの共通の買い目の数、戦略ごとの買い目の数を求める
+    # 買い目をレース順に並べ、(戦略数 x チャンク)ごとにreduceatでレース単位に集計する
+    num_strategies, num_records = bet_amount_matrix.shape
+    num_races = int(race_codes.max(initial=-1)) + 1
+    order = np.argsort(race_codes, kind="stable")
+    sorted_race_codes = race_codes[order]
+    payoffs = np.where(flag_ground_truth_orders, confirmed_odds, 0.0)[order]
+
+    race_bets = np.zeros((num_strategies, num_races))
+    race_returns = np.zeros((num_strategies, num_races))
+    num_common_bets = np.zeros((num_strategies, num_strategies), dtype=np.int64)
+    chunk_size = max(1, max_chunk_elements // num_strategies)
+    for start in range(0, num_records, chunk_size):
+        chunk = slice(start, min(start + chunk_size, num_records))
+        bet_amounts = bet_amount_matrix[:, order[chunk]]
+        if np.any(bet_amounts % 100):
+            raise ValueError("bet_amount must be multiple of 100")
+
+        # 買い目の集合の共通部分の大きさは、ベットフラグの行列積で全ペアまとめて数える。
+        # float64の行列積は2^53未満の整数を正確に数えられ、チャンクの列数はこれより十分小さい
+        flag_bets = (bet_amounts > 0).astype(np.float64)
+        num_common_bets += (flag_bets @ flag_bets.T).astype(np.int64)
+
+        # レコードはレースコード順に並んでいるので、チャンク内の同じレースの連続区間をreduceatでまとめる。
+        # 1つのレースがチャンクの境界をまたいで2つのチャンクに分かれることがあるため、代入ではなく加算する
+        chunk_race_codes = sorted_race_codes[chunk]
+        race_starts = np.flatnonzero(np.r_[True, chunk_race_codes[1:] != chunk_race_codes[:-1]])
+        chunk_races = chunk_race_codes[race_starts]
+        race_bets[:, chunk_races] += np.add.reduceat(bet_amounts, race_starts, axis=1)
+        race_returns[:, chunk_races] += np.add.reduceat(bet_amounts * payoffs[chunk], race_starts, axis=1)
+    return race_bets, race_returns, num_common_bets, np.diag(num_common_bets).copy()
+
+
+def _flip_sign_totals(
+    race_values: NDArray[np.float64], num_resamples: int, seed_sequence: np.random.SeedSequence
+) -> NDArray[np.float64]:
+    # レースごとに±1の符号をランダムに掛けた合計を(リサンプル数, 列数)で返す
+    # 全戦略に同じ符号を使うので、ペアの差をとると「レースごとの差の符号を入れ替えた合計」になる
+    rng = np.random.default_rng(seed_sequence)
+    signs = rng.integers(0, 2, size=(num_resamples, race_values.shape[0])) * 2 - 1
+    return signs.astype(np.float64) @ race_values
+
+
+def _divide_or_zero(numerator: NDArray, denominator: NDArray) -> NDArray[np.float64]:
+    out = np.zeros(np.broadcast_shapes(np.shape(numerator), np.shape(denominator)), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
@@ -0,0 +1,280 @@
+from collections.abc import Hashable, Sequence
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..schemas.evaluation_results import BetStrategyResults, sum_return_amounts
+from ..utils.factorize import factorize_group_keys
+
+DEFAULT_TOP_HIT_PERCENTS = (1.0, 5.0, 10.0)
+DEFAULT_TOP_K_HITS = (1, 5, 10)
+# 1チャンクで展開する(グループ数 x 最大的中数)の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**22
+
+
+class ConcentrationResults(BaseModel):
+    """払い戻しが一部の的中に集中しているかを表す指標(評価結果のロバスト性のチェック用)
+
+    Attributes:
+        num_hits (int): 的中回数
+        top_hit_percents (list[float]): 上位何%の的中を見るか
+        top_hit_return_shares (list[float]): 払い戻し金額の上位p%の的中が、総払い戻し金額に占める割合
+        top_k_hits (list[int]): 上位何件の的中を除くか
+        profits_without_top_hits (list[float]): 払い戻し金額の上位k件の的中を(ハズレとして)除いた場合の総利益金額
+        return_gini (float): 的中の払い戻し金額のジニ係数。1に近いほど一部の的中に集中している
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    num_hits: int
+    top_hit_percents: list[float]
+    top_hit_return_shares: list[float]
+    top_k_hits: list[int]
+    profits_without_top_hits: list[float]
+    return_gini: float
+
+
+class ConcentrationArrays(BaseModel):
+    """ConcentrationResultsの列指向版。グループや戦略ごとの指標を配列で保持する"""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    num_hits: NDArray[np.int64]  # (n,)
+    top_hit_percents: list[float]
+    top_hit_return_shares: NDArray[np.float64]  # (n, len(top_hit_percents))
+    top_k_hits: list[int]
+    profits_without_top_hits: NDArray[np.float64]  # (n, len(top_k_hits))
+    return_gini: NDArray[np.float64]  # (n,)
+
+    def __len__(self) -> int:
+        return int(self.num_hits.shape[0])
+
+    def __getitem__(self, idx: int) -> ConcentrationResults:
+        return ConcentrationResults(
+            num_hits=int(self.num_hits[idx]),
+            top_hit_percents=self.top_hit_percents,
+            top_hit_return_shares=self.top_hit_return_shares[idx].tolist(),
+            top_k_hits=self.top_k_hits,
+            profits_without_top_hits=self.profits_without_top_hits[idx].tolist(),
+            return_gini=float(self.return_gini[idx]),
+        )
+
+    @classmethod
+    def concatenate(cls, list_arrays: list[Self]) -> Self:
+        # チャンクごとに計算した結果を連結する
+        return cls(
+            num_hits=np.concatenate([a.num_hits for a in list_arrays]),
+            top_hit_percents=list_arrays[0].top_hit_percents,
+            top_hit_return_shares=np.concatenate([a.top_hit_return_shares for a in list_arrays]),
+            top_k_hits=list_arrays[0].top_k_hits,
+            profits_without_top_hits=np.concatenate([a.profits_without_top_hits for a in list_arrays]),
+            return_gini=np.concatenate([a.return_gini for a in list_arrays]),
+        )
+
+
+def calc_concentration_arrays(
+    hit_return_matrix: ArrayLike,
+    num_hits: ArrayLike,
+    total_profits: ArrayLike,
+    top_hit_percents: Sequence[float] = DEFAULT_TOP_HIT_PERCENTS,
+    top_k_hits: Sequence[int] = DEFAULT_TOP_K_HITS,
+) -> ConcentrationArrays:
+    """0埋めした(グループ数, 最大的中数)の的中の払い戻し金額行列から、グループごとの集中度の指標を計算する
+
+    各行を1回だけ昇順にソートし、その累積和から上位の的中の合計とジニ係数をまとめて求める。
+
+    Args:
+        hit_return_matrix (ArrayLike): 各行が1グループの的中の払い戻し金額(0以上)。的中数に満たない部分は0で埋める
+        num_hits (ArrayLike): (グループ数,)の的中回数
+        total_profits (ArrayLike): (グループ数,)の総利益金額
+        top_hit_percents (Sequence[float]): 上位何%の的中の払い戻しの割合を計算するか
+        top_k_hits (Sequence[int]): 上位何件の的中を除いた利益を計算するか
+
+    Returns:
+        ConcentrationArrays: グループごとの集中度の指標
+    """
+    matrix = np.asarray(hit_return_matrix, dtype=np.float64)
+    num_hits = np.asarray(num_hits, dtype=np.int64)
+    total_profits = np.asarray(total_profits, dtype=np.float64)
+    if matrix.ndim != 2 or num_hits.shape != (matrix.shape[0],) or total_profits.shape != num_hits.shape:
+        raise ValueError("hit_return_matrix must be shape (n, m), num_hits and total_profits must be shape (n,)")
+    if np.any(num_hits > matrix.shape[1]) or np.any(num_hits < 0):
+        raise ValueError("num_hits must be in [0, number of columns of hit_return_matrix]")
+    if any(not 0 < p <= 100 for p in top_hit_percents):
+        raise ValueError("top_hit_percents must be in (0, 100]")
+    if any(k < 0 for k in top_k_hits):
+        raise ValueError("top_k_hits must be non-negative")
+
+    # グループごとに、上位p%に当たる的中の件数(切り上げ)と上位k件(的中数が上限)
+    percent_ks = np.ceil(num_hits[:, np.newaxis] * np.asarray(top_hit_percents, dtype=np.float64) / 100 - 1e-9)
+    percent_ks = percent_ks.astype(np.int64)
+    ks = np.minimum(np.asarray(top_k_hits, dtype=np.int64)[np.newaxis, :], num_hits[:, np.newaxis])
+    # 昇順の累積和(先頭に0を付ける)から、上位k件の合計は 全体の合計 - 下位(列数 - k)件の合計 になる
+    num_columns = matrix.shape[1]
+    sorted_matrix = np.sort(matrix, axis=1)
+    cumsums = np.zeros((matrix.shape[0], num_columns + 1), dtype=np.float64)
+    np.cumsum(sorted_matrix, axis=1, out=cumsums[:, 1:])
+    total_returns = cumsums[:, -1]
+    top_sums = total_returns[:, np.newaxis] - np.take_along_axis(
+        cumsums, num_columns - np.concatenate([percent_ks, ks], axis=1), axis=1
+    )
+    top_percent_sums = top_sums[:, : len(top_hit_percents)]
+    top_k_sums = top_sums[:, len(top_hit_percents) :]
+
+    top_hit_return_shares = np.zeros_like(top_percent_sums)
+    np.divide(
+        top_percent_sums,
+        total_returns[:, np.newaxis],
+        out=top_hit_return_shares,
+        where=total_returns[:, np.newaxis] > 0,
+    )
+
+    return ConcentrationArrays(
+        num_hits=num_hits,
+        top_hit_percents=[float(p) for p in top_hit_percents],
+        top_hit_return_shares=top_hit_return_shares,
+        top_k_hits=[int(k) for k in top_k_hits],
+        profits_without_top_hits=total_profits[:, np.newaxis] - top_k_sums,
+        return_gini=_calc_gini(sorted_matrix, num_hits, total_returns),
+    )
+
+
+def calc_concentration_results(
+    results: BetStrategyResults,
+    top_hit_percents: Sequence[float] = DEFAULT_TOP_HIT_PERCENTS,
+    top_k_hits: Sequence[int] = DEFAULT_TOP_K_HITS,
+) -> ConcentrationResults:
+    """買い付け戦略の結果について、払い戻しの集中度の指標を計算する
+
+    Args:
+        results (BetStrategyResults): 買い付け戦略の結果
+        top_hit_percents (Sequence[float]): 上位何%の的中の払い戻しの割合を計算するか
+        top_k_hits (Sequence[int]): 上位何件の的中を除いた利益を計算するか
+
+    Returns:
+        ConcentrationResults: 払い戻しの集中度の指標
+    """
+    num_records = len(results.bet_amounts)
+    group_codes = np.zeros(num_records, dtype=np.intp)
+    return _calc_concentration_by_codes(results, group_codes, 1, top_hit_percents, top_k_hits)[0]
+
+
+def calc_concentration_results_by(
+    results: BetStrategyResults,
+    group_keys: ArrayLike | Sequence[ArrayLike],
+    top_hit_percents: Sequence[float] = DEFAULT_TOP_HIT_PERCENTS,
+    top_k_hits: Sequence[int] = DEFAULT_TOP_K_HITS,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> dict[Hashable, ConcentrationResults]:
+    """グループごとに払い戻しの集中度の指標を計算する(グループキーの渡し方は`calc_statistic_results_by`と同様)
+
+    的中数が近いグループをまとめて0埋めした行列にし、行列単位で計算する。
+
+    Returns:
+        dict[Hashable, ConcentrationResults]: グループキー(複数キーの場合はタプル)から集中度の指標へのマッピング
+    """
+    group_codes, group_keys = factorize_group_keys(group_keys, len(results.bet_amounts))
+    num_groups = len(group_keys)
+    arrays = _calc_concentration_by_codes(
+        results, group_codes, num_groups, top_hit_percents, top_k_hits, max_chunk_elements
+    )
+
+    return {key: arrays[i] for i, key in enumerate(group_keys)}
+
+
+def _calc_concentration_by_codes(
+    results: BetStrategyResults,
+    group_codes: NDArray[np.intp],
+    num_groups: int,
+    top_hit_percents: Sequence[float],
+    top_k_hits: Sequence[int],
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> ConcentrationArrays:
+    confirmed_odds, flag_ground_truth_orders, bet_amounts = results.get_columns()
+    flag_hits = (bet_amounts > 0) & flag_ground_truth_orders
+    # 外れの買い目のオッズがNaN・infでも払い戻しが0になるよう、積ではなくwhereで選ぶ
+    return_amounts = np.where(flag_hits, bet_amounts * confirmed_odds, 0.0)
+
+    # 総利益金額は、calc_statistic_resultsと同じsum_return_amountsの規則で求めた総払い戻し金額から計算する
+    total_bet_amounts = np.bincount(group_codes, weights=bet_amounts, minlength=num_groups)
+    total_profits = sum_return_amounts(return_amounts, group_codes, num_groups) - total_bet_amounts
+
+    num_hits = np.bincount(group_codes[flag_hits], minlength=num_groups)
+
+    # グループを的中数の昇順に並べ、的中もその順に並べ替えて、各チャンクの的中が連続した区間になるようにする
+    groups_by_size = np.argsort(num_hits, kind="stable")
+    sorted_num_hits = num_hits[groups_by_size]
+    group_ranks = np.empty(num_groups, dtype=np.int64)
+    group_ranks[groups_by_size] = np.arange(num_groups)
+    hit_ranks = group_ranks[group_codes[flag_hits]]
+    hit_order = np.argsort(hit_ranks, kind="stable")
+    hit_ranks = hit_ranks[hit_order]
+    hit_return_amounts = return_amounts[flag_hits][hit_order]
+    rank_starts = np.zeros(num_groups + 1, dtype=np.int64)
+    np.cumsum(sorted_num_hits, out=rank_starts[1:])
+    hit_positions = np.arange(hit_ranks.size) - rank_starts[hit_ranks]
+
+    list_arrays = []
+    for chunk_start, chunk_end in _get_chunk_bounds(sorted_num_hits, max_chunk_elements):
+        chunk_groups = groups_by_size[chunk_start:chunk_end]
+        hits = slice(rank_starts[chunk_start], rank_starts[chunk_end])
+        matrix = np.zeros((chunk_groups.size, int(sorted_num_hits[chunk_end - 1])), dtype=np.float64)
+        matrix[hit_ranks[hits] - chunk_start, hit_positions[hits]] = hit_return_amounts[hits]
+        list_arrays.append(
+            calc_concentration_arrays(
+                matrix, num_hits[chunk_groups], total_profits[chunk_groups], top_hit_percents, top_k_hits
+            )
+        )
+
+    if not list_arrays:
+        return calc_concentration_arrays(np.zeros((0, 0)), [], [], top_hit_percents, top_k_hits)
+    arrays = ConcentrationArrays.concatenate(list_arrays)
+    # グループコードの順に戻す
+    return ConcentrationArrays(
+        num_hits=arrays.num_hits[group_ranks],
+        top_hit_percents=arrays.top_hit_percents,
+        top_hit_return_shares=arrays.top_hit_return_shares[group_ranks],
+        top_k_hits=arrays.top_k_hits,
+        profits_without_top_hits=arrays.profits_without_top_hits[group_ranks],
+        return_gini=arrays.return_gini[group_ranks],
+    )
+
+
+def _get_chunk_bounds(sorted_num_hits: NDArray[np.int64], max_chunk_elements: int) -> list[tuple[int, int]]:
+    # 昇順の的中数を2の冪ごとのクラスに分け(searchsortedで境界を一度に求める)、各クラスを
+    # (行数 x クラスの上限)が上限を超えない行数ずつのチャンクに分ける。0埋めの無駄はクラス内で2倍未満になる
+    num_groups = sorted_num_hits.size
+    if num_groups == 0:
+        return []
+    max_exponent = int(np.ceil(np.log2(max(int(sorted_num_hits[-1]), 1))))
+    class_limits = 2 ** np.arange(max_exponent + 1, dtype=np.int64)
+    class_ends = np.searchsorted(sorted_num_hits, class_limits, side="right")
+    class_starts = np.r_[0, class_ends[:-1]]
+
+    bounds = []
+    for class_start, class_end, class_limit in zip(class_starts.tolist(), class_ends.tolist(), class_limits.tolist()):
+        num_rows = max(1, max_chunk_elements // class_limit)
+        for start in range(class_start, class_end, num_rows):
+            bounds.append((start, min(start + num_rows, class_end)))
+    return bounds
+
+
+def _calc_gini(
+    sorted_matrix: NDArray[np.float64], num_hits: NDArray[np.int64], total_returns: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    # 昇順ソートした値x_1..x_nについて、G = 2 * Σ i x_i / (n Σ x) - (n + 1) / n
+    # 0埋めの部分は昇順ソートで行の先頭に来るので、実際の順位は列番号から埋めた数を引いたものになる
+    if sorted_matrix.shape[1] == 0:
+        return np.zeros(sorted_matrix.shape[0], dtype=np.float64)
+    column_ranks = np.arange(1, sorted_matrix.shape[1] + 1, dtype=np.float64)
+    num_padding = sorted_matrix.shape[1] - num_hits
+    weighted_sums = sorted_matrix @ column_ranks - num_padding * total_returns
+
+    gini = np.zeros(sorted_matrix.shape[0], dtype=np.float64)
+    flag_valid = (num_hits > 0) & (total_returns > 0)
+    n = num_hits[flag_valid]
+    gini[flag_valid] = 2 * weighted_sums[flag_valid] / (n * total_returns[flag_valid]) - (n + 1) / n
+    return gini
+
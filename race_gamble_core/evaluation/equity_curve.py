@@ -0,0 +1,301 @@
+from collections.abc import Hashable, Sequence
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..schemas.evaluation_results import BetStrategyResults
+from ..utils.factorize import factorize, factorize_group_keys
+from .race_aggregation import RaceAggregates, aggregate_by_race
+
+DEFAULT_ROLLING_WINDOW = 100
+# ストリーミング集計で、レース単位の部分集計をこの数だけ溜めたら1つにまとめる
+_MAX_PENDING_PARTS = 16
+
+
+class EquityCurveResults(BaseModel):
+    """レース順の損益曲線(資産曲線)と、ドローダウン・連敗などの時系列指標を保持するクラス
+
+    レースの並びはレース識別子の昇順(日付・会場・レース番号を含む識別子であれば時系列順)とする。
+    曲線の起点は最初のレースの前の損益0とし、ドローダウンはそこからの最大値を基準に計算する。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    race_identifiers: NDArray  # (レース数,)のレース識別子
+    race_profits: NDArray[np.float64]  # レースごとの損益
+    cumulative_profits: NDArray[np.float64]  # 損益の累積和(損益曲線)
+    drawdowns: NDArray[np.float64]  # それまでの損益の最大値からの下落幅(0以上)
+    rolling_rois: NDArray[np.float64]  # 直近rolling_windowレースの回収率(賭け金がない場合は0)
+    rolling_window: int
+    max_drawdown: float  # 最大ドローダウン(下落幅)
+    max_drawdown_peak_idx: int  # 最大ドローダウンの起点のレースのインデックス。起点が開始前の場合は-1
+    max_drawdown_trough_idx: int  # 最大ドローダウンの底のレースのインデックス。ドローダウンがない場合は-1
+    max_drawdown_duration: int  # 損益が最大値を下回っていた(水面下の)期間の最長レース数
+    num_races_under_water: int  # 水面下のレース数
+    longest_losing_streak: int  # 購入したレースのうち、損失のレースが連続した最長回数
+
+    @property
+    def num_races(self) -> int:
+        return int(self.race_profits.size)
+
+    @property
+    def final_profit(self) -> float:
+        return float(self.cumulative_profits[-1]) if self.num_races > 0 else 0.0
+
+    @property
+    def time_under_water_rate(self) -> float:
+        return self.num_races_under_water / self.num_races if self.num_races > 0 else 0.0
+
+
+def calc_equity_curve(results: BetStrategyResults, rolling_window: int = DEFAULT_ROLLING_WINDOW) -> EquityCurveResults:
+    """買い付け戦略の結果をレース単位に集計し、損益曲線と時系列指標を計算する
+
+    Args:
+        results (BetStrategyResults): 買い付け戦略の結果
+        rolling_window (int): 移動回収率のウィンドウ(レース数)
+
+    Returns:
+        EquityCurveResults: 損益曲線と時系列指標
+    """
+    return calc_equity_curve_from_race_aggregates(aggregate_by_race(results), rolling_window)
+
+
+def calc_equity_curve_from_race_aggregates(
+    aggregates: RaceAggregates, rolling_window: int = DEFAULT_ROLLING_WINDOW
+) -> EquityCurveResults:
+    """レース単位の集計結果から、損益曲線と時系列指標を計算する(レースはレース識別子の昇順に並べ替える)"""
+    order = np.argsort(aggregates.race_identifiers, kind="stable")
+    return _calc_equity_curves(
+        segment_lengths=np.array([order.size]),
+        race_identifiers=aggregates.race_identifiers[order],
+        bet_amounts=aggregates.bet_amounts[order],
+        return_amounts=aggregates.return_amounts[order],
+        num_bets=aggregates.num_bets[order],
+        rolling_window=rolling_window,
+    )[0]
+
+
+def calc_equity_curves_by(
+    results: BetStrategyResults,
+    group_keys: ArrayLike | Sequence[ArrayLike],
+    rolling_window: int = DEFAULT_ROLLING_WINDOW,
+) -> dict[Hashable, EquityCurveResults]:
+    """グループ(会場、券種など)ごとの損益曲線と時系列指標を計算する(グループキーの渡し方は`calc_statistic_results_by`と同様)
+
+    (グループ, レース)の組み合わせで1回だけ集計し、全グループの曲線を連結した配列上でまとめて計算する。
+    各グループの曲線には、そのグループのレコードがあるレースだけが含まれる。
+
+    Returns:
+        dict[Hashable, EquityCurveResults]: グループキー(複数キーの場合はタプル)から損益曲線へのマッピング
+    """
+    group_codes, group_keys = factorize_group_keys(group_keys, len(results.bet_amounts))
+    num_groups = len(group_keys)
+    race_codes, race_uniques = results.get_race_codes()
+    num_races = race_uniques.size
+    # レース識別子の昇順の順位をコードにし、(グループ, 順位)の組み合わせを昇順に並べる
+    race_order = np.argsort(race_uniques, kind="stable")
+    race_ranks = np.empty(num_races, dtype=np.int64)
+    race_ranks[race_order] = np.arange(num_races)
+    pair_codes, pair_uniques = factorize(group_codes.astype(np.int64) * num_races + race_ranks[race_codes])
+    pair_order = np.argsort(pair_uniques, kind="stable")
+    pair_remap = np.empty(pair_order.size, dtype=np.intp)
+    pair_remap[pair_order] = np.arange(pair_order.size)
+    pair_codes = pair_remap[pair_codes]
+    pair_uniques = pair_uniques[pair_order]
+
+    confirmed_odds, flag_ground_truth_orders, bet_amounts = results.get_columns()
+    flag_bet_targets = bet_amounts > 0
+    return_amounts = np.where(flag_ground_truth_orders & flag_bet_targets, bet_amounts * confirmed_odds, 0.0)
+    num_pairs = pair_uniques.size
+    curves = _calc_equity_curves(
+        segment_lengths=np.bincount(pair_uniques // num_races, minlength=num_groups),
+        race_identifiers=race_uniques[race_order[pair_uniques % num_races]],
+        bet_amounts=np.bincount(pair_codes, weights=bet_amounts, minlength=num_pairs).astype(np.int64),
+        return_amounts=np.bincount(pair_codes, weights=return_amounts, minlength=num_pairs),
+        num_bets=np.bincount(pair_codes[flag_bet_targets], minlength=num_pairs),
+        rolling_window=rolling_window,
+    )
+
+    return {key: curves[i] for i, key in enumerate(group_keys)}
+
+
+class EquityCurveAccumulator:
+    """BetStrategyResultsをチャンクごとに受け取り、レース単位の集計だけを保持して損益曲線を計算するクラス
+
+    レコードは保持せず、メモリ使用量はレース数に比例する。チャンクの順序やチャンク境界でのレースの分割は問わない。
+    別プロセスで集計したアキュムレータは`merge`で結合できる。
+    """
+
+    def __init__(self):
+        self._parts: list[RaceAggregates] = []
+
+    def update(self, chunk: BetStrategyResults) -> Self:
+        """チャンクの結果を集計に加える
+
+        Args:
+            chunk (BetStrategyResults): 集計に加える買い付け戦略の結果
+
+        Returns:
+            Self: 自身(メソッドチェーン用)
+        """
+        self._parts.append(aggregate_by_race(chunk))
+        if len(self._parts) > _MAX_PENDING_PARTS:
+            self._parts = [_concat_race_aggregates(self._parts)]
+        return self
+
+    def merge(self, other: Self) -> Self:
+        """2つのアキュムレータを結合した新しいアキュムレータを返す(元のアキュムレータは変更しない)"""
+        merged = EquityCurveAccumulator()
+        merged._parts = [_concat_race_aggregates(self._parts + other._parts)]
+        return merged
+
+    def get_race_aggregates(self) -> RaceAggregates:
+        """ここまでに集計したレース単位の集計結果を返す"""
+        self._parts = [_concat_race_aggregates(self._parts)]
+        return self._parts[0]
+
+    def finalize(self, rolling_window: int = DEFAULT_ROLLING_WINDOW) -> EquityCurveResults:
+        """集計結果から損益曲線と時系列指標を計算する
+
+        Args:
+            rolling_window (int): 移動回収率のウィンドウ(レース数)
+
+        Returns:
+            EquityCurveResults: 損益曲線と時系列指標
+        """
+        return calc_equity_curve_from_race_aggregates(self.get_race_aggregates(), rolling_window)
+
+
+def _concat_race_aggregates(parts: list[RaceAggregates]) -> RaceAggregates:
+    # 同じレースの部分集計を足し合わせて1つのRaceAggregatesにする
+    if len(parts) == 1:
+        return parts[0]
+    if not parts:
+        empty_counts = np.zeros(0, dtype=np.int64)
+        return RaceAggregates(
+            race_identifiers=np.array([]),
+            num_bets=empty_counts,
+            num_tekityu=empty_counts,
+            bet_amounts=empty_counts,
+            return_amounts=np.zeros(0),
+            return_amount_sq_sums=np.zeros(0),
+        )
+    race_codes, race_uniques = factorize(np.concatenate([part.race_identifiers for part in parts]))
+    num_races = race_uniques.size
+
+    def _sum(field: str) -> NDArray:
+        values = np.concatenate([getattr(part, field) for part in parts])
+        return np.bincount(race_codes, weights=values, minlength=num_races)
+
+    return RaceAggregates(
+        race_identifiers=race_uniques,
+        num_bets=_sum("num_bets").astype(np.int64),
+        num_tekityu=_sum("num_tekityu").astype(np.int64),
+        bet_amounts=_sum("bet_amounts").astype(np.int64),
+        return_amounts=_sum("return_amounts"),
+        return_amount_sq_sums=_sum("return_amount_sq_sums"),
+    )
+
+
+def _calc_equity_curves(
+    segment_lengths: NDArray[np.int64],
+    race_identifiers: NDArray,
+    bet_amounts: NDArray[np.int64],
+    return_amounts: NDArray[np.float64],
+    num_bets: NDArray[np.int64],
+    rolling_window: int,
+) -> list[EquityCurveResults]:
+    # セグメント(グループ)ごとにレース順に連結したレース単位の配列から、全セグメントの曲線と指標をまとめて計算する
+    # 各セグメントの先頭に損益0の起点を挿入し、累積系の演算がセグメントをまたがないようにする
+    if rolling_window <= 0:
+        raise ValueError("rolling_window must be positive")
+    num_segments = segment_lengths.size
+    if num_segments == 0:
+        return []
+    num_points = int(segment_lengths.sum()) + num_segments
+    origins = np.zeros(num_segments, dtype=np.int64)
+    np.cumsum(segment_lengths[:-1] + 1, out=origins[1:])
+    flag_races = np.ones(num_points, dtype=np.bool_)
+    flag_races[origins] = False
+    segment_ids = np.repeat(np.arange(num_segments), segment_lengths + 1)
+    point_idx = np.arange(num_points)
+
+    point_bets = np.zeros(num_points, dtype=np.int64)
+    point_bets[flag_races] = bet_amounts
+    point_returns = np.zeros(num_points, dtype=np.float64)
+    point_returns[flag_races] = return_amounts
+    point_num_bets = np.zeros(num_points, dtype=np.int64)
+    point_num_bets[flag_races] = num_bets
+    point_profits = point_returns - point_bets
+
+    # 損益曲線: 全体の累積和から、セグメントの起点での累積和を引く
+    global_cumsums = np.cumsum(point_profits)
+    cumulative_profits = global_cumsums - global_cumsums[origins][segment_ids]
+
+    # それまでの最大値: セグメントごとに値域をずらしてmaximum.accumulateし、最大値をとる位置から値を引く
+    value_span = float(cumulative_profits.max() - cumulative_profits.min()) + 1.0
+    shifted = cumulative_profits + segment_ids * value_span
+    flag_peaks = shifted == np.maximum.accumulate(shifted)
+    peak_positions = np.maximum.accumulate(np.where(flag_peaks, point_idx, 0))
+    drawdowns = cumulative_profits[peak_positions] - cumulative_profits
+    np.maximum(drawdowns, 0.0, out=drawdowns)
+
+    max_drawdowns = np.maximum.reduceat(drawdowns, origins)
+    flag_troughs = (drawdowns == max_drawdowns[segment_ids]) & (drawdowns > 0)
+    trough_positions = np.minimum.reduceat(np.where(flag_troughs, point_idx, num_points), origins)
+    flag_under_water = drawdowns > 0
+    num_under_water = np.add.reduceat(flag_under_water, origins)
+    longest_under_water = _longest_runs_by_segment(flag_under_water, segment_ids, num_segments)
+
+    # 連敗: 購入のないレースは除き、起点は残してセグメント境界で連続が切れるようにする
+    flag_kept = ~flag_races | (point_num_bets > 0)
+    longest_losing = _longest_runs_by_segment(
+        (point_profits < 0)[flag_kept], segment_ids[flag_kept], num_segments
+    )
+
+    # 移動回収率: 累積和の差分。ウィンドウの左端はセグメントの起点より前に出ない
+    bet_cumsums = np.cumsum(point_bets)
+    return_cumsums = np.cumsum(point_returns)
+    window_starts = np.maximum(point_idx - rolling_window, origins[segment_ids])
+    window_bets = bet_cumsums - bet_cumsums[window_starts]
+    window_returns = return_cumsums - return_cumsums[window_starts]
+    rolling_rois = np.zeros(num_points, dtype=np.float64)
+    np.divide(window_returns, window_bets, out=rolling_rois, where=window_bets > 0)
+
+    curves = []
+    race_offsets = origins - np.arange(num_segments)
+    for i in range(num_segments):
+        origin = int(origins[i])
+        points = slice(origin + 1, origin + 1 + int(segment_lengths[i]))
+        races = slice(int(race_offsets[i]), int(race_offsets[i]) + int(segment_lengths[i]))
+        has_drawdown = trough_positions[i] < num_points
+        curves.append(
+            EquityCurveResults(
+                race_identifiers=race_identifiers[races],
+                race_profits=point_profits[points],
+                cumulative_profits=cumulative_profits[points],
+                drawdowns=drawdowns[points],
+                rolling_rois=rolling_rois[points],
+                rolling_window=rolling_window,
+                max_drawdown=float(max_drawdowns[i]),
+                max_drawdown_peak_idx=int(peak_positions[trough_positions[i]]) - origin - 1 if has_drawdown else -1,
+                max_drawdown_trough_idx=int(trough_positions[i]) - origin - 1 if has_drawdown else -1,
+                max_drawdown_duration=int(longest_under_water[i]),
+                num_races_under_water=int(num_under_water[i]),
+                longest_losing_streak=int(longest_losing[i]),
+            )
+        )
+    return curves
+
+
+def _longest_runs_by_segment(flags: NDArray[np.bool_], segment_ids: NDArray, num_segments: int) -> NDArray[np.int64]:
+    # ランレングス符号化で、セグメントごとのTrueの最長連続数を求める(ランはセグメントをまたがない前提)
+    padded = np.zeros(flags.size + 2, dtype=np.bool_)
+    padded[1:-1] = flags
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    run_starts, run_ends = changes[::2], changes[1::2]
+    longest = np.zeros(num_segments, dtype=np.int64)
+    np.maximum.at(longest, segment_ids[run_starts], run_ends - run_starts)
+    return longest
@@ -0,0 +1,61 @@
+import numpy as np
+from numpy.typing import NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..schemas.evaluation_results import BetStrategyResults
+
+
+class RaceAggregates(BaseModel):
+    """BetStrategyResultsをレース単位で集計した結果を保持するクラス
+
+    ブートストラップや資産曲線など、レースを単位とする分析の入力として使う。
+    各フィールドはレース数の長さの配列で、並びはrace_identifiersに対応する。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    race_identifiers: NDArray  # レース識別子
+    num_bets: NDArray[np.int64]  # 購入回数
+    num_tekityu: NDArray[np.int64]  # 的中回数
+    bet_amounts: NDArray[np.int64]  # 賭け金の合計
+    return_amounts: NDArray[np.float64]  # 払い戻し金額の合計
+    return_amount_sq_sums: NDArray[np.float64]  # 払い戻し金額(ベットごと)の二乗和
+
+    @property
+    def num_races(self) -> int:
+        return int(self.race_identifiers.size)
+
+    @property
+    def profits(self) -> NDArray[np.float64]:
+        # レースごとの損益
+        return self.return_amounts - self.bet_amounts
+
+
+def aggregate_by_race(results: BetStrategyResults) -> RaceAggregates:
+    """BetStrategyResultsをレース単位に集計する
+
+    Args:
+        results (BetStrategyResults): 買い付け戦略の結果
+
+    Returns:
+        RaceAggregates: レース単位の集計結果(全レースを含み、ベットのないレースは0)
+    """
+    race_codes, race_uniques = results.get_race_codes()
+    num_races = race_uniques.size
+    confirmed_odds = np.asarray(results.confirmed_odds)
+    flag_ground_truth_orders = np.asarray(results.flag_ground_truth_orders, dtype=np.bool_)
+    bet_amounts = np.asarray(results.bet_amounts)
+
+    flag_bet_targets = bet_amounts > 0
+    return_amounts = np.where(flag_ground_truth_orders & flag_bet_targets, bet_amounts * confirmed_odds, 0.0)
+
+    return RaceAggregates(
+        race_identifiers=race_uniques,
+        num_bets=np.bincount(race_codes[flag_bet_targets], minlength=num_races).astype(np.int64),
+        num_tekityu=np.bincount(
+            race_codes[flag_bet_targets & flag_ground_truth_orders], minlength=num_races
+        ).astype(np.int64),
+        bet_amounts=np.bincount(race_codes, weights=bet_amounts, minlength=num_races).astype(np.int64),
+        return_amounts=np.bincount(race_codes, weights=return_amounts, minlength=num_races),
+        return_amount_sq_sums=np.bincount(race_codes, weights=return_amounts * return_amounts, minlength=num_races),
+    )
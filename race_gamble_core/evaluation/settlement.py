@@ -0,0 +1,160 @@
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..orders.order_index import courses_to_order_idx, get_num_combinations, get_num_courses
+from ..schemas.bet_type import BetType
+from ..schemas.evaluation_results import BetStrategyResults
+
+
+class SettlementResults(BaseModel):
+    """買い目の精算結果を、買い目ごとの配列として保持するクラス"""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    race_idx: NDArray[np.int64]  # 買い目ごとのレースのインデックス(finishing_ordersの行)
+    flag_hits: NDArray[np.bool_]  # 的中フラグ
+    confirmed_odds: NDArray[np.float64]  # 確定オッズ。払い戻しテーブルに値がない場合は0
+    bet_amounts: NDArray[np.int64]  # 買い付け金額
+    return_amounts: NDArray[np.float64]  # 払い戻し金額(買い付け金額 x 確定オッズ。ハズレは0)
+    race_identifiers: NDArray | None = None  # (レース数,)のレース識別子
+
+    def __len__(self) -> int:
+        return int(self.race_idx.shape[0])
+
+    def to_bet_strategy_results(self) -> BetStrategyResults:
+        """評価用のBetStrategyResultsに変換する
+
+        レース識別子はレースのインデックスをコード列、race_identifiersをカテゴリとして、コピーせずに渡す。
+        """
+        race_categories = self.race_identifiers
+        if race_categories is None:
+            race_categories = np.arange(int(self.race_idx.max(initial=-1)) + 1)
+        return BetStrategyResults.from_arrays(
+            race_identifiers=self.race_idx,
+            confirmed_odds=self.confirmed_odds,
+            flag_ground_truth_orders=self.flag_hits,
+            bet_amounts=self.bet_amounts,
+            race_categories=race_categories,
+        )
+
+
+def get_winning_order_idx(finishing_orders: ArrayLike, bet_type: BetType, num_racers: int = 6) -> NDArray[np.int64]:
+    """レースごとの着順(1着, 2着, 3着のコース)から、券種の的中買い目のorder_idxを求める
+
+    連複系はコースの並びによらず同じorder_idxになる。着順が不正なレース(不成立など)は-1を返す。
+
+    Args:
+        finishing_orders (ArrayLike): (レース数, 3)の1着, 2着, 3着のコース番号
+        bet_type (BetType): 券種
+        num_racers (int): 出走数
+
+    Returns:
+        NDArray[np.int64]: (レース数,)の的中買い目のorder_idx
+    """
+    finishing_orders = np.asarray(finishing_orders)
+    if finishing_orders.ndim != 2 or finishing_orders.shape[1] < 3:
+        raise ValueError("finishing_orders must be shape (n_races, 3)")
+    num_courses = get_num_courses(bet_type)
+    return courses_to_order_idx(finishing_orders[:, :num_courses], bet_type, num_racers, allow_invalid=True)
+
+
+def settle_bets(
+    finishing_orders: ArrayLike,
+    race_idx: ArrayLike,
+    bet_types: BetType | ArrayLike,
+    order_idx: ArrayLike,
+    bet_amounts: ArrayLike,
+    payouts: dict[BetType, ArrayLike],
+    num_racers: int = 6,
+    race_identifiers: ArrayLike | None = None,
+) -> SettlementResults:
+    """レースの着順と払い戻しテーブルから、買い目の的中・確定オッズ・払い戻し金額をまとめて計算する
+
+    払い戻しテーブルは券種ごとに次のどちらかの形式で渡す。
+    - (レース数,)の配列: 的中買い目の確定オッズ(払い戻し倍率)。ハズレの買い目の確定オッズは0になる
+    - (レース数, 組み合わせ数)の配列: 全買い目の確定オッズ(order_idx順)。ハズレの買い目にも確定オッズが入る
+
+    Args:
+        finishing_orders (ArrayLike): (レース数, 3)の1着, 2着, 3着のコース番号
+        race_idx (ArrayLike): (買い目数,)の買い目のレースのインデックス(finishing_ordersの行)
+        bet_types (BetType | ArrayLike): 買い目の券種。全て同じ券種の場合はスカラーでよい
+        order_idx (ArrayLike): (買い目数,)の買い目のorder_idx
+        bet_amounts (ArrayLike): (買い目数,)の買い付け金額
+        payouts (dict[BetType, ArrayLike]): 券種ごとの払い戻しテーブル
+        num_racers (int): 出走数
+        race_identifiers (ArrayLike | None): (レース数,)のレース識別子
+
+    Returns:
+        SettlementResults: 買い目ごとの精算結果
+    """
+    finishing_orders = np.asarray(finishing_orders)
+    race_idx = np.asarray(race_idx, dtype=np.int64)
+    order_idx = np.asarray(order_idx, dtype=np.int64)
+    bet_amounts = np.asarray(bet_amounts, dtype=np.int64)
+    num_races = finishing_orders.shape[0]
+    if not race_idx.shape == order_idx.shape == bet_amounts.shape or race_idx.ndim != 1:
+        raise ValueError("race_idx, order_idx and bet_amounts must be 1-dimensional arrays of the same length")
+    if race_idx.size > 0 and (race_idx.min() < 0 or race_idx.max() >= num_races):
+        raise ValueError(f"race_idx must be in [0, {num_races})")
+    if race_identifiers is not None:
+        race_identifiers = np.asarray(race_identifiers)
+        if race_identifiers.shape != (num_races,):
+            raise ValueError("length of race_identifiers must be the number of races")
+
+    flag_hits = np.zeros(race_idx.size, dtype=np.bool_)
+    confirmed_odds = np.zeros(race_idx.size, dtype=np.float64)
+    for bet_type, positions in _split_by_bet_type(bet_types, race_idx.size):
+        if bet_type not in payouts:
+            raise ValueError(f"payouts for bet_type {bet_type} is not given")
+        num_combinations = get_num_combinations(bet_type, num_racers)
+        bet_type_order_idx = order_idx[positions]
+        if np.any((bet_type_order_idx < 0) | (bet_type_order_idx >= num_combinations)):
+            raise ValueError(f"order_idx must be in [0, {num_combinations}) for bet_type {bet_type}")
+
+        bet_type_race_idx = race_idx[positions]
+        winning_order_idx = get_winning_order_idx(finishing_orders, bet_type, num_racers)
+        bet_type_flag_hits = winning_order_idx[bet_type_race_idx] == bet_type_order_idx
+        flag_hits[positions] = bet_type_flag_hits
+
+        payout_table = np.asarray(payouts[bet_type], dtype=np.float64)
+        if payout_table.shape == (num_races,):
+            confirmed_odds[positions] = np.where(bet_type_flag_hits, payout_table[bet_type_race_idx], 0.0)
+        elif payout_table.shape == (num_races, num_combinations):
+            confirmed_odds[positions] = payout_table[bet_type_race_idx, bet_type_order_idx]
+        else:
+            raise ValueError(
+                f"payouts for bet_type {bet_type} must be shape ({num_races},) or ({num_races}, {num_combinations})"
+            )
+
+    return_amounts = np.where(flag_hits, bet_amounts * confirmed_odds, 0.0)
+    return SettlementResults(
+        race_idx=race_idx,
+        flag_hits=flag_hits,
+        confirmed_odds=confirmed_odds,
+        bet_amounts=bet_amounts,
+        return_amounts=return_amounts,
+        race_identifiers=race_identifiers,
+    )
+
+
+def _split_by_bet_type(
+    bet_types: BetType | ArrayLike, num_bets: int
+) -> list[tuple[BetType, NDArray[np.intp] | slice]]:
+    # 券種ごとに、その券種の買い目の位置を返す
+    if isinstance(bet_types, str):
+        return [(BetType(bet_types), slice(None))]
+    bet_types = np.asarray(bet_types)
+    if bet_types.shape != (num_bets,):
+        raise ValueError("length of bet_types must be the same as race_idx")
+
+    list_positions = []
+    flag_known = np.zeros(num_bets, dtype=np.bool_)
+    for bet_type in BetType:
+        flag_bet_type = bet_types == str(bet_type)
+        if np.any(flag_bet_type):
+            list_positions.append((bet_type, np.flatnonzero(flag_bet_type)))
+            flag_known |= flag_bet_type
+    if not np.all(flag_known):
+        raise ValueError(f"bet_type {bet_types[~flag_known][0]} is not supported")
+    return list_positions
@@ -0,0 +1,118 @@
+from typing import Self
+
+import numpy as np
+
+from ..schemas.evaluation_results import (
+    BetStrategyResults,
+    EvaluationStatisticResults,
+    return_amount_units_to_yen,
+    to_return_amount_units,
+)
+
+
+class EvaluationStatisticAccumulator:
+    """BetStrategyResultsをチャンクごとに受け取り、評価結果の統計値を逐次集計するクラス
+
+    合計値は整数で厳密に、払い戻し金額の平均・分散はWelford/Chanの方法で逐次的に集計する。
+    総払い戻し金額は`to_return_amount_units`の整数単位で合計してから最後に切り捨てるので、
+    連結した入力に対する`calc_statistic_results`の結果と必ず一致する。
+    参加レース数・全レース数は、チャンク内で因子化したユニークなレース識別子の値そのものを集合で管理する。
+    ハッシュ値の衝突で数え漏れることはなく、メモリ使用量はレコード数ではなくレース数に比例する。
+    別プロセスで集計したアキュムレータは`merge`で結合でき、結合は結合則を満たす。
+    """
+
+    def __init__(self):
+        self.num_bets = 0
+        self.num_tekityu = 0
+        self.total_bet_amount = 0
+        self.total_return_units = 0  # to_return_amount_unitsの単位での総払い戻し金額
+        # 払い戻し金額(ベット対象のみ、ハズレは0)の平均と偏差平方和
+        self.return_amount_mean = 0.0
+        self.return_amount_m2 = 0.0
+        self.all_race_identifiers: set = set()
+        self.bet_race_identifiers: set = set()
+
+    def update(self, chunk: BetStrategyResults) -> Self:
+        """チャンクの結果を集計に加える
+
+        Args:
+            chunk (BetStrategyResults): 集計に加える買い付け戦略の結果
+
+        Returns:
+            Self: 自身(メソッドチェーン用)
+        """
+        race_codes, race_uniques = chunk.get_race_codes()
+        confirmed_odds, flag_ground_truth_orders, bet_amounts = chunk.get_columns()
+
+        flag_bet_targets = bet_amounts > 0
+        return_amounts = np.where(flag_ground_truth_orders, bet_amounts * confirmed_odds, 0.0)[flag_bet_targets]
+
+        # チャンク内のレースコードで参加レースを求め、ユニークなレースの識別子だけを集合に加える
+        # (tolistで固定長文字列の幅によらないPythonの値になる)
+        bet_race_bitmap = np.zeros(race_uniques.size, dtype=np.bool_)
+        bet_race_bitmap[race_codes[flag_bet_targets]] = True
+
+        num_bets = int(return_amounts.size)
+        other = EvaluationStatisticAccumulator()
+        other.num_bets = num_bets
+        other.num_tekityu = int(np.count_nonzero(flag_bet_targets & flag_ground_truth_orders))
+        other.total_bet_amount = int(np.sum(bet_amounts))
+        other.total_return_units = int(np.sum(to_return_amount_units(return_amounts)))
+        if num_bets > 0:
+            other.return_amount_mean = float(np.mean(return_amounts))
+            other.return_amount_m2 = float(np.var(return_amounts)) * num_bets
+        other.all_race_identifiers = set(race_uniques.tolist())
+        other.bet_race_identifiers = set(race_uniques[bet_race_bitmap].tolist())
+
+        self._merge_inplace(other)
+        return self
+
+    def merge(self, other: Self) -> Self:
+        """2つのアキュムレータを結合した新しいアキュムレータを返す(元のアキュムレータは変更しない)"""
+        merged = EvaluationStatisticAccumulator()
+        merged._merge_inplace(self)
+        merged._merge_inplace(other)
+        return merged
+
+    def _merge_inplace(self, other: Self) -> None:
+        num_bets = self.num_bets + other.num_bets
+        if num_bets > 0:
+            # Chanの並列アルゴリズムで平均と偏差平方和を結合する
+            delta = other.return_amount_mean - self.return_amount_mean
+            self.return_amount_m2 = (
+                self.return_amount_m2
+                + other.return_amount_m2
+                + delta * delta * self.num_bets * other.num_bets / num_bets
+            )
+            self.return_amount_mean = self.return_amount_mean + delta * other.num_bets / num_bets
+
+        self.num_bets = num_bets
+        self.num_tekityu += other.num_tekityu
+        self.total_bet_amount += other.total_bet_amount
+        self.total_return_units += other.total_return_units
+        self.all_race_identifiers |= other.all_race_identifiers
+        self.bet_race_identifiers |= other.bet_race_identifiers
+
+    def finalize(self) -> EvaluationStatisticResults:
+        """集計結果から評価結果の統計値を計算する
+
+        Returns:
+            EvaluationStatisticResults: 評価結果の統計値
+        """
+        if self.num_bets > 0:
+            return_amount_average = self.return_amount_mean
+            return_amount_variance = self.return_amount_m2 / self.num_bets
+        else:
+            return_amount_average = 0.0
+            return_amount_variance = 0.0
+
+        return EvaluationStatisticResults.from_totals(
+            num_bet_races=len(self.bet_race_identifiers),
+            num_all_races=len(self.all_race_identifiers),
+            num_bets=self.num_bets,
+            num_tekityu=self.num_tekityu,
+            total_bet_amount=self.total_bet_amount,
+            total_return_amount=int(return_amount_units_to_yen(self.total_return_units)),
+            return_amount_average=return_amount_average,
+            return_amount_variance=return_amount_variance,
+        )
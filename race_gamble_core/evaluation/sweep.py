@@ -0,0 +1,256 @@
+from collections.abc import Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from ..schemas.evaluation_results import (
+    BetStrategyResults,
+    EvaluationStatisticArrays,
+    cumsum_return_amounts,
+    sum_return_amounts,
+)
+from ..utils.factorize import factorize
+from .concentration import DEFAULT_TOP_HIT_PERCENTS, DEFAULT_TOP_K_HITS, ConcentrationArrays, calc_concentration_arrays
+
+# 1チャンクで展開する(戦略数 x 買い目数)の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**22
+
+
+class StrategySweepEvaluator:
+    """レース・確定オッズ・的中フラグを共有する多数の買い付け戦略をまとめて評価するクラス
+
+    閾値戦略のハイパーパラメータ探索など、bet_amountsだけが異なるBetStrategyResultsを大量に評価する用途を想定している。
+    共有する列は一度だけ前処理(レースコードへの因子化、レース順への並べ替え)し、
+    戦略ごとの買い付け金額は(戦略数, 買い目数)の行列として行列演算で評価する。
+    """
+
+    def __init__(
+        self,
+        race_identifiers: ArrayLike,
+        confirmed_odds: ArrayLike,
+        flag_ground_truth_orders: ArrayLike,
+        max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+    ):
+        """
+        Args:
+            race_identifiers (ArrayLike): レース識別子
+            confirmed_odds (ArrayLike): 確定オッズ
+            flag_ground_truth_orders (ArrayLike): 的中着順フラグ
+            max_chunk_elements (int): 1チャンクで展開する(戦略数 x 買い目数)の要素数の上限。メモリ使用量を抑えるために使う
+        """
+        race_codes, race_uniques = factorize(race_identifiers)
+        confirmed_odds = np.asarray(confirmed_odds, dtype=np.float64)
+        flag_ground_truth_orders = np.asarray(flag_ground_truth_orders, dtype=np.bool_)
+        if not (race_codes.shape == confirmed_odds.shape == flag_ground_truth_orders.shape):
+            raise ValueError("length of input arrays must be the same")
+        if max_chunk_elements <= 0:
+            raise ValueError("max_chunk_elements must be positive")
+
+        self.num_bets_per_strategy = int(race_codes.size)
+        self.num_all_races = int(race_uniques.size)
+        self.max_chunk_elements = max_chunk_elements
+
+        # レースコード順に並べ替えておき、レースごとの集計をreduceatで行えるようにする
+        self._order = np.argsort(race_codes, kind="stable")
+        sorted_race_codes = race_codes[self._order]
+        self._race_starts = np.flatnonzero(np.r_[True, sorted_race_codes[1:] != sorted_race_codes[:-1]])
+        self._race_codes = race_codes
+        self._flag_hits = flag_ground_truth_orders[self._order]
+        # 1円あたりの払い戻し金額(的中時のみ確定オッズ、ハズレは0)
+        self._payoffs = np.where(self._flag_hits, confirmed_odds[self._order], 0.0)
+
+    @classmethod
+    def from_bet_strategy_results(
+        cls, results: BetStrategyResults, max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS
+    ) -> "StrategySweepEvaluator":
+        """BetStrategyResultsのレース・確定オッズ・的中フラグを共有する評価器を生成する"""
+        return cls(
+            race_identifiers=results.race_identifiers,
+            confirmed_odds=results.confirmed_odds,
+            flag_ground_truth_orders=results.flag_ground_truth_orders,
+            max_chunk_elements=max_chunk_elements,
+        )
+
+    def evaluate(self, bet_amount_matrix: ArrayLike) -> EvaluationStatisticArrays:
+        """(戦略数, 買い目数)の買い付け金額行列を評価する
+
+        Args:
+            bet_amount_matrix (ArrayLike): 各行が1つの戦略のbet_amountsを表す整数行列
+
+        Returns:
+            EvaluationStatisticArrays: 戦略ごとの評価結果の統計値
+        """
+        bet_amount_matrix = np.asarray(bet_amount_matrix)
+        if bet_amount_matrix.ndim == 1:
+            bet_amount_matrix = bet_amount_matrix[np.newaxis, :]
+        if bet_amount_matrix.ndim != 2 or bet_amount_matrix.shape[1] != self.num_bets_per_strategy:
+            raise ValueError(f"bet_amount_matrix must be shape (n_strategies, {self.num_bets_per_strategy})")
+        if bet_amount_matrix.dtype.kind not in "iu":
+            raise ValueError("bet_amount_matrix must be integer array")
+
+        num_strategies = bet_amount_matrix.shape[0]
+        num_bets = np.zeros(num_strategies, dtype=np.int64)
+        num_tekityu = np.zeros(num_strategies, dtype=np.int64)
+        num_bet_races = np.zeros(num_strategies, dtype=np.int64)
+        total_bet_amount = np.zeros(num_strategies, dtype=np.int64)
+        total_return_amount = np.zeros(num_strategies, dtype=np.int64)
+        return_amount_average = np.zeros(num_strategies, dtype=np.float64)
+        return_amount_variance = np.zeros(num_strategies, dtype=np.float64)
+
+        chunk_size = max(1, self.max_chunk_elements // max(1, self.num_bets_per_strategy))
+        for start in range(0, num_strategies, chunk_size):
+            chunk = slice(start, min(start + chunk_size, num_strategies))
+            bet_amounts = bet_amount_matrix[chunk][:, self._order]
+            if np.any(bet_amounts % 100):
+                raise ValueError("bet_amount must be multiple of 100")
+
+            flag_bet_targets = bet_amounts > 0
+            chunk_num_bets = np.count_nonzero(flag_bet_targets, axis=1)
+            num_bets[chunk] = chunk_num_bets
+            num_tekityu[chunk] = np.count_nonzero(flag_bet_targets & self._flag_hits, axis=1)
+            total_bet_amount[chunk] = bet_amounts.sum(axis=1)
+            if self._race_starts.size > 0:
+                flag_bet_races = np.logical_or.reduceat(flag_bet_targets, self._race_starts, axis=1)
+                num_bet_races[chunk] = np.count_nonzero(flag_bet_races, axis=1)
+
+            # ベット対象の払い戻し金額(ハズレは0払い戻しとして含む)
+            return_amounts = np.where(flag_bet_targets, bet_amounts, 0) * self._payoffs
+            chunk_average = return_amounts.sum(axis=1) / np.maximum(chunk_num_bets, 1)
+            deviations = np.where(flag_bet_targets, return_amounts - chunk_average[:, np.newaxis], 0.0)
+
+            # 総払い戻し金額はcalc_statistic_resultsと同じ規則で合計する
+            total_return_amount[chunk] = sum_return_amounts(return_amounts)
+            return_amount_average[chunk] = chunk_average
+            return_amount_variance[chunk] = np.einsum("ij,ij->i", deviations, deviations) / np.maximum(
+                chunk_num_bets, 1
+            )
+
+        return EvaluationStatisticArrays.from_totals(
+            num_bet_races=num_bet_races,
+            num_all_races=self.num_all_races,
+            num_bets=num_bets,
+            num_tekityu=num_tekityu,
+            total_bet_amount=total_bet_amount,
+            total_return_amount=total_return_amount,
+            return_amount_average=return_amount_average,
+            return_amount_variance=return_amount_variance,
+        )
+
+    def evaluate_concentration(
+        self,
+        bet_amount_matrix: ArrayLike,
+        top_hit_percents: Sequence[float] = DEFAULT_TOP_HIT_PERCENTS,
+        top_k_hits: Sequence[int] = DEFAULT_TOP_K_HITS,
+    ) -> ConcentrationArrays:
+        """(戦略数, 買い目数)の買い付け金額行列について、戦略ごとの払い戻しの集中度の指標を計算する
+
+        的中着順の買い目の列だけを取り出した(戦略数, 的中買い目数)の払い戻し金額行列を作り、
+        ベットしていない列は0埋めとして扱って、全戦略をまとめて計算する。
+
+        Args:
+            bet_amount_matrix (ArrayLike): 各行が1つの戦略のbet_amountsを表す整数行列
+            top_hit_percents (Sequence[float]): 上位何%の的中の払い戻しの割合を計算するか
+            top_k_hits (Sequence[int]): 上位何件の的中を除いた利益を計算するか
+
+        Returns:
+            ConcentrationArrays: 戦略ごとの払い戻しの集中度の指標
+        """
+        bet_amount_matrix = np.asarray(bet_amount_matrix)
+        if bet_amount_matrix.ndim == 1:
+            bet_amount_matrix = bet_amount_matrix[np.newaxis, :]
+        if bet_amount_matrix.ndim != 2 or bet_amount_matrix.shape[1] != self.num_bets_per_strategy:
+            raise ValueError(f"bet_amount_matrix must be shape (n_strategies, {self.num_bets_per_strategy})")
+        if bet_amount_matrix.dtype.kind not in "iu":
+            raise ValueError("bet_amount_matrix must be integer array")
+
+        num_strategies = bet_amount_matrix.shape[0]
+        hit_columns = self._order[self._flag_hits]
+        hit_payoffs = self._payoffs[self._flag_hits]
+        list_arrays = []
+        chunk_size = max(1, self.max_chunk_elements // max(1, self.num_bets_per_strategy))
+        for start in range(0, num_strategies, chunk_size):
+            chunk_bet_amounts = bet_amount_matrix[start : start + chunk_size]
+            if np.any(chunk_bet_amounts % 100):
+                raise ValueError("bet_amount must be multiple of 100")
+            hit_bet_amounts = chunk_bet_amounts[:, hit_columns]
+            hit_return_amounts = np.where(hit_bet_amounts > 0, hit_bet_amounts, 0) * hit_payoffs
+            # 外れの払い戻しは0なので、的中の払い戻しだけをsum_return_amountsの規則で合計すれば総払い戻し金額になる
+            total_profits = sum_return_amounts(hit_return_amounts) - chunk_bet_amounts.sum(axis=1)
+            list_arrays.append(
+                calc_concentration_arrays(
+                    hit_return_amounts,
+                    np.count_nonzero(hit_bet_amounts > 0, axis=1),
+                    total_profits,
+                    top_hit_percents,
+                    top_k_hits,
+                )
+            )
+        if not list_arrays:
+            return calc_concentration_arrays(np.zeros((0, 0)), [], [], top_hit_percents, top_k_hits)
+        return ConcentrationArrays.concatenate(list_arrays)
+
+    def evaluate_thresholds(
+        self, scores: ArrayLike, thresholds: ArrayLike, bet_amount: int = 100
+    ) -> EvaluationStatisticArrays:
+        """「スコアが閾値より大きい買い目にbet_amountずつ賭ける」戦略を、閾値ごとにまとめて評価する
+
+        スコア(例: Odds.get_expected_roiの値)の降順に並べた累積和を使うため、
+        閾値の数によらず O(買い目数 log 買い目数 + 閾値数) で計算できる。
+
+        Args:
+            scores (ArrayLike): 各買い目のスコア
+            thresholds (ArrayLike): 評価する閾値の配列
+            bet_amount (int): 1買い目あたりの買い付け金額
+
+        Returns:
+            EvaluationStatisticArrays: 閾値ごとの評価結果の統計値(thresholdsと同じ順序)
+        """
+        if bet_amount <= 0 or bet_amount % 100 != 0:
+            raise ValueError("bet_amount must be positive multiple of 100")
+        scores = np.asarray(scores, dtype=np.float64)
+        if scores.shape != (self.num_bets_per_strategy,):
+            raise ValueError(f"scores must be shape ({self.num_bets_per_strategy},)")
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+
+        # 元の並びでの払い戻し倍率と的中フラグ
+        payoffs = np.empty_like(self._payoffs)
+        payoffs[self._order] = self._payoffs
+        flag_hits = np.empty_like(self._flag_hits)
+        flag_hits[self._order] = self._flag_hits
+
+        # スコアの降順に並べる。NaNのスコアの買い目は買わない
+        valid_indices = np.flatnonzero(~np.isnan(scores))
+        desc_order = valid_indices[np.argsort(-scores[valid_indices], kind="stable")]
+        return_amounts = bet_amount * payoffs[desc_order]
+        cum_return = np.r_[0.0, np.cumsum(return_amounts)]
+        cum_hits = np.r_[0, np.cumsum(flag_hits[desc_order])]
+
+        # 先頭k件の偏差平方和は、Welfordの更新量 (x_k - 平均_{k-1}) * (x_k - 平均_k) の累積和で求める。
+        # 更新量は常に0以上なので、二乗和から平均の二乗を引く計算のような桁落ちが起きない
+        prefix_means = cum_return[1:] / np.arange(1, return_amounts.size + 1)
+        previous_means = np.r_[0.0, prefix_means[:-1]]
+        cum_m2 = np.r_[0.0, np.cumsum((return_amounts - previous_means) * (return_amounts - prefix_means))]
+
+        # 各レースが初めて買い対象になる順位
+        first_positions = np.full(self.num_all_races, self.num_bets_per_strategy, dtype=np.int64)
+        np.minimum.at(first_positions, self._race_codes[desc_order], np.arange(desc_order.size))
+        first_positions.sort()
+
+        # 閾値より大きいスコアの数 = 降順の先頭から何件買うか
+        ascending_scores = scores[desc_order[::-1]]
+        num_bets = desc_order.size - np.searchsorted(ascending_scores, thresholds, side="right")
+
+        safe_num_bets = np.maximum(num_bets, 1)
+        return_amount_average = cum_return[num_bets] / safe_num_bets
+        return_amount_variance = cum_m2[num_bets] / safe_num_bets
+
+        return EvaluationStatisticArrays.from_totals(
+            num_bet_races=np.searchsorted(first_positions, num_bets, side="left"),
+            num_all_races=self.num_all_races,
+            num_bets=num_bets,
+            num_tekityu=cum_hits[num_bets],
+            total_bet_amount=num_bets * bet_amount,
+            total_return_amount=cumsum_return_amounts(return_amounts)[num_bets],
+            return_amount_average=return_amount_average,
+            return_amount_variance=return_amount_variance,
+        )
@@ -0,0 +1,282 @@
+import heapq
+from enum import StrEnum
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel
+
+from ..orders.order_index import get_num_combinations
+from ..schemas.bet_type import BetType
+from ..schemas.odds_board import calc_expected_rois, convert_odds_to_probs
+
+# レースの状態を保持する配列の初期の行数
+_INITIAL_CAPACITY = 16
+
+
+class ExpectedRoiEventType(StrEnum):
+    new_value = "new_value"  # 期待ROI倍率が閾値を超えた
+    no_longer_value = "no_longer_value"  # 期待ROI倍率が閾値以下になった(またはレースが削除された)
+
+
+class ExpectedRoiEvent(BaseModel, frozen=True):
+    """期待ROI倍率が閾値をまたいだことを表すイベント"""
+
+    event_type: ExpectedRoiEventType
+    race_identifier: str
+    order_idx: int
+    expected_roi: float
+    odds: float
+    estimated_prob: float
+
+
+class IncrementalExpectedRoiEngine:
+    """オッズ・推定確率の差分更新を受け取り、変化した買い目の期待ROI倍率だけを再計算するクラス
+
+    レースごとのオッズ・推定確率・期待ROI倍率を(レース, order_idx)の配列で保持する。
+    期待ROI倍率が閾値を超える買い目(バリューベット)は、遅延削除付きのヒープで管理する。
+    更新のたびに閾値をまたいだ買い目のイベントを返すため、計算量は盤面全体ではなく変化した買い目の数に比例する。
+    オッズが0(売り上げなし)の買い目はバリューベットとしない。
+    """
+
+    def __init__(self, bet_type: BetType, num_racers: int, threshold: float = 0.0, koujo_rate: float = 0.25):
+        """
+        Args:
+            bet_type (BetType): 券種
+            num_racers (int): 出走数
+            threshold (float): バリューベットとみなす期待ROI倍率の閾値(この値より大きい場合)
+            koujo_rate (float): オッズを確率に変換する際の控除率
+        """
+        self.bet_type = BetType(bet_type)
+        self.num_racers = num_racers
+        self.threshold = threshold
+        self.koujo_rate = koujo_rate
+        self.num_combinations = get_num_combinations(self.bet_type, num_racers)
+
+        self._race_rows: dict[str, int] = {}
+        self._race_identifiers: list[str | None] = []
+        self._free_rows: list[int] = []
+        shape = (_INITIAL_CAPACITY, self.num_combinations)
+        self._odds = np.zeros(shape, dtype=np.float64)
+        self._estimated_probs = np.zeros(shape, dtype=np.float64)
+        self._implied_probs = np.zeros(shape, dtype=np.float64)
+        self._expected_rois = np.full(shape, -1.0, dtype=np.float64)
+        self._flag_value = np.zeros(shape, dtype=np.bool_)
+        # ヒープの要素が最新かどうかを判定するための、(レース, 買い目)ごとの更新回数
+        self._versions = np.zeros(shape, dtype=np.int64)
+        # (-期待ROI倍率, 更新回数, 行, order_idx)のヒープ。古い要素は取り出し時に捨てる
+        self._heap: list[tuple[float, int, int, int]] = []
+        self._num_values = 0
+
+    @property
+    def num_races(self) -> int:
+        return len(self._race_rows)
+
+    @property
+    def num_value_bets(self) -> int:
+        return self._num_values
+
+    def add_race(self, race_identifier: str, odds: ArrayLike, estimated_probs: ArrayLike) -> list[ExpectedRoiEvent]:
+        """レースの全買い目のオッズと推定確率を登録する
+
+        Args:
+            race_identifier (str): レース識別子
+            odds (ArrayLike): (組み合わせ数,)のorder_idx順のオッズ
+            estimated_probs (ArrayLike): (組み合わせ数,)のorder_idx順の推定確率
+
+        Returns:
+            list[ExpectedRoiEvent]: 閾値を超えた買い目のイベント
+        """
+        if race_identifier in self._race_rows:
+            raise ValueError(f"race {race_identifier} is already added")
+        odds = self._check_values(odds, "odds")
+        estimated_probs = self._check_values(estimated_probs, "estimated_probs")
+
+        row = self._allocate_row(race_identifier)
+        self._odds[row] = odds
+        self._estimated_probs[row] = estimated_probs
+        all_order_idx = np.arange(self.num_combinations)
+        return self._recalculate(np.full(self.num_combinations, row), all_order_idx)
+
+    def remove_race(self, race_identifier: str) -> list[ExpectedRoiEvent]:
+        """レースを削除する(締め切りなど)。バリューベットだった買い目はno_longer_valueのイベントになる"""
+        row = self._get_row(race_identifier)
+        order_idx = np.flatnonzero(self._flag_value[row])
+        events = self._make_events(ExpectedRoiEventType.no_longer_value, np.full(order_idx.size, row), order_idx)
+
+        self._num_values -= int(order_idx.size)
+        self._flag_value[row] = False
+        self._versions[row] += 1
+        self._odds[row] = 0.0
+        self._estimated_probs[row] = 0.0
+        self._implied_probs[row] = 0.0
+        self._expected_rois[row] = -1.0
+        del self._race_rows[race_identifier]
+        self._race_identifiers[row] = None
+        self._free_rows.append(row)
+        return events
+
+    def update_odds(self, race_identifiers: ArrayLike, order_idx: ArrayLike, odds: ArrayLike) -> list[ExpectedRoiEvent]:
+        """オッズの差分を適用し、変化した買い目の期待ROI倍率を再計算する
+
+        Args:
+            race_identifiers (ArrayLike): レース識別子(スカラーの場合は全ての更新が同じレース)
+            order_idx (ArrayLike): 更新する買い目のorder_idx
+            odds (ArrayLike): 新しいオッズ
+
+        Returns:
+            list[ExpectedRoiEvent]: 閾値をまたいだ買い目のイベント
+        """
+        rows, order_idx, odds = self._prepare_update(race_identifiers, order_idx, odds, "odds")
+        self._odds[rows, order_idx] = odds
+        return self._recalculate(rows, order_idx)
+
+    def update_estimated_probs(
+        self, race_identifiers: ArrayLike, order_idx: ArrayLike, estimated_probs: ArrayLike
+    ) -> list[ExpectedRoiEvent]:
+        """推定確率の差分を適用し、変化した買い目の期待ROI倍率を再計算する(引数は`update_odds`と同様)"""
+        rows, order_idx, estimated_probs = self._prepare_update(
+            race_identifiers, order_idx, estimated_probs, "estimated_probs"
+        )
+        self._estimated_probs[rows, order_idx] = estimated_probs
+        return self._recalculate(rows, order_idx)
+
+    def get_expected_rois(self, race_identifier: str) -> NDArray[np.float64]:
+        # レースの全買い目の期待ROI倍率(order_idx順)のコピーを返す
+        return self._expected_rois[self._get_row(race_identifier)].copy()
+
+    def get_implied_probs(self, race_identifier: str) -> NDArray[np.float64]:
+        # レースの全買い目のオッズから求めた確率(order_idx順)のコピーを返す
+        return self._implied_probs[self._get_row(race_identifier)].copy()
+
+    def get_top_value_bets(self, k: int) -> list[tuple[str, int, float]]:
+        """期待ROI倍率が高い上位k個のバリューベットを(レース識別子, order_idx, 期待ROI倍率)のリストで返す"""
+        results, live_items = [], []
+        while self._heap and len(results) < k:
+            item = heapq.heappop(self._heap)
+            negative_roi, version, row, order_idx = item
+            # 更新済み・閾値以下になった買い目の古い要素はここで捨てる
+            if self._is_live_heap_item(version, row, order_idx):
+                results.append((self._race_identifiers[row], order_idx, -negative_roi))
+                live_items.append(item)
+        for item in live_items:
+            heapq.heappush(self._heap, item)
+        return results
+
+    def _recalculate(self, rows: NDArray[np.intp], order_idx: NDArray[np.intp]) -> list[ExpectedRoiEvent]:
+        # 変化した(行, order_idx)だけ期待ROI倍率を再計算し、閾値をまたいだものをイベントにする
+        odds = self._odds[rows, order_idx]
+        expected_rois = calc_expected_rois(odds, self._estimated_probs[rows, order_idx])
+        self._expected_rois[rows, order_idx] = expected_rois
+        self._implied_probs[rows, order_idx] = convert_odds_to_probs(odds, self.koujo_rate)
+
+        flag_before = self._flag_value[rows, order_idx]
+        flag_after = (odds > 0) & (expected_rois > self.threshold)
+        self._flag_value[rows, order_idx] = flag_after
+        self._versions[rows, order_idx] += 1
+
+        flag_new = flag_after & ~flag_before
+        flag_gone = flag_before & ~flag_after
+        self._num_values += int(np.count_nonzero(flag_new)) - int(np.count_nonzero(flag_gone))
+
+        # 閾値を超えている買い目は、更新後の期待ROI倍率でヒープに積み直す
+        for i in np.flatnonzero(flag_after).tolist():
+            row, idx = int(rows[i]), int(order_idx[i])
+            heapq.heappush(self._heap, (-float(expected_rois[i]), int(self._versions[row, idx]), row, idx))
+        self._compact_heap()
+
+        new_value_events = self._make_events(ExpectedRoiEventType.new_value, rows[flag_new], order_idx[flag_new])
+        no_longer_value_events = self._make_events(
+            ExpectedRoiEventType.no_longer_value, rows[flag_gone], order_idx[flag_gone]
+        )
+        return new_value_events + no_longer_value_events
+
+    def _make_events(
+        self, event_type: ExpectedRoiEventType, rows: NDArray[np.intp], order_idx: NDArray[np.intp]
+    ) -> list[ExpectedRoiEvent]:
+        return [
+            ExpectedRoiEvent(
+                event_type=event_type,
+                race_identifier=self._race_identifiers[row],
+                order_idx=idx,
+                expected_roi=float(self._expected_rois[row, idx]),
+                odds=float(self._odds[row, idx]),
+                estimated_prob=float(self._estimated_probs[row, idx]),
+            )
+            for row, idx in zip(rows.tolist(), order_idx.tolist())
+        ]
+
+    def _is_live_heap_item(self, version: int, row: int, order_idx: int) -> bool:
+        return bool(self._flag_value[row, order_idx]) and version == self._versions[row, order_idx]
+
+    def _compact_heap(self) -> None:
+        # 古い要素が有効な要素より十分多くなったら、有効な要素だけでヒープを作り直す
+        if len(self._heap) > 2 * self._num_values + 1024:
+            self._heap = [item for item in self._heap if self._is_live_heap_item(*item[1:])]
+            heapq.heapify(self._heap)
+
+    def _prepare_update(
+        self, race_identifiers: ArrayLike, order_idx: ArrayLike, values: ArrayLike, name: str
+    ) -> tuple[NDArray[np.intp], NDArray[np.intp], NDArray[np.float64]]:
+        order_idx = np.atleast_1d(np.asarray(order_idx))
+        if order_idx.dtype.kind not in "iu":
+            raise ValueError("order_idx must be integer array")
+        if np.any((order_idx < 0) | (order_idx >= self.num_combinations)):
+            raise ValueError(f"order_idx must be in [0, {self.num_combinations})")
+        values = np.broadcast_to(self._check_values(values, name, check_shape=False), order_idx.shape)
+
+        race_identifiers = np.asarray(race_identifiers)
+        if race_identifiers.ndim == 0:
+            rows = np.full(order_idx.shape, self._get_row(str(race_identifiers)))
+        else:
+            if race_identifiers.shape != order_idx.shape:
+                raise ValueError("length of race_identifiers and order_idx must be the same")
+            uniques, inverse = np.unique(race_identifiers.astype(str), return_inverse=True)
+            rows = np.array([self._get_row(race) for race in uniques.tolist()], dtype=np.intp)[inverse.ravel()]
+
+        # 同じ買い目への複数の更新は最後のものを使う
+        _, last_positions = np.unique((rows * self.num_combinations + order_idx)[::-1], return_index=True)
+        last_positions = order_idx.size - 1 - last_positions
+        return rows[last_positions], order_idx[last_positions].astype(np.intp), values[last_positions]
+
+    def _check_values(self, values: ArrayLike, name: str, check_shape: bool = True) -> NDArray[np.float64]:
+        values = np.asarray(values, dtype=np.float64)
+        if check_shape and values.shape != (self.num_combinations,):
+            raise ValueError(f"{name} must be shape ({self.num_combinations},)")
+        if np.any(values < 0) or np.any(np.isnan(values)):
+            raise ValueError(f"{name} must be positive")
+        if name == "odds":
+            # 確率に変換できないオッズは、状態を変更する前にここで例外にする
+            convert_odds_to_probs(values, self.koujo_rate)
+        return values
+
+    def _get_row(self, race_identifier: str) -> int:
+        if race_identifier not in self._race_rows:
+            raise KeyError(f"race {race_identifier} is not added")
+        return self._race_rows[race_identifier]
+
+    def _allocate_row(self, race_identifier: str) -> int:
+        # 削除したレースの行を再利用し、足りなければ配列を倍に広げる
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self._race_identifiers[row] = race_identifier
+        else:
+            row = len(self._race_identifiers)
+            self._race_identifiers.append(race_identifier)
+            if row >= self._odds.shape[0]:
+                self._grow(2 * self._odds.shape[0])
+        self._race_rows[race_identifier] = row
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        for name, fill_value in [
+            ("_odds", 0.0),
+            ("_estimated_probs", 0.0),
+            ("_implied_probs", 0.0),
+            ("_expected_rois", -1.0),
+            ("_flag_value", False),
+            ("_versions", 0),
+        ]:
+            old = getattr(self, name)
+            new = np.full((capacity, self.num_combinations), fill_value, dtype=old.dtype)
+            new[: old.shape[0]] = old
+            setattr(self, name, new)
@@ -0,0 +1,102 @@
+import itertools
+from functools import lru_cache
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from ..schemas.bet_type import BetType
+from .order_index import get_order_courses_table, get_order_idx_lookup
+
+# 連単 -> 同じ組み合わせの連複
+RENTAN_TO_RENPUKU = {
+    BetType.nirentan: BetType.nirenpuku,
+    BetType.sanrentan: BetType.sanrenpuku,
+}
+RENPUKU_TO_RENTAN = {renpuku: rentan for rentan, renpuku in RENTAN_TO_RENPUKU.items()}
+
+
+def _get_renpuku_bet_type(rentan_bet_type: BetType) -> BetType:
+    if rentan_bet_type not in RENTAN_TO_RENPUKU:
+        raise ValueError(f"bet_type {rentan_bet_type} is not rentan")
+    return RENTAN_TO_RENPUKU[rentan_bet_type]
+
+
+def _get_rentan_bet_type(renpuku_bet_type: BetType) -> BetType:
+    if renpuku_bet_type not in RENPUKU_TO_RENTAN:
+        raise ValueError(f"bet_type {renpuku_bet_type} is not renpuku")
+    return RENPUKU_TO_RENTAN[renpuku_bet_type]
+
+
+@lru_cache(maxsize=None)
+def get_renpuku_member_table(renpuku_bet_type: BetType, num_racers: int) -> NDArray[np.int64]:
+    """連複のorder_idx -> 同じ組み合わせの連単のorder_idxの変換テーブルを返す
+
+    i行目が連複のorder_idx=iに含まれる連単のorder_idxを表す(連複の組み合わせ数, コース数の階乗)の読み取り専用配列。
+    各行の連単は昇順のコースの並べ替え(`itertools.permutations`)の順、すなわち連単のorder_idxの昇順に並ぶ。
+    """
+    rentan_bet_type = _get_rentan_bet_type(renpuku_bet_type)
+    renpuku_courses = get_order_courses_table(renpuku_bet_type, num_racers).astype(np.intp)
+    rentan_lookup = get_order_idx_lookup(rentan_bet_type, num_racers)
+
+    permutations = itertools.permutations(range(renpuku_courses.shape[1]))
+    table = np.stack(
+        [rentan_lookup[tuple(renpuku_courses[:, list(permutation)].T)] for permutation in permutations], axis=1
+    ).astype(np.int64)
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def get_rentan_to_renpuku_table(rentan_bet_type: BetType, num_racers: int) -> NDArray[np.int64]:
+    """連単のorder_idx -> 同じ組み合わせの連複のorder_idxの変換テーブルを返す(読み取り専用)
+
+    連単 -> 連複の集計演算子のインデックス表現で、密な行列は作らない。
+    `np.add.at(renpuku_values, table, rentan_values)`で連複ごとに合計し、`renpuku_values[table]`で連単に展開する。
+    """
+    renpuku_bet_type = _get_renpuku_bet_type(rentan_bet_type)
+    rentan_courses = get_order_courses_table(rentan_bet_type, num_racers).astype(np.intp)
+    renpuku_lookup = get_order_idx_lookup(renpuku_bet_type, num_racers)
+
+    table = renpuku_lookup[tuple(rentan_courses.T)].astype(np.int64)
+    table.setflags(write=False)
+    return table
+
+
+def aggregate_rentan_to_renpuku(values: ArrayLike, rentan_bet_type: BetType, num_racers: int = 6) -> NDArray:
+    """連単の買い目ごとの値(確率、賭け金など)を、同じ組み合わせの連複ごとに合計する
+
+    Args:
+        values (ArrayLike): (..., 連単の組み合わせ数)の配列。最後の軸がorder_idxの順
+        rentan_bet_type (BetType): 連単の券種(2連単、3連単)
+        num_racers (int): 出走数
+
+    Returns:
+        NDArray: (..., 連複の組み合わせ数)の配列
+    """
+    values = np.asarray(values)
+    rentan_to_renpuku = get_rentan_to_renpuku_table(rentan_bet_type, num_racers)
+    if values.ndim == 0 or values.shape[-1] != rentan_to_renpuku.size:
+        raise ValueError(f"last axis of values must be {rentan_to_renpuku.size} for bet_type {rentan_bet_type}")
+
+    members = get_renpuku_member_table(_get_renpuku_bet_type(rentan_bet_type), num_racers)
+    # 連複ごとのメンバーは同数なので、gatherして最後の軸で合計する
+    return values[..., members].sum(axis=-1)
+
+
+def expand_renpuku_to_rentan(values: ArrayLike, renpuku_bet_type: BetType, num_racers: int = 6) -> NDArray:
+    """連複の買い目ごとの値(オッズ、的中フラグなど)を、同じ組み合わせの連単それぞれに展開する
+
+    Args:
+        values (ArrayLike): (..., 連複の組み合わせ数)の配列。最後の軸がorder_idxの順
+        renpuku_bet_type (BetType): 連複の券種(2連複、3連複)
+        num_racers (int): 出走数
+
+    Returns:
+        NDArray: (..., 連単の組み合わせ数)の配列
+    """
+    values = np.asarray(values)
+    rentan_to_renpuku = get_rentan_to_renpuku_table(_get_rentan_bet_type(renpuku_bet_type), num_racers)
+    num_renpuku = get_order_courses_table(renpuku_bet_type, num_racers).shape[0]
+    if values.ndim == 0 or values.shape[-1] != num_renpuku:
+        raise ValueError(f"last axis of values must be {num_renpuku} for bet_type {renpuku_bet_type}")
+    return values[..., rentan_to_renpuku]
@@ -0,0 +1,134 @@
+import itertools
+import math
+from functools import lru_cache
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from ..schemas.bet_type import BetType
+
+# 券種ごとの着順に含まれるコース数
+NUM_COURSES = {
+    BetType.tansyou: 1,
+    BetType.nirentan: 2,
+    BetType.nirenpuku: 2,
+    BetType.sanrentan: 3,
+    BetType.sanrenpuku: 3,
+}
+
+RENPUKU_BET_TYPES = (BetType.nirenpuku, BetType.sanrenpuku)
+
+
+def get_num_courses(bet_type: BetType) -> int:
+    """券種の着順に含まれるコース数を返す"""
+    if bet_type not in NUM_COURSES:
+        raise ValueError(f"bet_type {bet_type} is not supported")
+    return NUM_COURSES[bet_type]
+
+
+def get_num_combinations(bet_type: BetType, num_racers: int) -> int:
+    """券種・出走数に対する買い目(組み合わせ)の数を返す"""
+    num_courses = get_num_courses(bet_type)
+    if bet_type in RENPUKU_BET_TYPES:
+        return math.comb(num_racers, num_courses)
+    return math.perm(num_racers, num_courses)
+
+
+@lru_cache(maxsize=None)
+def get_order_courses_table(bet_type: BetType, num_racers: int) -> NDArray[np.int8]:
+    """order_idx -> コースの変換テーブルを返す
+
+    i行目がorder_idx=iの着順のコース(連複系は昇順)を表す(組み合わせ数, コース数)の読み取り専用配列。
+    並びは`Order.to_order_idx`のインデックス(1着、2着、3着のコース番号の辞書順)と一致する。
+    """
+    num_courses = get_num_courses(bet_type)
+    if not 1 <= num_racers <= np.iinfo(np.int8).max:
+        raise ValueError(f"num_racers {num_racers} is out of range")
+
+    # 全てのコースの組を辞書順に並べてから、券種の条件を満たすものだけを残す
+    courses = np.indices((num_racers,) * num_courses, dtype=np.int8).reshape(num_courses, -1).T + 1
+    if bet_type in RENPUKU_BET_TYPES:
+        flag_valid = np.all(courses[:, 1:] > courses[:, :-1], axis=1)
+    else:
+        flag_valid = np.ones(courses.shape[0], dtype=np.bool_)
+        for i, j in itertools.combinations(range(num_courses), 2):
+            flag_valid &= courses[:, i] != courses[:, j]
+
+    table = np.ascontiguousarray(courses[flag_valid])
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def get_order_idx_lookup(bet_type: BetType, num_racers: int) -> NDArray[np.int32]:
+    """コース -> order_idx の変換テーブルを返す
+
+    形状は(num_racers + 1,) * コース数で、`lookup[c1, c2, c3]`がコースの組のorder_idxになる。
+    無効な組(同じコースの重複、0番コース)は-1。連複系は全ての並び順に同じorder_idxが入っているので、ソートは不要。
+    """
+    courses_table = get_order_courses_table(bet_type, num_racers)
+    num_courses = courses_table.shape[1]
+    lookup = np.full((num_racers + 1,) * num_courses, -1, dtype=np.int32)
+    order_idx = np.arange(courses_table.shape[0], dtype=np.int32)
+    if bet_type in RENPUKU_BET_TYPES:
+        for permutation in itertools.permutations(range(num_courses)):
+            lookup[tuple(courses_table[:, list(permutation)].T)] = order_idx
+    else:
+        lookup[tuple(courses_table.T)] = order_idx
+    lookup.setflags(write=False)
+    return lookup
+
+
+def courses_to_order_idx(
+    courses: ArrayLike, bet_type: BetType, num_racers: int = 6, allow_invalid: bool = False
+) -> NDArray[np.int64]:
+    """コースの配列をorder_idxの配列にまとめて変換する(Orderオブジェクトは生成しない)
+
+    Args:
+        courses (ArrayLike): (n, コース数)のコース番号の配列。単勝は(n,)でもよい
+        bet_type (BetType): 券種
+        num_racers (int): 出走数
+        allow_invalid (bool): Trueの場合、無効な組は例外にせず-1を返す
+
+    Returns:
+        NDArray[np.int64]: (n,)のorder_idx
+    """
+    lookup = get_order_idx_lookup(bet_type, num_racers)
+    num_courses = lookup.ndim
+    courses = np.asarray(courses)
+    if num_courses == 1 and courses.ndim == 1:
+        courses = courses[:, np.newaxis]
+    if courses.ndim != 2 or courses.shape[1] != num_courses:
+        raise ValueError(f"courses must be shape (n, {num_courses}) for bet_type {bet_type}")
+
+    flag_in_range = np.all((courses >= 1) & (courses <= num_racers), axis=1)
+    clipped = np.where(flag_in_range[:, np.newaxis], courses, 0).astype(np.intp)
+    order_idx = lookup[tuple(clipped.T)].astype(np.int64)
+
+    if not allow_invalid and np.any(order_idx < 0):
+        invalid_positions = np.flatnonzero(order_idx < 0)
+        raise ValueError(
+            f"{invalid_positions.size} invalid orders for bet_type {bet_type}: "
+            f"positions {invalid_positions[:10].tolist()}"
+        )
+    return order_idx
+
+
+def order_idx_to_courses(order_idx: ArrayLike, bet_type: BetType, num_racers: int = 6) -> NDArray[np.int8]:
+    """order_idxの配列をコースの配列にまとめて変換する(Orderオブジェクトは生成しない)
+
+    Args:
+        order_idx (ArrayLike): order_idxの配列
+        bet_type (BetType): 券種
+        num_racers (int): 出走数
+
+    Returns:
+        NDArray[np.int8]: (order_idxの形状, コース数)のコース番号(連複系は昇順)
+    """
+    courses_table = get_order_courses_table(bet_type, num_racers)
+    order_idx = np.asarray(order_idx)
+    if order_idx.dtype.kind not in "iu":
+        raise ValueError("order_idx must be integer array")
+    if np.any((order_idx < 0) | (order_idx >= courses_table.shape[0])):
+        raise ValueError(f"order_idx must be in [0, {courses_table.shape[0]}) for bet_type {bet_type}")
+    return courses_table[order_idx]
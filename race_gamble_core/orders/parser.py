@@ -0,0 +1,159 @@
+import itertools
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..schemas.bet_type import BetType
+from .order_index import RENPUKU_BET_TYPES, courses_to_order_idx, get_num_courses
+
+# 1チャンクで処理する文字列の数の上限
+DEFAULT_CHUNK_SIZE = 2**20
+# 1コースの番号として許す最大の桁数
+_MAX_COURSE_DIGITS = 3
+
+_ORD_ZERO = ord("0")
+_ORD_NINE = ord("9")
+_ORD_SEPARATOR = ord("-")
+
+
+class ParsedOrders(BaseModel):
+    """着順文字列をまとめてパースした結果を保持するクラス
+
+    不正な行はcoursesが0、order_idxが-1になり、その位置がinvalid_positionsに入る。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    bet_type: BetType
+    num_racers: int
+    courses: NDArray[np.int8]  # (n, コース数)のコース番号。連複系は昇順
+    order_idx: NDArray[np.int64]  # (n,)のorder_idx
+    invalid_positions: NDArray[np.int64]  # 不正な行の位置
+
+    def __len__(self) -> int:
+        return int(self.order_idx.shape[0])
+
+
+def parse_order_strings(
+    order_strs: ArrayLike, bet_type: BetType, num_racers: int = 6, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ParsedOrders:
+    """"1-2-3"のような着順文字列の配列を、Orderオブジェクトを生成せずにまとめてパースする
+
+    文字列は固定長の文字コードの行列として扱い、列ごとにベクトル化して数値を読み取る。
+    コース数、コース番号の範囲(1以上num_racers以下)、コースの重複を検証し、連複系はコースを昇順に並べ替える。
+
+    Args:
+        order_strs (ArrayLike): 着順文字列の配列またはリスト(str, bytesのどちらでもよい)
+        bet_type (BetType): 券種
+        num_racers (int): 出走数
+        chunk_size (int): 1チャンクで処理する文字列の数の上限
+
+    Returns:
+        ParsedOrders: パース結果
+    """
+    order_strs = np.asarray(order_strs)
+    if order_strs.ndim != 1:
+        raise ValueError("order_strs must be 1-dimensional")
+    flag_missing = np.zeros(order_strs.size, dtype=np.bool_)
+    if order_strs.dtype == np.object_:
+        order_strs, flag_missing = _to_fixed_width_strings(order_strs)
+    if order_strs.size > 0 and order_strs.dtype.kind not in "SU":
+        raise ValueError("order_strs must be str or bytes array")
+
+    num_courses = get_num_courses(bet_type)
+    courses = np.zeros((order_strs.size, num_courses), dtype=np.int8)
+    flag_valid = np.zeros(order_strs.size, dtype=np.bool_)
+    for start in range(0, order_strs.size, chunk_size):
+        chunk = slice(start, min(start + chunk_size, order_strs.size))
+        courses[chunk], flag_valid[chunk] = _parse_chunk(order_strs[chunk], num_courses, num_racers)
+    flag_valid &= ~flag_missing
+
+    if bet_type in RENPUKU_BET_TYPES:
+        courses.sort(axis=1)
+
+    order_idx = np.full(order_strs.size, -1, dtype=np.int64)
+    order_idx[flag_valid] = courses_to_order_idx(courses[flag_valid], bet_type, num_racers)
+    return ParsedOrders(
+        bet_type=bet_type,
+        num_racers=num_racers,
+        courses=courses,
+        order_idx=order_idx,
+        invalid_positions=np.flatnonzero(~flag_valid).astype(np.int64),
+    )
+
+
+def _to_fixed_width_strings(order_strs: NDArray[np.object_]) -> tuple[NDArray, NDArray[np.bool_]]:
+    # pandasの列などのobject配列は、要素からstr/bytesの固定長配列を作り直す
+    # None・NaNなどstr/bytes以外の要素は空文字列に置き換え、不正な行として扱う
+    values = order_strs.tolist()
+    flag_missing = np.fromiter(
+        (not isinstance(value, (str, bytes)) for value in values), dtype=np.bool_, count=len(values)
+    )
+    if np.any(flag_missing):
+        flags = flag_missing.tolist()
+        flag_bytes = all(isinstance(value, bytes) for value, missing in zip(values, flags) if not missing)
+        empty = b"" if flag_bytes else ""
+        values = [empty if missing else value for value, missing in zip(values, flags)]
+    return np.asarray(values), flag_missing
+
+
+def _parse_chunk(
+    order_strs: NDArray, num_courses: int, num_racers: int
+) -> tuple[NDArray[np.int8], NDArray[np.bool_]]:
+    # 固定長の文字列配列を(n, 文字数)の文字コードの行列として読む。bytesは1バイト、strは4バイト(UCS-4)
+    num_strs = order_strs.size
+    courses = np.zeros((num_strs, num_courses), dtype=np.int32)
+    flag_parsed = np.zeros(num_strs, dtype=np.bool_)
+    if order_strs.dtype.itemsize > 0:
+        code_dtype = np.uint8 if order_strs.dtype.kind == "S" else np.uint32
+        chars = np.ascontiguousarray(order_strs).view(code_dtype).reshape(num_strs, -1)
+
+        # 全てのコースが1桁の行("1-2-3")は、文字の位置が固定なので直接読み取る
+        simple_width = 2 * num_courses - 1
+        if chars.shape[1] >= simple_width:
+            digits = chars[:, 0:simple_width:2].astype(np.int32) - _ORD_ZERO
+            flag_simple = np.all((digits >= 0) & (digits <= 9), axis=1)
+            flag_simple &= np.all(chars[:, 1:simple_width:2] == _ORD_SEPARATOR, axis=1)
+            flag_simple &= np.all(chars[:, simple_width:] == 0, axis=1)
+            courses[flag_simple] = digits[flag_simple]
+            flag_parsed |= flag_simple
+
+        # それ以外の行(2桁のコースや不正な行)は1文字ずつ読み取る
+        other_rows = np.flatnonzero(~flag_parsed)
+        if other_rows.size > 0:
+            courses[other_rows], flag_parsed[other_rows] = _parse_chars(chars[other_rows], num_courses)
+
+    flag_valid = flag_parsed & np.all((courses >= 1) & (courses <= num_racers), axis=1)
+    for i, j in itertools.combinations(range(num_courses), 2):
+        flag_valid &= courses[:, i] != courses[:, j]
+    return np.where(flag_valid[:, np.newaxis], courses, 0).astype(np.int8), flag_valid
+
+
+def _parse_chars(chars: NDArray, num_courses: int) -> tuple[NDArray[np.int32], NDArray[np.bool_]]:
+    # 文字コードの行列を列ごとに読み進め、"-"区切りのフィールドの数値を読み取る
+    # コース数を超えたフィールドは最後の余分なフィールドに集める
+    num_strs = chars.shape[0]
+    values = np.zeros((num_courses + 1, num_strs), dtype=np.int32)
+    num_digits = np.zeros((num_courses + 1, num_strs), dtype=np.int32)
+    field = np.zeros(num_strs, dtype=np.intp)
+    flag_valid = np.ones(num_strs, dtype=np.bool_)
+    flag_ended = np.zeros(num_strs, dtype=np.bool_)
+    for column in chars.T:
+        digit = column.astype(np.int32) - _ORD_ZERO
+        flag_digit = (digit >= 0) & (digit <= 9)
+        flag_padding = column == 0
+        flag_separator = column == _ORD_SEPARATOR
+        # 使える文字は数字と"-"のみで、末尾の余り(\0)の後に文字があってはいけない
+        flag_valid &= (flag_digit | flag_separator | flag_padding) & ~(flag_ended & ~flag_padding)
+        flag_ended |= flag_padding
+
+        for i in range(num_courses + 1):
+            flag_target = flag_digit & (field == i)
+            values[i] = np.where(flag_target, values[i] * 10 + digit, values[i])
+            num_digits[i] += flag_target
+        field = np.minimum(field + flag_separator, num_courses)
+
+    flag_valid &= field == num_courses - 1
+    flag_valid &= np.all((num_digits[:num_courses] >= 1) & (num_digits[:num_courses] <= _MAX_COURSE_DIGITS), axis=0)
+    return values[:num_courses].T, flag_valid
@@ -0,0 +1,100 @@
+import itertools
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from ..orders.order_index import RENPUKU_BET_TYPES, get_order_courses_table
+from ..schemas.bet_type import BetType
+
+# 1チャンクで展開する(レース数 x 組み合わせ数)の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**22
+
+
+def calc_harville_probs(
+    win_probs: ArrayLike,
+    bet_type: BetType,
+    discount_exponents: tuple[float, float] | None = None,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> NDArray[np.float64]:
+    """単勝確率からHarvilleモデル(Plackett-Luce)で各券種の買い目の確率を計算する
+
+    1着の確率は単勝確率p、2着・3着は残りの選手の中での相対的な強さで決まるとする。
+    discount_exponentsを指定した場合は、2着・3着の強さにp^λ2, p^λ3(を正規化したもの)を使う(Henery/Sternの補正)。
+    人気の選手が2着・3着に来る確率を過大評価しやすいHarvilleモデルの補正として、λ<1(強さを平らにする)を指定することが多い。
+
+    Args:
+        win_probs (ArrayLike): (レース数, 出走数)の単勝確率。各行は合計が1になるように正規化される
+        bet_type (BetType): 券種
+        discount_exponents (tuple[float, float] | None): 2着・3着の強さに使う指数(λ2, λ3)。Noneの場合はHarvilleモデル
+        max_chunk_elements (int): 1チャンクで展開する(レース数 x 組み合わせ数)の要素数の上限
+
+    Returns:
+        NDArray[np.float64]: (レース数, 組み合わせ数)の確率。列の並びはorder_idxの順
+    """
+    win_probs = np.asarray(win_probs, dtype=np.float64)
+    if win_probs.ndim == 1:
+        return calc_harville_probs(win_probs[np.newaxis, :], bet_type, discount_exponents, max_chunk_elements)[0]
+    if win_probs.ndim != 2:
+        raise ValueError("win_probs must be shape (n_races, num_racers)")
+    if np.any(win_probs < 0) or np.any(~np.isfinite(win_probs)):
+        raise ValueError("win_probs must be non-negative finite values")
+
+    win_probs = _normalize_rows(win_probs)
+    if discount_exponents is None:
+        second_strengths = third_strengths = win_probs
+    else:
+        second_strengths = _normalize_rows(win_probs ** discount_exponents[0])
+        third_strengths = _normalize_rows(win_probs ** discount_exponents[1])
+
+    num_races, num_racers = win_probs.shape
+    courses_table = get_order_courses_table(bet_type, num_racers).astype(np.intp) - 1
+    # 連複系は全ての着順の並びの確率を足し合わせる
+    if bet_type in RENPUKU_BET_TYPES:
+        permutations = [list(p) for p in itertools.permutations(range(courses_table.shape[1]))]
+    else:
+        permutations = [list(range(courses_table.shape[1]))]
+
+    probs = np.empty((num_races, courses_table.shape[0]), dtype=np.float64)
+    chunk_size = max(1, max_chunk_elements // max(1, courses_table.shape[0]))
+    for start in range(0, num_races, chunk_size):
+        chunk = slice(start, min(start + chunk_size, num_races))
+        probs[chunk] = 0.0
+        for permutation in permutations:
+            probs[chunk] += _calc_ordered_probs(
+                courses_table[:, permutation], win_probs[chunk], second_strengths[chunk], third_strengths[chunk]
+            )
+    return probs
+
+
+def _calc_ordered_probs(
+    courses: NDArray[np.intp],
+    win_probs: NDArray[np.float64],
+    second_strengths: NDArray[np.float64],
+    third_strengths: NDArray[np.float64],
+) -> NDArray[np.float64]:
+    # coursesの各行(0-indexedのコース)の順に着順が決まる確率を(レース数, 組み合わせ数)で返す
+    first = courses[:, 0]
+    probs = win_probs[:, first]
+    if courses.shape[1] >= 2:
+        second = courses[:, 1]
+        probs = probs * _divide_or_zero(second_strengths[:, second], 1 - second_strengths[:, first])
+    if courses.shape[1] >= 3:
+        third = courses[:, 2]
+        probs = probs * _divide_or_zero(
+            third_strengths[:, third], 1 - third_strengths[:, first] - third_strengths[:, second]
+        )
+    return probs
+
+
+def _divide_or_zero(numerator: NDArray[np.float64], denominator: NDArray[np.float64]) -> NDArray[np.float64]:
+    # 残りの選手の強さの合計が0の場合(確率1の選手がすでに着順に入っている場合)は確率0とする
+    out = np.zeros(np.broadcast_shapes(numerator.shape, denominator.shape), dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator > 1e-12)
+    return out
+
+
+def _normalize_rows(values: NDArray[np.float64]) -> NDArray[np.float64]:
+    row_sums = values.sum(axis=1, keepdims=True)
+    if np.any(row_sums <= 0):
+        raise ValueError("sum of win_probs of each race must be positive")
+    return values / row_sums
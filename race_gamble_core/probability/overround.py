@@ -0,0 +1,218 @@
+from enum import StrEnum
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..orders.order_index import get_num_combinations
+from ..schemas.odds_board_collection import OddsBoardCollection
+
+DEFAULT_MAX_ITER = 100
+DEFAULT_TOL = 1e-12
+
+
+class OverroundMethod(StrEnum):
+    proportional = "proportional"  # 1/オッズをそのまま合計で割る
+    power = "power"  # (1/オッズ)^kの合計が1になるkを求める。人気薄ほど強く割り引く
+    shin = "shin"  # Shinのモデル(インサイダーの割合z)で、人気薄ほど強く割り引く
+
+
+class NormalizedImpliedProbs(BaseModel):
+    """オッズボードから控除・端数の影響を除いて正規化した、レースごとの市場確率
+
+    各フィールドの先頭の次元はボード(レース)。発売のない(オッズ0の)買い目の確率は0で、残りの買い目の確率の合計は1になる。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    method: OverroundMethod
+    probs: NDArray[np.float64]  # (ボード数, 組み合わせ数)の正規化した確率
+    booksums: NDArray[np.float64]  # (ボード数,)の1/オッズの合計(オーバーラウンド)
+    effective_takeouts: NDArray[np.float64]  # (ボード数,)の実効控除率(1 - 1/booksum)。端数処理の影響も含む
+    parameters: NDArray[np.float64]  # (ボード数,)の手法のパラメータ(proportional: 1/booksum, power: k, shin: z)
+
+
+def normalize_implied_probs(
+    odds: ArrayLike,
+    method: OverroundMethod = OverroundMethod.proportional,
+    max_iter: int = DEFAULT_MAX_ITER,
+    tol: float = DEFAULT_TOL,
+) -> NormalizedImpliedProbs:
+    """オッズから、合計が1になるように正規化した市場確率と実効控除率を求める
+
+    `Odds.convert_odds_value_to_prob`の固定の控除率の代わりに、ボードごとの1/オッズの合計から実効控除率を推定する。
+    発売のない(オッズ0の)買い目はマスクで除外し、例外にはしない。power, shinの方程式は全ボードまとめて反復で解く。
+
+    Args:
+        odds (ArrayLike): (ボード数, 組み合わせ数)のオッズ。1次元の場合は1ボードとして扱う
+        method (OverroundMethod): 正規化の手法
+        max_iter (int): power, shinの反復の最大回数
+        tol (float): power, shinの反復の収束判定の閾値(確率の合計の1からの差)
+
+    Returns:
+        NormalizedImpliedProbs: 正規化した市場確率と実効控除率
+    """
+    method = OverroundMethod(method)
+    odds = np.asarray(odds, dtype=np.float64)
+    if odds.ndim == 1:
+        normalized = normalize_implied_probs(odds[np.newaxis, :], method, max_iter, tol)
+        return NormalizedImpliedProbs(
+            method=method,
+            probs=normalized.probs[0],
+            booksums=normalized.booksums,
+            effective_takeouts=normalized.effective_takeouts,
+            parameters=normalized.parameters,
+        )
+    if odds.ndim != 2:
+        raise ValueError("odds must be shape (n_boards, n_combinations)")
+    if np.any(np.isnan(odds)):
+        raise ValueError("odds must not be nan")
+
+    # オッズ0(発売なし)や不正な値の買い目はマスクして確率0にする
+    mask = odds > 0
+    raw_probs = np.zeros_like(odds)
+    np.divide(1.0, odds, out=raw_probs, where=mask)
+    booksums = raw_probs.sum(axis=1)
+    flag_sold = booksums > 0
+    effective_takeouts = np.zeros_like(booksums)
+    np.subtract(1.0, 1.0 / np.where(flag_sold, booksums, 1.0), out=effective_takeouts, where=flag_sold)
+
+    match method:
+        case OverroundMethod.proportional:
+            parameters = np.zeros_like(booksums)
+            np.divide(1.0, booksums, out=parameters, where=flag_sold)
+            probs = raw_probs * parameters[:, np.newaxis]
+        case OverroundMethod.power:
+            parameters = _solve_power_exponents(raw_probs, mask, max_iter, tol)
+            probs = _calc_power_probs(raw_probs, mask, parameters)
+        case OverroundMethod.shin:
+            parameters = _solve_shin_z(raw_probs, booksums, max_iter, tol)
+            probs = _calc_shin_probs(raw_probs, booksums, parameters)
+        case _:
+            raise ValueError(f"method {method} is not supported")
+
+    # 反復の打ち切りによる誤差を除くため、最後に合計で割る
+    prob_sums = probs.sum(axis=1, keepdims=True)
+    np.divide(probs, prob_sums, out=probs, where=prob_sums > 0)
+    return NormalizedImpliedProbs(
+        method=method,
+        probs=probs,
+        booksums=booksums,
+        effective_takeouts=effective_takeouts,
+        parameters=parameters,
+    )
+
+
+def normalize_odds_board_collection(
+    collection: OddsBoardCollection,
+    method: OverroundMethod = OverroundMethod.proportional,
+    max_iter: int = DEFAULT_MAX_ITER,
+    tol: float = DEFAULT_TOL,
+) -> NormalizedImpliedProbs:
+    """複数レース・券種のオッズボードのコレクションを、券種ごとにまとめて正規化する
+
+    同じ券種・出走数のボードを(ボード数, 組み合わせ数)の行列に集めて`normalize_implied_probs`で計算する。
+    券種ごとの実効控除率は、結果のeffective_takeoutsをcollection.bet_typesで集計すれば得られる。
+
+    Args:
+        collection (OddsBoardCollection): オッズボードのコレクション
+        method (OverroundMethod): 正規化の手法
+        max_iter (int): power, shinの反復の最大回数
+        tol (float): power, shinの反復の収束判定の閾値
+
+    Returns:
+        NormalizedImpliedProbs: probsはcollection.oddsと同じ並び(CSR形式で連結した1次元配列)の正規化した確率
+    """
+    num_boards = len(collection)
+    probs = np.zeros(collection.odds.shape, dtype=np.float64)
+    booksums = np.zeros(num_boards, dtype=np.float64)
+    effective_takeouts = np.zeros(num_boards, dtype=np.float64)
+    parameters = np.zeros(num_boards, dtype=np.float64)
+
+    bet_type_names = np.array([str(bet_type) for bet_type in collection.bet_types])
+    keys = sorted(set(zip(collection.bet_types, collection.num_racers.tolist())))
+    for bet_type, num_racers in keys:
+        boards = np.flatnonzero((bet_type_names == str(bet_type)) & (collection.num_racers == num_racers))
+        num_combinations = get_num_combinations(bet_type, num_racers)
+        positions = collection.offsets[boards][:, np.newaxis] + np.arange(num_combinations)
+        normalized = normalize_implied_probs(collection.odds[positions], method, max_iter, tol)
+        probs[positions] = normalized.probs
+        booksums[boards] = normalized.booksums
+        effective_takeouts[boards] = normalized.effective_takeouts
+        parameters[boards] = normalized.parameters
+
+    return NormalizedImpliedProbs(
+        method=OverroundMethod(method),
+        probs=probs,
+        booksums=booksums,
+        effective_takeouts=effective_takeouts,
+        parameters=parameters,
+    )
+
+
+def _calc_power_probs(
+    raw_probs: NDArray[np.float64], mask: NDArray[np.bool_], exponents: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    log_probs = np.zeros_like(raw_probs)
+    np.log(raw_probs, out=log_probs, where=mask)
+    return np.exp(log_probs * exponents[:, np.newaxis]) * mask
+
+
+def _solve_power_exponents(
+    raw_probs: NDArray[np.float64], mask: NDArray[np.bool_], max_iter: int, tol: float
+) -> NDArray[np.float64]:
+    # Σ q_i^k = 1 となるkをNewton法で全ボードまとめて解く
+    # f(k) = Σ q_i^k - 1 は凸な減少関数なので、f(k) > 0 の側(k = 0)から始めると単調に収束する
+    log_probs = np.zeros_like(raw_probs)
+    np.log(raw_probs, out=log_probs, where=mask)
+    num_sold = mask.sum(axis=1)
+    # 発売が1点以下のボードは解がない(1点の場合は確率1)ので、k=1のまま固定する
+    flag_solvable = num_sold >= 2
+    exponents = np.where(flag_solvable, 0.0, 1.0)
+    for _ in range(max_iter):
+        powered = np.exp(log_probs * exponents[:, np.newaxis]) * mask
+        residuals = powered.sum(axis=1) - 1
+        flag_active = flag_solvable & (np.abs(residuals) > tol)
+        if not np.any(flag_active):
+            break
+        derivatives = np.einsum("ij,ij->i", powered, log_probs)
+        steps = np.zeros_like(exponents)
+        np.divide(residuals, derivatives, out=steps, where=flag_active & (derivatives < 0))
+        exponents -= steps
+    return exponents
+
+
+def _calc_shin_probs(
+    raw_probs: NDArray[np.float64], booksums: NDArray[np.float64], z: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    # p_i = (sqrt(z^2 + 4(1 - z) q_i^2 / B) - z) / (2(1 - z))
+    safe_booksums = np.where(booksums > 0, booksums, 1.0)[:, np.newaxis]
+    z = z[:, np.newaxis]
+    probs = (np.sqrt(z * z + 4 * (1 - z) * raw_probs * raw_probs / safe_booksums) - z) / (2 * (1 - z))
+    # q_i = 0 の買い目はz > 0でも0にする
+    return np.where(raw_probs > 0, probs, 0.0)
+
+
+def _solve_shin_z(
+    raw_probs: NDArray[np.float64], booksums: NDArray[np.float64], max_iter: int, tol: float
+) -> NDArray[np.float64]:
+    # Σ p_i = 1 を変形した不動点反復 z = (Σ sqrt(z^2 + 4(1 - z) q_i^2 / B) - 2) / (n - 2) で解く(Jullien & Salanié)
+    # 収束していないボードだけを計算し直す。B <= 1 や発売が2点以下のボードはz = 0(proportionalと同じ結果)とする
+    num_sold = np.count_nonzero(raw_probs, axis=1)
+    z = np.zeros_like(booksums)
+    active = np.flatnonzero((booksums > 1) & (num_sold > 2))
+    scaled_sq_probs = raw_probs[active] ** 2 / booksums[active, np.newaxis]
+    flag_sold = raw_probs[active] > 0
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        current = z[active][:, np.newaxis]
+        roots = np.sqrt(current * current + 4 * (1 - current) * scaled_sq_probs)
+        updated = (np.einsum("ij,ij->i", roots, flag_sold) - 2) / (num_sold[active] - 2)
+        updated = np.clip(updated, 0.0, 1.0 - 1e-12)
+        flag_converged = np.abs(updated - z[active]) < tol
+        z[active] = updated
+        active = active[~flag_converged]
+        scaled_sq_probs = scaled_sq_probs[~flag_converged]
+        flag_sold = flag_sold[~flag_converged]
+    return z
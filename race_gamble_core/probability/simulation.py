@@ -0,0 +1,336 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..orders.order_index import get_num_combinations, get_num_courses, get_order_idx_lookup
+from ..schemas.bet_type import BetType
+from ..utils.factorize import factorize
+
+# 1チャンクで展開する(シミュレーション数 x レース数 x 出走数)の要素数の上限
+DEFAULT_MAX_CHUNK_ELEMENTS = 2**22
+# シミュレーションで決める着順の数(3連単まで)
+_NUM_SAMPLED_PLACES = 3
+
+
+class SimulatedProfits(BaseModel):
+    """買い目の集合(ベットブック)に対する、シミュレーションごとの損益の標本を保持するクラス"""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    group_identifiers: NDArray  # (グループ数,)のグループ識別子(日付など)。グループを指定しない場合は[0]
+    profits: NDArray[np.float64]  # (シミュレーション数, グループ数)のグループごとの損益
+    num_hits: NDArray[np.int64]  # (シミュレーション数,)の的中した買い目の数
+
+    @property
+    def num_sims(self) -> int:
+        return int(self.profits.shape[0])
+
+    @property
+    def total_profits(self) -> NDArray[np.float64]:
+        # シミュレーションごとの全グループの損益の合計
+        return self.profits.sum(axis=1)
+
+
+def sample_finishing_orders(
+    strengths: ArrayLike,
+    num_sims: int,
+    seed: int | np.random.SeedSequence | None = None,
+) -> NDArray[np.int8]:
+    """選手の強さからPlackett-Luceモデルで1着, 2着, 3着をサンプリングする
+
+    log(強さ) + Gumbelノイズの大きい順が、Plackett-Luceモデルの着順の標本になる(Gumbel-maxトリック)。
+    強さに単勝確率を渡すと、1着の確率が単勝確率に、着順の確率がHarvilleモデルに一致する。
+
+    Args:
+        strengths (ArrayLike): (レース数, 出走数)の選手の強さ(0以上)。強さ0の選手は着順に入らない
+        num_sims (int): シミュレーション数
+        seed (int | np.random.SeedSequence | None): 乱数シード
+
+    Returns:
+        NDArray[np.int8]: (シミュレーション数, レース数, 3)の1着, 2着, 3着のコース番号(1始まり)
+    """
+    log_strengths = _to_log_strengths(strengths)
+    return _sample_finishing_orders(log_strengths, num_sims, np.random.default_rng(seed))
+
+
+def finishing_orders_to_order_idx(
+    finishing_orders: ArrayLike, bet_type: BetType, num_racers: int = 6
+) -> NDArray[np.int64]:
+    """着順(1着, 2着, 3着のコース)を、券種の的中買い目のorder_idxにまとめて変換する
+
+    Args:
+        finishing_orders (ArrayLike): (..., 3)の1着, 2着, 3着のコース番号
+        bet_type (BetType): 券種
+        num_racers (int): 出走数
+
+    Returns:
+        NDArray[np.int64]: (...,)の的中買い目のorder_idx
+    """
+    finishing_orders = np.asarray(finishing_orders)
+    if finishing_orders.shape[-1] < _NUM_SAMPLED_PLACES:
+        raise ValueError("finishing_orders must be shape (..., 3)")
+    lookup = get_order_idx_lookup(bet_type, num_racers)
+    courses = tuple(finishing_orders[..., i].astype(np.intp) for i in range(get_num_courses(bet_type)))
+    return lookup[courses].astype(np.int64)
+
+
+def estimate_order_probs(
+    strengths: ArrayLike,
+    bet_type: BetType,
+    num_sims: int,
+    seed: int | None = None,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> NDArray[np.float64]:
+    """シミュレーションで各券種の買い目の確率を推定する
+
+    Args:
+        strengths (ArrayLike): (レース数, 出走数)の選手の強さ
+        bet_type (BetType): 券種
+        num_sims (int): シミュレーション数
+        seed (int | None): 乱数シード
+        max_chunk_elements (int): 1チャンクで展開する(シミュレーション数 x レース数 x 出走数)の要素数の上限
+
+    Returns:
+        NDArray[np.float64]: (レース数, 組み合わせ数)の的中頻度。列の並びはorder_idxの順
+    """
+    log_strengths = _to_log_strengths(strengths)
+    num_races, num_racers = log_strengths.shape
+    num_combinations = get_num_combinations(bet_type, num_racers)
+    # レースごとにorder_idxをずらし、1回のbincountで(レース数, 組み合わせ数)の頻度を数える
+    race_offsets = (np.arange(num_races) * num_combinations)[np.newaxis, :]
+    counts = np.zeros(num_races * num_combinations, dtype=np.int64)
+    for chunk_sims, seed_sequence in _split_sims(num_sims, log_strengths.shape, seed, max_chunk_elements):
+        finishing_orders = _sample_finishing_orders(log_strengths, chunk_sims, np.random.default_rng(seed_sequence))
+        order_idx = finishing_orders_to_order_idx(finishing_orders, bet_type, num_racers) + race_offsets
+        counts += np.bincount(order_idx.ravel(), minlength=counts.size)
+    return counts.reshape(num_races, num_combinations) / num_sims
+
+
+def simulate_hits(
+    strengths: ArrayLike,
+    race_idx: ArrayLike,
+    bet_types: BetType | ArrayLike,
+    order_idx: ArrayLike,
+    num_sims: int,
+    seed: int | None = None,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> NDArray[np.bool_]:
+    """シミュレーションごとに、各買い目が的中したかを求める
+
+    同じレースの異なる券種の買い目が同時に的中する確率など、買い目の的中の同時分布を扱う場合に使う。
+    例えば`(hits[:, i] & hits[:, j]).mean()`が買い目i, jが同時に的中する確率の推定値になる。
+
+    Args:
+        strengths (ArrayLike): (レース数, 出走数)の選手の強さ
+        race_idx (ArrayLike): (買い目数,)の買い目のレースのインデックス(strengthsの行)
+        bet_types (BetType | ArrayLike): 買い目の券種。全て同じ券種の場合はスカラーでよい
+        order_idx (ArrayLike): (買い目数,)の買い目のorder_idx
+        num_sims (int): シミュレーション数
+        seed (int | None): 乱数シード
+        max_chunk_elements (int): 1チャンクで展開する(シミュレーション数 x レース数 x 出走数)の要素数の上限
+
+    Returns:
+        NDArray[np.bool_]: (シミュレーション数, 買い目数)の的中フラグ
+    """
+    log_strengths = _to_log_strengths(strengths)
+    book = _BetBook.create(log_strengths.shape, race_idx, bet_types, order_idx)
+    chunks = _split_sims(num_sims, log_strengths.shape, seed, max_chunk_elements, book.size)
+    list_hits = [
+        _simulate_hits_chunk(log_strengths, book, chunk_sims, seed_sequence) for chunk_sims, seed_sequence in chunks
+    ]
+    return np.concatenate(list_hits, axis=0)
+
+
+def simulate_profits(
+    strengths: ArrayLike,
+    race_idx: ArrayLike,
+    bet_types: BetType | ArrayLike,
+    order_idx: ArrayLike,
+    bet_amounts: ArrayLike,
+    odds: ArrayLike,
+    num_sims: int,
+    race_groups: ArrayLike | None = None,
+    seed: int | None = None,
+    num_workers: int = 1,
+    max_chunk_elements: int = DEFAULT_MAX_CHUNK_ELEMENTS,
+) -> SimulatedProfits:
+    """買い目の集合(ベットブック)の損益の分布をシミュレーションで求める
+
+    買い目の払い戻しは買い付け金額 x オッズとし、オッズはシミュレーションの間固定する。
+    シミュレーションはチャンクに分け、チャンクごとにSeedSequenceから独立した乱数列を割り当てるため、
+    num_workersを変えても同じseedなら同じ結果になる。
+
+    Args:
+        strengths (ArrayLike): (レース数, 出走数)の選手の強さ
+        race_idx (ArrayLike): (買い目数,)の買い目のレースのインデックス(strengthsの行)
+        bet_types (BetType | ArrayLike): 買い目の券種。全て同じ券種の場合はスカラーでよい
+        order_idx (ArrayLike): (買い目数,)の買い目のorder_idx
+        bet_amounts (ArrayLike): (買い目数,)の買い付け金額
+        odds (ArrayLike): (買い目数,)の買い目のオッズ(払い戻し倍率)
+        num_sims (int): シミュレーション数
+        race_groups (ArrayLike | None): (レース数,)のレースのグループ(開催日など)。グループごとの損益を集計する
+        seed (int | None): 乱数シード
+        num_workers (int): チャンクを並列に処理するプロセス数
+        max_chunk_elements (int): 1チャンクで展開する(シミュレーション数 x レース数 x 出走数)の要素数の上限
+
+    Returns:
+        SimulatedProfits: シミュレーションごとの損益の標本
+    """
+    log_strengths = _to_log_strengths(strengths)
+    book = _BetBook.create(log_strengths.shape, race_idx, bet_types, order_idx)
+    bet_amounts = np.asarray(bet_amounts, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    if bet_amounts.shape != (book.size,) or odds.shape != (book.size,):
+        raise ValueError("length of bet_amounts and odds must be the same as race_idx")
+
+    num_races = log_strengths.shape[0]
+    if race_groups is None:
+        race_group_codes, group_identifiers = np.zeros(num_races, dtype=np.intp), np.array([0])
+    else:
+        race_groups = np.asarray(race_groups)
+        if race_groups.shape != (num_races,):
+            raise ValueError("length of race_groups must be the number of races")
+        race_group_codes, group_identifiers = factorize(race_groups)
+    bet_group_codes = race_group_codes[book.race_idx]
+    group_bet_amounts = np.bincount(bet_group_codes, weights=bet_amounts, minlength=group_identifiers.size)
+
+    return_amounts = bet_amounts * odds
+    args = [
+        (log_strengths, book, chunk_sims, seed_sequence, return_amounts, bet_group_codes, group_bet_amounts)
+        for chunk_sims, seed_sequence in _split_sims(num_sims, log_strengths.shape, seed, max_chunk_elements, book.size)
+    ]
+    if num_workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            list_results = list(executor.map(_simulate_profits_chunk, *zip(*args)))
+    else:
+        list_results = [_simulate_profits_chunk(*arg) for arg in args]
+
+    return SimulatedProfits(
+        group_identifiers=group_identifiers,
+        profits=np.concatenate([profits for profits, _ in list_results], axis=0),
+        num_hits=np.concatenate([num_hits for _, num_hits in list_results]),
+    )
+
+
+class _BetBook(BaseModel):
+    # シミュレーション用に検証・券種ごとに分割した買い目
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    num_racers: int
+    race_idx: NDArray[np.int64]
+    order_idx: NDArray[np.int64]
+    bet_type_positions: list[tuple[BetType, NDArray[np.intp]]]
+
+    @property
+    def size(self) -> int:
+        return int(self.race_idx.size)
+
+    @classmethod
+    def create(
+        cls, strengths_shape: tuple[int, int], race_idx: ArrayLike, bet_types: BetType | ArrayLike, order_idx: ArrayLike
+    ) -> "_BetBook":
+        num_races, num_racers = strengths_shape
+        race_idx = np.asarray(race_idx, dtype=np.int64)
+        order_idx = np.asarray(order_idx, dtype=np.int64)
+        if race_idx.ndim != 1 or race_idx.shape != order_idx.shape:
+            raise ValueError("race_idx and order_idx must be 1-dimensional arrays of the same length")
+        if race_idx.size > 0 and (race_idx.min() < 0 or race_idx.max() >= num_races):
+            raise ValueError(f"race_idx must be in [0, {num_races})")
+
+        if isinstance(bet_types, str):
+            bet_types = np.full(race_idx.size, str(bet_types))
+        bet_types = np.asarray(bet_types)
+        if bet_types.shape != race_idx.shape:
+            raise ValueError("length of bet_types must be the same as race_idx")
+        bet_type_positions = []
+        flag_known = np.zeros(race_idx.size, dtype=np.bool_)
+        for bet_type in BetType:
+            positions = np.flatnonzero(bet_types == str(bet_type))
+            if positions.size == 0:
+                continue
+            num_combinations = get_num_combinations(bet_type, num_racers)
+            if np.any((order_idx[positions] < 0) | (order_idx[positions] >= num_combinations)):
+                raise ValueError(f"order_idx must be in [0, {num_combinations}) for bet_type {bet_type}")
+            bet_type_positions.append((bet_type, positions))
+            flag_known[positions] = True
+        if not np.all(flag_known):
+            raise ValueError(f"bet_type {bet_types[~flag_known][0]} is not supported")
+        return cls(num_racers=num_racers, race_idx=race_idx, order_idx=order_idx, bet_type_positions=bet_type_positions)
+
+
+def _to_log_strengths(strengths: ArrayLike) -> NDArray[np.float64]:
+    # 強さを検証して対数をとる。強さ0の選手は-infになり、Gumbelノイズを加えても着順に入らない
+    strengths = np.asarray(strengths, dtype=np.float64)
+    if strengths.ndim == 1:
+        strengths = strengths[np.newaxis, :]
+    if strengths.ndim != 2:
+        raise ValueError("strengths must be shape (n_races, num_racers)")
+    if np.any(strengths < 0) or np.any(~np.isfinite(strengths)):
+        raise ValueError("strengths must be non-negative finite values")
+    if np.any(np.count_nonzero(strengths > 0, axis=1) < _NUM_SAMPLED_PLACES):
+        raise ValueError(f"each race must have at least {_NUM_SAMPLED_PLACES} racers with positive strength")
+    with np.errstate(divide="ignore"):
+        return np.log(strengths)
+
+
+def _split_sims(
+    num_sims: int,
+    strengths_shape: tuple[int, int],
+    seed: int | None,
+    max_chunk_elements: int,
+    num_bets: int = 0,
+) -> list[tuple[int, np.random.SeedSequence]]:
+    # シミュレーションをチャンクに分け、チャンクごとに独立した乱数列を割り当てる
+    if num_sims <= 0:
+        raise ValueError("num_sims must be positive")
+    elements_per_sim = max(1, strengths_shape[0] * strengths_shape[1], num_bets)
+    chunk_size = max(1, max_chunk_elements // elements_per_sim)
+    chunk_sizes = [min(chunk_size, num_sims - start) for start in range(0, num_sims, chunk_size)]
+    return list(zip(chunk_sizes, np.random.SeedSequence(seed).spawn(len(chunk_sizes))))
+
+
+def _sample_finishing_orders(
+    log_strengths: NDArray[np.float64], num_sims: int, rng: np.random.Generator
+) -> NDArray[np.int8]:
+    # (シミュレーション数, レース数, 出走数)のGumbelノイズを加え、上位3つだけを部分選択してから並べる
+    keys = rng.gumbel(size=(num_sims, *log_strengths.shape))
+    keys += log_strengths
+    top = np.argpartition(-keys, _NUM_SAMPLED_PLACES - 1, axis=-1)[..., :_NUM_SAMPLED_PLACES]
+    top_order = np.argsort(-np.take_along_axis(keys, top, axis=-1), axis=-1)
+    return (np.take_along_axis(top, top_order, axis=-1) + 1).astype(np.int8)
+
+
+def _simulate_hits_chunk(
+    log_strengths: NDArray[np.float64], book: _BetBook, num_sims: int, seed_sequence: np.random.SeedSequence
+) -> NDArray[np.bool_]:
+    finishing_orders = _sample_finishing_orders(log_strengths, num_sims, np.random.default_rng(seed_sequence))
+    hits = np.empty((num_sims, book.size), dtype=np.bool_)
+    for bet_type, positions in book.bet_type_positions:
+        winning_order_idx = finishing_orders_to_order_idx(finishing_orders, bet_type, book.num_racers)
+        hits[:, positions] = winning_order_idx[:, book.race_idx[positions]] == book.order_idx[positions]
+    return hits
+
+
+def _simulate_profits_chunk(
+    log_strengths: NDArray[np.float64],
+    book: _BetBook,
+    num_sims: int,
+    seed_sequence: np.random.SeedSequence,
+    return_amounts: NDArray[np.float64],
+    bet_group_codes: NDArray[np.intp],
+    group_bet_amounts: NDArray[np.float64],
+) -> tuple[NDArray[np.float64], NDArray[np.int64]]:
+    # チャンクの(グループごとの損益, 的中数)を返す
+    hits = _simulate_hits_chunk(log_strengths, book, num_sims, seed_sequence)
+    num_groups = group_bet_amounts.size
+    # シミュレーションごとにグループコードをずらし、1回のbincountで(シミュレーション数, グループ数)に集計する
+    sim_idx, bet_idx = np.nonzero(hits)
+    group_returns = np.bincount(
+        sim_idx * num_groups + bet_group_codes[bet_idx],
+        weights=return_amounts[bet_idx],
+        minlength=num_sims * num_groups,
+    ).reshape(num_sims, num_groups)
+    return group_returns - group_bet_amounts, np.count_nonzero(hits, axis=1).astype(np.int64)
@@ -1,6 +1,9 @@
+from typing import Self
+
 from pydantic import BaseModel, field_validator
 
 from ..schemas.order import Order
+from ..utils.model import construct_without_validation
 
 
 class Odds(BaseModel, frozen=True):
@@ -18,6 +21,11 @@ class Odds(BaseModel, frozen=True):
             raise ValueError("odds must be positive")
         return v
 
+    @classmethod
+    def construct_trusted(cls, order: Order, odds: float) -> Self:
+        # バリデーションを行わずに生成する。ライブラリ内部で正しいと分かっている値から生成する場合に使う
+        return construct_without_validation(cls, {"order": order, "odds": odds})
+
     def odds_to_prob(self, koujo_rate: float = 0.25) -> float:
         # オッズを確率値に変換する
         return self.convert_odds_value_to_prob(self.odds, koujo_rate)
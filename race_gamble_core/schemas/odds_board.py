@@ -0,0 +1,126 @@
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+
+from ..orders.order_index import get_num_combinations
+from .bet_type import BetType
+from .odds import Odds
+from .order import Order
+
+
+def convert_odds_to_probs(odds: ArrayLike, koujo_rate: float = 0.25) -> NDArray[np.float64]:
+    """オッズの配列を確率値の配列に変換する(Odds.convert_odds_value_to_probの配列版)
+
+    オッズが0(売り上げが0)の買い目の確率は0とする。任意の形状の配列を受け付ける。
+
+    Args:
+        odds (ArrayLike): オッズの配列
+        koujo_rate (float): 控除率
+
+    Returns:
+        NDArray[np.float64]: 確率値の配列
+    """
+    odds = np.asarray(odds, dtype=np.float64)
+    probs = np.zeros_like(odds)
+    np.divide(1 - koujo_rate, odds, out=probs, where=odds != 0)
+    if np.any((probs < 0) | (probs > 1)):
+        raise ValueError(f"probs must be in [0, 1]. odds must be 0 or >= {1 - koujo_rate}")
+    return probs
+
+
+def calc_expected_rois(odds: ArrayLike, estimated_probs: ArrayLike) -> NDArray[np.float64]:
+    """推定確率とオッズから期待ROI倍率を計算する(Odds.get_expected_roi_from_estimated_prob_and_public_oddsの配列版)
+
+    0よりも大きい値は期待値がプラスであることを表す。
+    """
+    return np.asarray(estimated_probs, dtype=np.float64) * np.asarray(odds, dtype=np.float64) - 1
+
+
+class OddsBoard(BaseModel):
+    """1レース・1券種の全買い目のオッズを、order_idxで引ける配列として保持するクラス
+
+    `odds[order_idx]`が`Order.to_order_idx`で得られるインデックスの買い目のオッズ。0は売り上げなしを表す。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    bet_type: BetType
+    num_racers: int
+    odds: NDArray[np.float64]
+
+    @field_validator("odds", mode="before")
+    @classmethod
+    def convert_odds_array(cls, value: ArrayLike) -> NDArray[np.float64]:
+        odds = np.asarray(value, dtype=np.float64)
+        if odds.ndim != 1:
+            raise ValueError("odds must be 1-dimensional array")
+        if np.any(odds < 0) or np.any(np.isnan(odds)):
+            raise ValueError("odds must be positive")
+        return odds
+
+    @model_validator(mode="after")
+    def check_num_combinations(self) -> Self:
+        num_combinations = get_num_combinations(self.bet_type, self.num_racers)
+        if self.odds.shape[0] != num_combinations:
+            raise ValueError(
+                f"length of odds must be {num_combinations} "
+                f"for bet_type {self.bet_type} and num_racers {self.num_racers}"
+            )
+        return self
+
+    def __len__(self) -> int:
+        return int(self.odds.shape[0])
+
+    @classmethod
+    def from_odds_list(cls, list_odds: list[Odds], num_racers: int) -> Self:
+        """Oddsのリストから生成する。リストに含まれない買い目のオッズは0(売り上げなし)とする"""
+        if not list_odds:
+            raise ValueError("list_odds must not be empty")
+        bet_type = list_odds[0].order.bet_type
+        if any(o.order.bet_type != bet_type for o in list_odds):
+            raise ValueError("all odds must have the same bet_type")
+
+        order_idx = np.array([o.order.to_order_idx(num_racers=num_racers) for o in list_odds], dtype=np.int64)
+        if np.unique(order_idx).size != order_idx.size:
+            raise ValueError("list_odds must not contain duplicated orders")
+
+        odds = np.zeros(get_num_combinations(bet_type, num_racers), dtype=np.float64)
+        odds[order_idx] = [o.odds for o in list_odds]
+        return cls(bet_type=bet_type, num_racers=num_racers, odds=odds)
+
+    def to_odds_list(self) -> list[Odds]:
+        """order_idxの順に並んだOddsのリストに変換する"""
+        orders = Order.get_all_order_patterns(self.bet_type, self.num_racers)
+        return [Odds.construct_trusted(order=order, odds=odds) for order, odds in zip(orders, self.odds.tolist())]
+
+    def get_odds(self, order: Order) -> float:
+        # 着順に対するオッズを取得する
+        if order.bet_type != self.bet_type:
+            raise ValueError(f"bet_type of order must be {self.bet_type}")
+        return float(self.odds[order.to_order_idx(num_racers=self.num_racers)])
+
+    def odds_to_probs(self, koujo_rate: float = 0.25) -> NDArray[np.float64]:
+        # 全買い目のオッズを確率値に変換する
+        return convert_odds_to_probs(self.odds, koujo_rate)
+
+    def get_expected_rois(self, estimated_probs: ArrayLike) -> NDArray[np.float64]:
+        # order_idx順の推定確率から、全買い目の期待ROI倍率を計算する
+        estimated_probs = np.asarray(estimated_probs, dtype=np.float64)
+        if estimated_probs.shape != self.odds.shape:
+            raise ValueError(f"estimated_probs must be shape {self.odds.shape}")
+        return calc_expected_rois(self.odds, estimated_probs)
+
+    def get_top_k_order_idx(self, estimated_probs: ArrayLike, k: int) -> NDArray[np.int64]:
+        """期待ROI倍率が高い上位k個の買い目のorder_idxを、期待ROI倍率の降順で返す
+
+        オッズが0(売り上げなし)の買い目は選ばない。
+        """
+        expected_rois = np.where(self.odds > 0, self.get_expected_rois(estimated_probs), -np.inf)
+        k = min(k, int(np.count_nonzero(self.odds > 0)))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        top_k = np.argpartition(-expected_rois, k - 1)[:k]
+        return top_k[np.argsort(-expected_rois[top_k], kind="stable")].astype(np.int64)
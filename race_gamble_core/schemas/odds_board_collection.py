@@ -0,0 +1,53 @@
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from .bet_type import BetType
+from .odds_board import OddsBoard
+
+
+class OddsBoardCollection(BaseModel):
+    """複数レース・券種のオッズボードを、CSR形式(オフセット + 連結したオッズ)で保持するクラス
+
+    i番目のボードのオッズは`odds[offsets[i]:offsets[i + 1]]`。memmapで読み込んだ場合もコピーせずに参照する。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    race_identifiers: NDArray  # ボードごとのレース識別子
+    bet_types: list[BetType]  # ボードごとの券種
+    num_racers: NDArray[np.int64]  # ボードごとの出走数
+    offsets: NDArray[np.int64]  # (ボード数 + 1,)のオフセット
+    odds: NDArray[np.float64]  # 全ボードのオッズを連結した配列
+
+    def __len__(self) -> int:
+        return len(self.bet_types)
+
+    def __getitem__(self, idx: int) -> OddsBoard:
+        if not -len(self) <= idx < len(self):
+            raise IndexError(f"index {idx} is out of range")
+        idx = idx % len(self)
+        return OddsBoard(
+            bet_type=self.bet_types[idx],
+            num_racers=int(self.num_racers[idx]),
+            odds=self.odds[self.offsets[idx] : self.offsets[idx + 1]],
+        )
+
+    @classmethod
+    def from_odds_boards(cls, race_identifiers: ArrayLike, odds_boards: list[OddsBoard]) -> Self:
+        """レース識別子とオッズボードのリストから生成する"""
+        race_identifiers = np.asarray(race_identifiers)
+        if race_identifiers.shape != (len(odds_boards),):
+            raise ValueError("length of race_identifiers and odds_boards must be the same")
+        offsets = np.zeros(len(odds_boards) + 1, dtype=np.int64)
+        np.cumsum([len(board) for board in odds_boards], out=offsets[1:])
+        odds = np.concatenate([board.odds for board in odds_boards]) if odds_boards else np.zeros(0)
+        return cls(
+            race_identifiers=race_identifiers,
+            bet_types=[board.bet_type for board in odds_boards],
+            num_racers=np.array([board.num_racers for board in odds_boards], dtype=np.int64),
+            offsets=offsets,
+            odds=odds.astype(np.float64, copy=False),
+        )
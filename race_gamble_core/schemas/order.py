@@ -1,15 +1,28 @@
-import itertools
+from collections.abc import Iterator
 from functools import lru_cache
-from typing import Self
+from typing import Any, Self
 
+import numpy as np
+from numpy.typing import NDArray
 from pydantic import BaseModel, field_validator, model_serializer, model_validator
 
+from ..orders.aggregation import get_renpuku_member_table
+from ..orders.order_index import courses_to_order_idx, get_order_courses_table, get_order_idx_lookup
+from ..utils.model import construct_without_validation
 from .bet_type import BetType
 
+# パック済み整数コードで、券種と各コース番号に割り当てるビット数
+_COURSE_BITS = 8
+_MAX_COURSE_NUMBER = (1 << _COURSE_BITS) - 1
+_BET_TYPE_CODES = {bet_type: i for i, bet_type in enumerate(BetType)}
+
 
 @lru_cache(maxsize=None)
 def _prepare_order_idx_map(num_racers: int, bet_type: BetType) -> dict[str, int]:
-    """Orderを0-indexedのラベルに変換するためのマッピングを準備する"""
+    """Orderを0-indexedのラベルに変換するためのマッピングを準備する
+
+    文字列キーのマッピング。配列での変換には`orders.order_index`のテーブル(同じインデックス順)を使う
+    """
     mapping = {}
     idx = 0
     match bet_type:
@@ -49,6 +62,45 @@ def _prepare_order_idx_map(num_racers: int, bet_type: BetType) -> dict[str, int]
             raise ValueError(f"bet_type {bet_type} is not supported")
 
 
+# Order.intern, Order.construct_interned_trustedで共有するインスタンスのキャッシュ
+# キーは(クラス, 券種, 1着, 2着, 3着)で、コースは渡された順のまま(連複系もソートしない)。
+# 連複系の"3-1"と"1-3"は別のインスタンスになるが、比較・ハッシュはソート済みのパック済みコードで行うので等しい
+_INTERNED_ORDERS: dict[tuple, "Order"] = {}
+# キャッシュする件数の上限。有効な着順は有限で、18艇立てまでの全ての着順(連複系のコースの並べ替えを含む)が収まる。
+# 上限に達した後に生成したOrderはキャッシュせずにそのまま返す
+_MAX_INTERNED_ORDERS = 1 << 16
+
+
+def _cache_interned_order(key: tuple, order: "Order") -> "Order":
+    # キャッシュに登録して共有インスタンスを返す。上限に達している場合は登録しない
+    if len(_INTERNED_ORDERS) >= _MAX_INTERNED_ORDERS:
+        return order
+    return _INTERNED_ORDERS.setdefault(key, order)
+
+
+@lru_cache(maxsize=None)
+def _get_all_order_patterns(cls: type["Order"], bet_type: BetType, num_racers: int) -> tuple["Order", ...]:
+    # Order.get_all_order_patternsのキャッシュ本体
+    # 変換テーブルのコースは正しいことが分かっているため、バリデーションを行わずに共有インスタンスを生成する
+    courses_table = get_order_courses_table(bet_type, num_racers)
+    return tuple(cls.construct_interned_trusted(bet_type, *courses) for courses in courses_table.tolist())
+
+
+def _pack_order_code(
+    bet_type: BetType, first_course: int, second_course: int | None, third_course: int | None
+) -> int:
+    # (券種, コース)を整数コードにパックする。連複系のコースはソートしてからパックする
+    courses = [first_course, second_course or 0, third_course or 0]
+    if bet_type in (BetType.nirenpuku, BetType.sanrenpuku):
+        num_courses = 2 if bet_type == BetType.nirenpuku else 3
+        courses[:num_courses] = sorted(courses[:num_courses])
+
+    code = _BET_TYPE_CODES[bet_type]
+    for course in courses:
+        code = (code << _COURSE_BITS) | course
+    return code
+
+
 class Order(BaseModel, frozen=True):
     """着順(Order)に関する基底クラス。連複での順番ソートなどのロジックを内包する
     利用する際には 2連単や3連単などの`bet_type`をメンバーに追加する
@@ -70,7 +122,7 @@ class Order(BaseModel, frozen=True):
     @classmethod
     def validate_course_number(cls, course_number: int | None) -> int | None:
         if course_number is not None:
-            if course_number <= 0:
+            if course_number <= 0 or course_number > _MAX_COURSE_NUMBER:
                 raise ValueError("Invalid course number.")
         return course_number
 
@@ -98,26 +150,53 @@ class Order(BaseModel, frozen=True):
 
         return self
 
+    def model_post_init(self, __context) -> None:
+        # 構築時に一度だけパック済み整数コードを計算する
+        # (券種, ソート済みコース)をパックした整数コード。ハッシュ・比較・コース番号の取得に使う
+        # pydanticのPrivateAttrは__getattr__経由の参照で遅いため、インスタンスの__dict__に直接格納する
+        self.__dict__["_code"] = _pack_order_code(
+            self.bet_type, self.first_course, self.second_course, self.third_course
+        )
+
+    def model_copy(self, *, update: dict[str, Any] | None = None, deep: bool = False) -> Self:
+        # model_copyはmodel_post_initを呼ばないので、updateでコースが変わった場合に備えてコードを計算し直す
+        copied = super().model_copy(update=update, deep=deep)
+        copied.__dict__["_code"] = _pack_order_code(
+            copied.bet_type, copied.first_course, copied.second_course, copied.third_course
+        )
+        return copied
+
+    def _get_course_from_code(self, position: int) -> int:
+        # パック済み整数コードから、ソート済み着順のposition番目(0-indexed)のコース番号を取り出す
+        course = (self._code >> (_COURSE_BITS * (2 - position))) & _MAX_COURSE_NUMBER
+        if course == 0:
+            raise ValueError(f"bet_type {self.bet_type} does not have course at position {position + 1}")
+        return course
+
     def __hash__(self) -> int:
-        return hash((self.__class__, self.__str__()))
+        return hash(self._code)
 
-    def __eq__(self, other: Self) -> bool:
-        return self.__class__ == other.__class__ and self.__str__() == other.__str__()
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Order):
+            return NotImplemented
+        return self.__class__ == other.__class__ and self._code == other._code
 
-    def __lt__(self, other):
-        return self.__str__() < other.__str__()
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, Order):
+            return NotImplemented
+        return self._code < other._code
 
     def get_first_course(self) -> int:
         # ソート済み着順の1着のコース番号を取得する
-        return int(self._format_order().split("-")[0])
+        return self._get_course_from_code(0)
 
     def get_second_course(self) -> int:
         # ソート済み着順の2着のコース番号を取得する
-        return int(self._format_order().split("-")[1])
+        return self._get_course_from_code(1)
 
     def get_third_course(self) -> int:
         # ソート済み着順の3着のコース番号を取得する
-        return int(self._format_order().split("-")[2])
+        return self._get_course_from_code(2)
 
     @model_serializer
     def serialize_order(self) -> str:
@@ -125,25 +204,63 @@ class Order(BaseModel, frozen=True):
 
     @classmethod
     def create_from_str_order(cls, order_str: str, bet_type: BetType) -> Self:
-        # "1-2-3"のような文字列からOrderを生成
+        """"1-2-3"のような文字列からOrderを生成する
+
+        同じ文字列に対しては共有されたインスタンス(flyweight)を返す。コースは文字列の順のまま格納される。
+        """
         courses = order_str.split("-")
-        if len(courses) == 1:
-            return cls(bet_type=bet_type, first_course=int(courses[0]))
-        elif len(courses) == 2:
-            return cls(
-                bet_type=bet_type,
-                first_course=int(courses[0]),
-                second_course=int(courses[1]),
-            )
-        elif len(courses) == 3:
-            return cls(
-                bet_type=bet_type,
-                first_course=int(courses[0]),
-                second_course=int(courses[1]),
-                third_course=int(courses[2]),
-            )
-        else:
+        if not 1 <= len(courses) <= 3:
             raise ValueError("order_str must be 1-3 courses")
+        return cls.intern(bet_type, *(int(course) for course in courses))
+
+    @classmethod
+    def intern(
+        cls, bet_type: BetType, first_course: int, second_course: int | None = None, third_course: int | None = None
+    ) -> Self:
+        """同じコースの並びに対して共有されたインスタンスを返すファクトリ
+
+        連複系のコースもソートせず、渡された順のまま格納する(`first_course`などのフィールドは生成時の値になる)。
+        """
+        bet_type = BetType(bet_type)
+        key = (cls, bet_type, first_course, second_course, third_course)
+        order = _INTERNED_ORDERS.get(key)
+        if order is None:
+            # バリデーションに失敗した場合は例外となりキャッシュされない
+            order = cls(
+                bet_type=bet_type, first_course=first_course, second_course=second_course, third_course=third_course
+            )
+            order = _cache_interned_order(key, order)
+        return order
+
+    @classmethod
+    def construct_trusted(
+        cls, bet_type: BetType, first_course: int, second_course: int | None = None, third_course: int | None = None
+    ) -> Self:
+        """バリデーションを行わずにOrderを生成する
+
+        ライブラリ内部で、正しいと分かっている値(変換テーブルなど)から生成する場合に使う。
+        券種に対するコース数、コース番号の範囲、重複のチェックは行わないので、呼び出し側で保証すること。
+        """
+        values = {
+            "first_course": first_course,
+            "second_course": second_course,
+            "third_course": third_course,
+            "bet_type": bet_type,
+            "_code": _pack_order_code(bet_type, first_course, second_course, third_course),
+        }
+        return construct_without_validation(cls, values)
+
+    @classmethod
+    def construct_interned_trusted(
+        cls, bet_type: BetType, first_course: int, second_course: int | None = None, third_course: int | None = None
+    ) -> Self:
+        """`intern`と同じ共有インスタンスを返すが、キャッシュにない場合はバリデーションを行わずに生成する"""
+        key = (cls, bet_type, first_course, second_course, third_course)
+        order = _INTERNED_ORDERS.get(key)
+        if order is None:
+            order = cls.construct_trusted(bet_type, first_course, second_course, third_course)
+            order = _cache_interned_order(key, order)
+        return order
 
     def _format_order(self) -> str:
         """コースをフォーマットして返す. 連複系の場合は昇順ソートして返す"""
@@ -176,155 +293,81 @@ class Order(BaseModel, frozen=True):
 
     @classmethod
     def create_rentan_orders_from_renpuku(cls, order_str: str) -> list[Self]:
-        # 連複のオーダーから連単のオーダーを生成する
+        """連複のオーダーから、同じ組み合わせの連単のオーダーを生成する
+
+        `orders.aggregation`の変換テーブルを使う。連単は連単のorder_idxの昇順(昇順のコースの並べ替えの順)で返す。
+        """
         courses = order_str.split("-")
 
         if len(courses) == 2:
-            bet_type = BetType.nirentan
-
-            try:
-                cls.create_from_str_order(
-                    bet_type=BetType.nirenpuku, order_str=order_str
-                )
-            except ValueError:
-                raise ValueError("invalid order for nirenpuku")
-
+            renpuku_bet_type, bet_type = BetType.nirenpuku, BetType.nirentan
         elif len(courses) == 3:
-            bet_type = BetType.sanrentan
-
-            try:
-                cls.create_from_str_order(
-                    bet_type=BetType.sanrenpuku, order_str=order_str
-                )
-            except ValueError:
-                raise ValueError("invalid order for sanrenpuku")
-
+            renpuku_bet_type, bet_type = BetType.sanrenpuku, BetType.sanrentan
         else:
             raise ValueError("order_str must be 2-3 courses")
 
-        rentan_perm = list(itertools.permutations(courses))
-
-        list_rentan_orders = []
-        for p in rentan_perm:
-            order = cls.create_from_str_order(bet_type=bet_type, order_str="-".join(p))
-            list_rentan_orders.append(order)
+        try:
+            course_numbers = [int(course) for course in courses]
+            # 出走数は変換に必要な最小の数(最大のコース番号)とする
+            num_racers = max(course_numbers)
+            renpuku_order_idx = int(courses_to_order_idx([course_numbers], renpuku_bet_type, num_racers)[0])
+        except ValueError:
+            raise ValueError(f"invalid order for {renpuku_bet_type}")
 
-        return list_rentan_orders
+        rentan_order_idx = get_renpuku_member_table(renpuku_bet_type, num_racers)[renpuku_order_idx]
+        return [cls.idx_to_order(int(i), bet_type=bet_type, num_racers=num_racers) for i in rentan_order_idx]
 
     @classmethod
-    def get_all_order_patterns(cls, bet_type: BetType, num_racers: int) -> list[Self]:
-        match bet_type:
-            case BetType.tansyou:
-                return sorted(
-                    list(
-                        set(
-                            cls(bet_type=BetType.tansyou, first_course=i)
-                            for i in range(1, num_racers + 1)
-                        )
-                    )
-                )
-
-            case BetType.nirentan:
-                return sorted(
-                    list(
-                        set(
-                            cls(
-                                bet_type=BetType.nirentan,
-                                first_course=i,
-                                second_course=j,
-                            )
-                            for i in range(1, num_racers + 1)
-                            for j in range(1, num_racers + 1)
-                            if i != j
-                        )
-                    )
-                )
-
-            case BetType.nirenpuku:
-                return sorted(
-                    list(
-                        set(
-                            cls(
-                                bet_type=BetType.nirenpuku,
-                                first_course=i,
-                                second_course=j,
-                            )
-                            for i in range(1, num_racers + 1)
-                            for j in range(1, num_racers + 1)
-                            if i != j
-                        )
-                    )
-                )
+    def get_all_order_patterns(
+        cls, bet_type: BetType, num_racers: int, as_array: bool = False
+    ) -> tuple[Self, ...] | NDArray[np.int8]:
+        """券種・出走数に対する全ての着順を、ソート済み(order_idxの順)で返す
+
+        結果は(券種, 出走数)ごとにキャッシュされ、呼び出し間で共有される不変のタプルで返す。
+        並びはコース番号の数値としての辞書順で、`to_order_idx`のインデックスと一致する。
+        文字列としてのソート順とは、出走数が10以上の場合に異なる(例: "2-1"は"10-1"より前)。
+
+        Args:
+            bet_type (BetType): 券種
+            num_racers (int): 出走数
+            as_array (bool): Trueの場合、Orderの代わりに(組み合わせ数, コース数)のコース番号の読み取り専用配列を返す
+
+        Returns:
+            tuple[Self, ...] | NDArray[np.int8]: 全ての着順
+        """
+        if as_array:
+            return get_order_courses_table(BetType(bet_type), num_racers)
+        return _get_all_order_patterns(cls, BetType(bet_type), num_racers)
 
-            case BetType.sanrentan:
-                return sorted(
-                    list(
-                        set(
-                            cls(
-                                bet_type=BetType.sanrentan,
-                                first_course=i,
-                                second_course=j,
-                                third_course=k,
-                            )
-                            for i in range(1, num_racers + 1)
-                            for j in range(1, num_racers + 1)
-                            for k in range(1, num_racers + 1)
-                            if i != j and j != k and i != k
-                        )
-                    )
-                )
+    @classmethod
+    def iter_order_patterns(cls, bet_type: BetType, num_racers: int) -> Iterator[Self]:
+        """`get_all_order_patterns`と同じ順で着順を1つずつ生成する
 
-            case BetType.sanrenpuku:
-                return sorted(
-                    list(
-                        set(
-                            cls(
-                                bet_type=BetType.sanrenpuku,
-                                first_course=i,
-                                second_course=j,
-                                third_course=k,
-                            )
-                            for i in range(1, num_racers + 1)
-                            for j in range(1, num_racers + 1)
-                            for k in range(1, num_racers + 1)
-                            if i != j and j != k and i != k
-                        )
-                    )
-                )
+        全ての着順を保持しないため、出走数が多い場合にメモリを抑えられる。生成したOrderは共有インスタンスではない。
+        """
+        for courses in get_order_courses_table(BetType(bet_type), num_racers).tolist():
+            yield cls.construct_trusted(bet_type, *courses)
 
-            case _:
-                raise ValueError(f"bet_type {bet_type} is not supported")
+    def get_courses(self) -> tuple[int, ...]:
+        # ソート済み着順のコース番号のタプルを取得する
+        num_courses = 1 + (self.second_course is not None) + (self.third_course is not None)
+        return tuple(self._get_course_from_code(i) for i in range(num_courses))
 
     def to_order_idx(self, num_racers: int = 6) -> int:
         """Orderを0-indexedのラベルに変換する"""
+        courses = self.get_courses()
+        if max(courses) > num_racers:
+            raise ValueError(f"Order {self} is not valid for bet_type {self.bet_type}")
 
-        order_str = self._format_order()
-        order_idx_map = _prepare_order_idx_map(num_racers, self.bet_type)
-
-        if order_str not in order_idx_map:
-            raise ValueError(
-                f"Order {order_str} is not valid for bet_type {self.bet_type}"
-            )
-
-        return order_idx_map[order_str]
+        order_idx = int(get_order_idx_lookup(self.bet_type, num_racers)[courses])
+        if order_idx < 0:
+            raise ValueError(f"Order {self} is not valid for bet_type {self.bet_type}")
+        return order_idx
 
     @classmethod
-    def idx_to_order(
-        cls, order_idx: int, bet_type: BetType, num_racers: int = 6
-    ) -> Self:
+    def idx_to_order(cls, order_idx: int, bet_type: BetType, num_racers: int = 6) -> Self:
         """0-indexedのラベルからOrderに変換する"""
-
-        order_idx_map = _prepare_order_idx_map(num_racers, bet_type)
-        reverse_map = {v: k for k, v in order_idx_map.items()}
-
-        if order_idx not in reverse_map:
-            raise ValueError(
-                f"Order index {order_idx} is not valid for bet_type {bet_type}"
-            )
-        try:
-            order_str = reverse_map[order_idx]
-        except KeyError:
-            raise ValueError(
-                f"Order index {order_idx} is not valid for bet_type {bet_type}"
-            )
-        return cls.create_from_str_order(order_str=order_str, bet_type=bet_type)
+        courses_table = get_order_courses_table(bet_type, num_racers)
+        if not 0 <= order_idx < courses_table.shape[0]:
+            raise ValueError(f"Order index {order_idx} is not valid for bet_type {bet_type}")
+        return cls.construct_interned_trusted(bet_type, *courses_table[order_idx].tolist())
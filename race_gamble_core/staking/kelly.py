@@ -0,0 +1,206 @@
+from enum import StrEnum
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+# 賭け金の単位(BetStrategyResultsのbet_amountsは100円単位)
+BET_UNIT = 100
+
+
+class KellyMethod(StrEnum):
+    independent = "independent"  # 買い目ごとに単独でKelly基準を計算する
+    simultaneous = "simultaneous"  # レース内の排反な買い目をまとめて、対数資産の期待値を最大化する
+
+
+class KellyAllocation(BaseModel):
+    """Kelly基準による賭け金の配分結果
+
+    bet_amountsは(レース数, 組み合わせ数)で、`bet_amounts.ravel()`がレース・order_idx順の買い目のbet_amountsになる。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    fractions: NDArray[np.float64]  # 資金に対する賭け金の割合(fractional Kellyの係数を掛けた後、上限・丸めの前)
+    bet_amounts: NDArray[np.int64]  # 上限を適用して100円単位に切り捨てた賭け金
+
+    @property
+    def total_bet_amount(self) -> int:
+        return int(self.bet_amounts.sum())
+
+
+def calc_kelly_fractions(
+    probs: ArrayLike, odds: ArrayLike, method: KellyMethod = KellyMethod.simultaneous
+) -> NDArray[np.float64]:
+    """推定確率とオッズから、資金に対する最適な賭け金の割合(Kelly基準)を計算する
+
+    simultaneousでは、1レースの買い目は互いに排反(的中は高々1つ)として、期待値の高い順に買い目を加えていく
+    Kellyの方法で最適な買い目の集合Sと留保率Rを求め、f_i = p_i - R / o_i とする。
+    independentでは買い目ごとに f_i = (p_i o_i - 1) / (o_i - 1) とし、レース内の合計が1を超える場合は1に縮める。
+    オッズ1以下(発売なしの0を含む)の買い目の割合は0とする。
+
+    Args:
+        probs (ArrayLike): (レース数, 組み合わせ数)の推定確率。1次元の場合は1レースとして扱う
+        odds (ArrayLike): probsと同じ形状のオッズ
+        method (KellyMethod): 計算方法
+
+    Returns:
+        NDArray[np.float64]: probsと同じ形状の賭け金の割合
+    """
+    method = KellyMethod(method)
+    probs = np.asarray(probs, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    if probs.shape != odds.shape:
+        raise ValueError("probs and odds must be the same shape")
+    if probs.ndim == 1:
+        return calc_kelly_fractions(probs[np.newaxis, :], odds[np.newaxis, :], method)[0]
+    if probs.ndim != 2:
+        raise ValueError("probs must be shape (n_races, n_combinations)")
+    if np.any((probs < 0) | (probs > 1)):
+        raise ValueError("probs must be in [0, 1]")
+
+    flag_valid = odds > 1
+    inverse_odds = np.zeros_like(odds)
+    np.divide(1.0, odds, out=inverse_odds, where=flag_valid)
+
+    match method:
+        case KellyMethod.independent:
+            fractions = np.zeros_like(probs)
+            np.divide(probs * odds - 1, odds - 1, out=fractions, where=flag_valid)
+            np.maximum(fractions, 0.0, out=fractions)
+            race_totals = fractions.sum(axis=1, keepdims=True)
+            np.divide(fractions, race_totals, out=fractions, where=race_totals > 1)
+            return fractions
+        case KellyMethod.simultaneous:
+            return _calc_simultaneous_kelly_fractions(probs, inverse_odds, flag_valid)
+        case _:
+            raise ValueError(f"method {method} is not supported")
+
+
+def allocate_kelly_stakes(
+    probs: ArrayLike,
+    odds: ArrayLike,
+    bankroll: float | ArrayLike,
+    kelly_fraction: float = 1.0,
+    method: KellyMethod = KellyMethod.simultaneous,
+    budget: float | None = None,
+    max_race_amount: float | None = None,
+    max_bet_amount: float | None = None,
+) -> KellyAllocation:
+    """Kelly基準(fractional Kelly)の賭け金を、上限を守りつつ100円単位に丸めてまとめて配分する
+
+    賭け金 = 資金 x kelly_fraction x Kelly基準の割合 を計算し、次の順に上限を適用してから100円単位に切り捨てる。
+    切り捨てなので、丸めた後も上限は守られる。
+    1. 買い目ごとの上限(max_bet_amount)で頭打ちにする
+    2. レースごとの合計が上限(max_race_amount)を超える場合は、レース内で比例的に縮める
+    3. 全レースの合計が予算(budget)を超える場合は、全体を比例的に縮める
+
+    Args:
+        probs (ArrayLike): (レース数, 組み合わせ数)の推定確率
+        odds (ArrayLike): probsと同じ形状のオッズ
+        bankroll (float | ArrayLike): 資金。スカラーまたは(レース数,)のレースごとの資金
+        kelly_fraction (float): Kelly基準の割合に掛ける係数(0 < kelly_fraction <= 1でfractional Kelly)
+        method (KellyMethod): Kelly基準の計算方法
+        budget (float | None): 全レースの賭け金の合計の上限
+        max_race_amount (float | None): レースごとの賭け金の合計の上限
+        max_bet_amount (float | None): 買い目ごとの賭け金の上限
+
+    Returns:
+        KellyAllocation: 賭け金の割合と100円単位の賭け金
+    """
+    if kelly_fraction <= 0:
+        raise ValueError("kelly_fraction must be positive")
+    fractions = calc_kelly_fractions(probs, odds, method) * kelly_fraction
+    flag_single_race = fractions.ndim == 1
+    fractions_2d = fractions[np.newaxis, :] if flag_single_race else fractions
+
+    bankroll = np.asarray(bankroll, dtype=np.float64)
+    if bankroll.ndim == 0:
+        bankroll = np.full(fractions_2d.shape[0], float(bankroll))
+    if bankroll.shape != (fractions_2d.shape[0],) or np.any(bankroll < 0):
+        raise ValueError("bankroll must be a non-negative scalar or an array of shape (n_races,)")
+
+    amounts = fractions_2d * bankroll[:, np.newaxis]
+    if max_bet_amount is not None:
+        np.minimum(amounts, max_bet_amount, out=amounts)
+    if max_race_amount is not None:
+        race_totals = amounts.sum(axis=1)
+        scales = np.ones_like(race_totals)
+        np.divide(max_race_amount, race_totals, out=scales, where=race_totals > max_race_amount)
+        amounts *= scales[:, np.newaxis]
+    if budget is not None:
+        total = amounts.sum()
+        if total > budget:
+            amounts *= budget / total
+
+    # 縮めた後の299.999...のような浮動小数点誤差で1単位少なくならないよう、小さな値を足してから100円単位に切り捨てる
+    # 足した値で切り上がった分は上限(買い目・レース・予算)を超えうるので、整数の単位数で上限を適用し直す
+    units_float = amounts / BET_UNIT
+    units = np.floor(units_float + 1e-9).astype(np.int64)
+    remainders = units_float - units
+    if max_bet_amount is not None:
+        np.minimum(units, int(max_bet_amount // BET_UNIT), out=units)
+    if max_race_amount is not None:
+        excess = units.sum(axis=1) - int(max_race_amount // BET_UNIT)
+        races = np.flatnonzero(excess > 0)
+        if races.size > 0:
+            units[races] -= _calc_unit_removals(units[races], remainders[races], excess[races])
+    if budget is not None:
+        excess = int(units.sum()) - int(budget // BET_UNIT)
+        if excess > 0:
+            flat_units = units.reshape(1, -1)
+            units -= _calc_unit_removals(flat_units, remainders.reshape(1, -1), np.array([excess])).reshape(units.shape)
+    bet_amounts = units * BET_UNIT
+    if flag_single_race:
+        bet_amounts = bet_amounts[0]
+    return KellyAllocation(fractions=fractions, bet_amounts=bet_amounts)
+
+
+def _calc_simultaneous_kelly_fractions(
+    probs: NDArray[np.float64], inverse_odds: NDArray[np.float64], flag_valid: NDArray[np.bool_]
+) -> NDArray[np.float64]:
+    # 期待値(p_i o_i)の高い順に並べ、先頭からk-1個を選んだときの留保率
+    # R_k = (1 - Σ_{i<k} p_i) / (1 - Σ_{i<k} 1/o_i) より期待値が大きい間は買い目を加える
+    expected_returns = np.zeros_like(probs)
+    np.divide(probs, inverse_odds, out=expected_returns, where=flag_valid)
+    order = np.argsort(-expected_returns, axis=1, kind="stable")
+    sorted_probs = np.take_along_axis(probs, order, axis=1)
+    sorted_inverse_odds = np.take_along_axis(inverse_odds, order, axis=1)
+    sorted_expected_returns = np.take_along_axis(expected_returns, order, axis=1)
+
+    num_races, num_combinations = probs.shape
+    prob_cumsums = np.zeros((num_races, num_combinations + 1))
+    np.cumsum(sorted_probs, axis=1, out=prob_cumsums[:, 1:])
+    inverse_odds_cumsums = np.zeros((num_races, num_combinations + 1))
+    np.cumsum(sorted_inverse_odds, axis=1, out=inverse_odds_cumsums[:, 1:])
+
+    # reserve_rates[:, k]は先頭k個を選んだときの留保率。分母が0以下(全買い目を買い占める)の場合は加えない
+    denominators = 1 - inverse_odds_cumsums
+    reserve_rates = np.full_like(denominators, np.inf)
+    np.divide(1 - prob_cumsums, denominators, out=reserve_rates, where=denominators > 0)
+    flag_add = (sorted_expected_returns > reserve_rates[:, :-1]) & (sorted_inverse_odds > 0)
+    # 条件を満たす先頭からの連続した個数が最適な集合の大きさ
+    num_selected = np.where(np.all(flag_add, axis=1), num_combinations, np.argmin(flag_add, axis=1))
+    selected_reserve_rates = reserve_rates[np.arange(num_races), num_selected]
+
+    sorted_fractions = sorted_probs - selected_reserve_rates[:, np.newaxis] * sorted_inverse_odds
+    sorted_fractions[np.arange(num_combinations)[np.newaxis, :] >= num_selected[:, np.newaxis]] = 0.0
+    np.maximum(sorted_fractions, 0.0, out=sorted_fractions)
+
+    fractions = np.zeros_like(probs)
+    np.put_along_axis(fractions, order, sorted_fractions, axis=1)
+    return fractions
+
+
+def _calc_unit_removals(
+    units: NDArray[np.int64], remainders: NDArray[np.float64], excess: NDArray[np.int64]
+) -> NDArray[np.int64]:
+    # 行ごとに、切り捨ての端数が小さい(切り上がった分は負になる)買い目から1単位ずつ、超過した単位数だけ減らす
+    # 超過は切り上げによるものなので、賭け金のある買い目の数を超えることはない
+    keys = np.where(units > 0, remainders, np.inf)
+    order = np.argsort(keys, axis=1)
+    flag_remove = np.arange(units.shape[1])[np.newaxis, :] < excess[:, np.newaxis]
+    flag_remove &= np.isfinite(np.take_along_axis(keys, order, axis=1))
+    removals = np.zeros_like(units)
+    np.put_along_axis(removals, order, flag_remove.astype(np.int64), axis=1)
+    return removals
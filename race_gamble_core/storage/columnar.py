@@ -0,0 +1,170 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from ..schemas.bet_type import BetType
+from ..schemas.evaluation_results import BetStrategyResults
+from ..schemas.odds_board_collection import OddsBoardCollection
+from ..utils.factorize import factorize
+
+# ディスク上の形式のバージョン。形式を変更した場合は上げる
+SCHEMA_VERSION = 1
+
+_META_FILE_NAME = "meta.json"
+_KIND_BET_STRATEGY_RESULTS = "bet_strategy_results"
+_KIND_ODDS_BOARDS = "odds_boards"
+
+
+def save_bet_strategy_results(results: BetStrategyResults, path: str | Path, overwrite: bool = False) -> None:
+    """BetStrategyResultsを列ごとの.npyファイルとメタデータ(meta.json)のディレクトリに保存する
+
+    レース識別子はユニークな値の辞書(race_dictionary.npy)と整数コード列(race_codes.npy)に分けて保存する。
+
+    Args:
+        results (BetStrategyResults): 保存する買い付け戦略の結果
+        path (str | Path): 保存先のディレクトリ
+        overwrite (bool): Trueの場合、既存のディレクトリに上書きする
+    """
+    race_codes, race_dictionary = results.get_race_codes()
+    confirmed_odds, flag_ground_truth_orders, bet_amounts = results.get_columns()
+    columns = {
+        "race_codes": race_codes.astype(_get_code_dtype(race_dictionary.size), copy=False),
+        "race_dictionary": _to_storable_array(race_dictionary),
+        "confirmed_odds": confirmed_odds.astype(np.float64, copy=False),
+        "flag_ground_truth_orders": flag_ground_truth_orders,
+        "bet_amounts": bet_amounts.astype(np.int64, copy=False),
+    }
+    _write_columns(path, _KIND_BET_STRATEGY_RESULTS, columns, {"num_rows": len(results.bet_amounts)}, overwrite)
+
+
+def load_bet_strategy_results(path: str | Path, mmap: bool = True, validate: bool = False) -> BetStrategyResults:
+    """`save_bet_strategy_results`で保存したディレクトリからBetStrategyResultsを読み込む
+
+    mmap=Trueの場合は各列をnp.memmapとして読み込み、コピーせずにBetStrategyResultsのバッキングストアにする。
+    ファイルの内容は参照したページだけが読み込まれる。
+
+    Args:
+        path (str | Path): 保存先のディレクトリ
+        mmap (bool): Trueの場合はメモリマップで読み込む
+        validate (bool): Trueの場合は全要素を走査して値をチェックする
+
+    Returns:
+        BetStrategyResults: 読み込んだ買い付け戦略の結果(レース識別子はカテゴリのコード列として保持される)
+    """
+    _, columns = _read_columns(path, _KIND_BET_STRATEGY_RESULTS, mmap)
+    return BetStrategyResults.from_arrays(
+        race_identifiers=columns["race_codes"],
+        confirmed_odds=columns["confirmed_odds"],
+        flag_ground_truth_orders=columns["flag_ground_truth_orders"],
+        bet_amounts=columns["bet_amounts"],
+        race_categories=columns["race_dictionary"],
+        validate=validate,
+    )
+
+
+def save_odds_boards(collection: OddsBoardCollection, path: str | Path, overwrite: bool = False) -> None:
+    """オッズボードのコレクションをCSR形式の.npyファイルとメタデータのディレクトリに保存する
+
+    Args:
+        collection (OddsBoardCollection): 保存するオッズボードのコレクション
+        path (str | Path): 保存先のディレクトリ
+        overwrite (bool): Trueの場合、既存のディレクトリに上書きする
+    """
+    race_codes, race_dictionary = factorize(collection.race_identifiers)
+    # 券種はメタデータの券種名のリストへのインデックスとして保存し、BetTypeの定義順に依存しないようにする
+    bet_type_names = [str(bet_type) for bet_type in BetType]
+    bet_type_codes = np.array([bet_type_names.index(str(b)) for b in collection.bet_types], dtype=np.uint8)
+    columns = {
+        "race_codes": race_codes.astype(_get_code_dtype(race_dictionary.size), copy=False),
+        "race_dictionary": _to_storable_array(race_dictionary),
+        "bet_type_codes": bet_type_codes,
+        "num_racers": collection.num_racers.astype(np.int64, copy=False),
+        "offsets": collection.offsets.astype(np.int64, copy=False),
+        "odds": collection.odds.astype(np.float64, copy=False),
+    }
+    extra_meta = {"num_boards": len(collection), "bet_types": bet_type_names}
+    _write_columns(path, _KIND_ODDS_BOARDS, columns, extra_meta, overwrite)
+
+
+def load_odds_boards(path: str | Path, mmap: bool = True) -> OddsBoardCollection:
+    """`save_odds_boards`で保存したディレクトリからオッズボードのコレクションを読み込む
+
+    Args:
+        path (str | Path): 保存先のディレクトリ
+        mmap (bool): Trueの場合はメモリマップで読み込む(オッズはコピーされない)
+
+    Returns:
+        OddsBoardCollection: 読み込んだオッズボードのコレクション
+    """
+    meta, columns = _read_columns(path, _KIND_ODDS_BOARDS, mmap)
+    bet_types = [BetType(meta["bet_types"][code]) for code in columns["bet_type_codes"].tolist()]
+    return OddsBoardCollection(
+        race_identifiers=np.asarray(columns["race_dictionary"])[columns["race_codes"]],
+        bet_types=bet_types,
+        num_racers=np.asarray(columns["num_racers"]),
+        offsets=np.asarray(columns["offsets"]),
+        odds=columns["odds"],
+    )
+
+
+def _get_code_dtype(num_uniques: int) -> type[np.signedinteger]:
+    # 辞書のサイズに応じて、コード列の整数型をできるだけ小さくする
+    return np.int32 if num_uniques <= np.iinfo(np.int32).max else np.int64
+
+
+def _to_storable_array(values: NDArray) -> NDArray:
+    # .npyにpickleなしで保存できるように、object配列は要素の型から固定長の配列に変換する
+    if values.dtype == np.object_:
+        values = np.asarray(values.tolist())
+        if values.dtype == np.object_:
+            raise ValueError("race identifiers must be str or numeric values")
+    return values
+
+
+def _write_columns(
+    path: str | Path, kind: str, columns: dict[str, NDArray], extra_meta: dict[str, Any], overwrite: bool
+) -> None:
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=overwrite)
+    # 上書きする場合は列を書き込む前に既存のmeta.jsonを削除し、書き込み途中のディレクトリを読み込めないようにする
+    meta_path = path / _META_FILE_NAME
+    meta_path.unlink(missing_ok=True)
+    for name, column in columns.items():
+        np.save(path / f"{name}.npy", np.ascontiguousarray(column), allow_pickle=False)
+
+    # メタデータは列の書き込みが終わってから一時ファイルに書いて置き換えるため、meta.jsonがあれば全ての列が揃っている
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "kind": kind,
+        "columns": {name: {"dtype": column.dtype.str, "shape": list(column.shape)} for name, column in columns.items()},
+        **extra_meta,
+    }
+    tmp_meta_path = path / f"{_META_FILE_NAME}.tmp"
+    with open(tmp_meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    tmp_meta_path.replace(meta_path)
+
+
+def _read_columns(path: str | Path, kind: str, mmap: bool) -> tuple[dict[str, Any], dict[str, NDArray]]:
+    path = Path(path)
+    meta_path = path / _META_FILE_NAME
+    if not meta_path.exists():
+        raise FileNotFoundError(f"{meta_path} does not exist")
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"schema_version {meta.get('schema_version')} is not supported (expected {SCHEMA_VERSION})")
+    if meta.get("kind") != kind:
+        raise ValueError(f"{path} is not {kind} (kind: {meta.get('kind')})")
+
+    columns = {}
+    for name, column_meta in meta["columns"].items():
+        column = np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None, allow_pickle=False)
+        if column.dtype.str != column_meta["dtype"] or list(column.shape) != column_meta["shape"]:
+            raise ValueError(f"column {name} does not match meta.json")
+        columns[name] = column
+    return meta, columns
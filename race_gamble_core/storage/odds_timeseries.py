@@ -0,0 +1,502 @@
+import json
+import os
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+from pydantic import BaseModel, ConfigDict
+
+from ..orders.order_index import get_num_combinations
+from ..schemas.bet_type import BetType
+
+# ディスク上の形式のバージョン。形式を変更した場合は上げる
+SCHEMA_VERSION = 1
+# 1セグメントファイルに書き込むレコード数の上限
+DEFAULT_MAX_SEGMENT_RECORDS = 2**16
+# インデックスの未整列の末尾(追記分)をソート済みの本体にマージする件数の下限。
+# 実際の閾値は本体の件数の1/64との大きい方で、検索時の末尾の走査とマージのコストを釣り合わせる
+_MIN_INDEX_TAIL_SIZE = 2**12
+
+_META_FILE_NAME = "meta.json"
+_RACES_FILE_NAME = "races.txt"
+# インデックスの1エントリ。セグメント番号はmetaのsegmentsの位置
+_INDEX_DTYPE = np.dtype([("race_code", "<i4"), ("timestamp", "<i8"), ("segment_id", "<i4"), ("position", "<i8")])
+
+
+class OddsSnapshots(BaseModel):
+    """オッズのスナップショットの検索結果を保持するクラス
+
+    oddsの最後の軸は`Order.to_order_idx`のインデックス順。
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    race_identifiers: NDArray  # (スナップショット数,)のレース識別子
+    timestamps: NDArray[np.int64]  # (スナップショット数,)のタイムスタンプ
+    odds: NDArray[np.float64]  # (スナップショット数, 組み合わせ数)のオッズ。1つの買い目の推移の場合は(スナップショット数,)
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+
+class OddsTimeSeriesStore:
+    """1券種のオッズボードのスナップショット(レース, 時刻, 全買い目のオッズ)を保存する追記型のストア
+
+    - スナップショットは固定長のレコードとしてセグメントファイル(segment_XXXXXX.bin)に追記する
+    - レース識別子はraces.txtの行番号をコードとする辞書で管理する。新しいレースはセグメントより先に書き出す
+    - 各レコードの(レース, 時刻, セグメント, 位置)はインデックスファイル(index_XXXXXX.bin)に追記順で保存する。
+      メモリ上では(レース, 時刻)順に並べた本体とレースごとのオフセット、未整列の追記分(末尾)に分けて保持し、
+      追記は末尾に加えるだけで、末尾が大きくなったときに本体へマージする
+    - 異常終了でインデックスとセグメントの件数がずれた場合は、開くときにセグメントから補修する
+    - `compact`で全セグメントを(レース, 時刻)順に並べ替えて書き直し、同じレース・時刻の重複を取り除く
+
+    タイムスタンプは整数(UNIX時間など。単位は利用側で揃える)またはnp.datetime64(ナノ秒に変換する)で渡す。
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        bet_type: BetType | None = None,
+        num_racers: int | None = None,
+        max_segment_records: int = DEFAULT_MAX_SEGMENT_RECORDS,
+    ):
+        """ストアを開く。ディレクトリが存在しない場合は、bet_typeとnum_racersを指定して新規に作成する
+
+        Args:
+            path (str | Path): ストアのディレクトリ
+            bet_type (BetType | None): 券種。既存のストアを開く場合は省略できる
+            num_racers (int | None): 出走数。既存のストアを開く場合は省略できる
+            max_segment_records (int): 1セグメントファイルに書き込むレコード数の上限
+        """
+        self.path = Path(path)
+        self.max_segment_records = max_segment_records
+        meta_path = self.path / _META_FILE_NAME
+        if meta_path.exists():
+            with open(meta_path) as f:
+                self._meta = json.load(f)
+            if self._meta.get("schema_version") != SCHEMA_VERSION:
+                raise ValueError(f"schema_version {self._meta.get('schema_version')} is not supported")
+            if bet_type is not None and BetType(bet_type) != self._meta["bet_type"]:
+                raise ValueError(f"bet_type of store is {self._meta['bet_type']}")
+            if num_racers is not None and num_racers != self._meta["num_racers"]:
+                raise ValueError(f"num_racers of store is {self._meta['num_racers']}")
+        else:
+            if bet_type is None or num_racers is None:
+                raise ValueError("bet_type and num_racers are required to create a new store")
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._meta = {
+                "schema_version": SCHEMA_VERSION,
+                "bet_type": str(BetType(bet_type)),
+                "num_racers": num_racers,
+                "segments": [],
+                "next_segment_id": 0,
+            }
+            self._meta["index"] = self._get_new_file_name("index")
+            (self.path / _RACES_FILE_NAME).touch()
+            (self.path / self._meta["index"]).touch()
+            self._write_meta()
+
+        self.bet_type = BetType(self._meta["bet_type"])
+        self.num_racers = int(self._meta["num_racers"])
+        self.num_combinations = get_num_combinations(self.bet_type, self.num_racers)
+        self.record_dtype = np.dtype(
+            [("race_code", "<i4"), ("timestamp", "<i8"), ("odds", "<f8", (self.num_combinations,))]
+        )
+
+        self._race_identifiers = self._read_race_identifiers()
+        self._race_codes = {race_identifier: i for i, race_identifier in enumerate(self._race_identifiers)}
+        self._race_identifier_array: NDArray | None = None
+        self._races_file = open(self.path / _RACES_FILE_NAME, "a", encoding="utf-8")
+        self._segment_file = None
+        self._segment_num_records = 0
+        # 検索時に開いたセグメントのmemmap。追記中のセグメントは追記のたびに破棄する
+        self._segment_cache: dict[str, NDArray] = {}
+        self._open_last_segment()
+        self._load_index()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """書き込み中のファイルを閉じる"""
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+        self._index_file.close()
+        self._races_file.close()
+
+    def flush(self) -> None:
+        """書き込みバッファを、レース識別子、セグメント、インデックスの順にファイルに書き出す"""
+        self._races_file.flush()
+        if self._segment_file is not None:
+            self._segment_file.flush()
+        self._index_file.flush()
+
+    @property
+    def num_snapshots(self) -> int:
+        self.flush()
+        return int(sum(self._get_segment_num_records(segment) for segment in self._meta["segments"]))
+
+    def append(self, race_identifier: str, timestamp: int | np.datetime64, odds: ArrayLike) -> None:
+        """1レースのオッズボードのスナップショットを追記する
+
+        Args:
+            race_identifier (str): レース識別子
+            timestamp (int | np.datetime64): スナップショットの時刻
+            odds (ArrayLike): (組み合わせ数,)のorder_idx順のオッズ
+        """
+        self.append_many([race_identifier], [timestamp], np.asarray(odds)[np.newaxis, :])
+
+    def append_many(self, race_identifiers: ArrayLike, timestamps: ArrayLike, odds: ArrayLike) -> None:
+        """複数のオッズボードのスナップショットをまとめて追記する
+
+        Args:
+            race_identifiers (ArrayLike): (スナップショット数,)のレース識別子
+            timestamps (ArrayLike): (スナップショット数,)の時刻
+            odds (ArrayLike): (スナップショット数, 組み合わせ数)のorder_idx順のオッズ
+        """
+        timestamps = _to_int_timestamps(timestamps)
+        odds = np.asarray(odds, dtype=np.float64)
+        race_identifiers = np.asarray(race_identifiers)
+        if odds.ndim != 2 or odds.shape[1] != self.num_combinations:
+            raise ValueError(f"odds must be shape (n, {self.num_combinations})")
+        if not race_identifiers.shape == timestamps.shape == (odds.shape[0],):
+            raise ValueError("length of race_identifiers, timestamps and odds must be the same")
+        if np.any(odds < 0) or np.any(np.isnan(odds)):
+            raise ValueError("odds must be positive")
+
+        records = np.empty(odds.shape[0], dtype=self.record_dtype)
+        records["race_code"] = self._get_or_add_race_codes(race_identifiers)
+        records["timestamp"] = timestamps
+        records["odds"] = odds
+
+        entries = np.empty(records.size, dtype=_INDEX_DTYPE)
+        entries["race_code"] = records["race_code"]
+        entries["timestamp"] = timestamps
+        start = 0
+        while start < records.size:
+            if self._segment_file is None or self._segment_num_records >= self.max_segment_records:
+                self._open_new_segment()
+            size = min(records.size - start, self.max_segment_records - self._segment_num_records)
+            self._segment_file.write(records[start : start + size].tobytes())
+            entries["segment_id"][start : start + size] = len(self._meta["segments"]) - 1
+            entries["position"][start : start + size] = np.arange(
+                self._segment_num_records, self._segment_num_records + size
+            )
+            self._segment_num_records += size
+            start += size
+        # 追記中のセグメントのmemmapは古い長さのままなので破棄する
+        self._segment_cache.pop(self._meta["segments"][-1], None)
+        self._index_file.write(entries.tobytes())
+        self._add_index_entries(entries)
+
+    def get_snapshots(self, race_identifier: str) -> OddsSnapshots:
+        """1レースの全てのスナップショットを時刻順に取得する"""
+        entries = self._get_race_entries(race_identifier)
+        records = self._gather_records(entries["segment_id"], entries["position"])
+        return self._to_snapshots(records)
+
+    def get_trajectory(self, race_identifier: str, order_idx: int) -> OddsSnapshots:
+        """1レース・1買い目のオッズの推移を時刻順に取得する(oddsは(スナップショット数,)の配列)"""
+        if not 0 <= order_idx < self.num_combinations:
+            raise ValueError(f"order_idx must be in [0, {self.num_combinations})")
+        entries = self._get_race_entries(race_identifier)
+        records = self._gather_records(entries["segment_id"], entries["position"], order_idx=order_idx)
+        return self._to_snapshots(records)
+
+    def get_latest_before(self, timestamp: int | np.datetime64) -> OddsSnapshots:
+        """全レースについて、指定した時刻以前の最新のスナップショットを取得する
+
+        指定した時刻以前のスナップショットがないレースは含まれない。並びはレースの登録順。
+        """
+        timestamp = int(_to_int_timestamps([timestamp])[0])
+        # 本体は(レース, 時刻)順なので、候補のうち各レースの最後の行が本体での最新のスナップショット
+        base_candidates = self._index_base[self._index_base["timestamp"] <= timestamp]
+        base_latest = base_candidates[_flag_last_of_runs(base_candidates["race_code"])]
+        # 末尾は本体より後に追記されたので、同じ時刻なら末尾の後の行を優先する
+        tail = self._get_index_tail()
+        candidates = np.concatenate([base_latest, tail[tail["timestamp"] <= timestamp]])
+        append_order = np.arange(candidates.size)
+        candidates = candidates[np.lexsort((append_order, candidates["timestamp"], candidates["race_code"]))]
+        latest = candidates[_flag_last_of_runs(candidates["race_code"])]
+        records = self._gather_records(latest["segment_id"], latest["position"])
+        return self._to_snapshots(records)
+
+    def compact(self) -> None:
+        """全セグメントを(レース, 時刻)順に並べ替えて書き直す
+
+        同じレース・時刻のスナップショットが複数ある場合は、最後に追記したものだけを残す。
+        新しいセグメントを書き終えてからメタデータを置き換え、古いセグメントを削除する。
+        """
+        self.flush()
+        self._merge_index_tail()
+        entries = self._index_base
+        flag_keep = np.ones(entries.size, dtype=np.bool_)
+        flag_keep[:-1] = (entries["race_code"][1:] != entries["race_code"][:-1]) | (
+            entries["timestamp"][1:] != entries["timestamp"][:-1]
+        )
+        entries = entries[flag_keep]
+        records = self._gather_records(entries["segment_id"], entries["position"])
+
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+        self._index_file.close()
+        old_files = [*self._meta["segments"], self._meta["index"]]
+        new_segments = []
+        new_entries = np.empty(records.size, dtype=_INDEX_DTYPE)
+        new_entries["race_code"] = records["race_code"]
+        new_entries["timestamp"] = records["timestamp"]
+        for segment_id, start in enumerate(range(0, records.size, self.max_segment_records)):
+            segment = self._get_new_file_name("segment")
+            records[start : start + self.max_segment_records].tofile(self.path / segment)
+            new_segments.append(segment)
+            new_entries["segment_id"][start : start + self.max_segment_records] = segment_id
+            new_entries["position"][start : start + self.max_segment_records] = np.arange(
+                min(self.max_segment_records, records.size - start)
+            )
+        new_index = self._get_new_file_name("index")
+        new_entries.tofile(self.path / new_index)
+
+        # セグメントとインデックスはメタデータの置き換えで同時に切り替わる
+        self._meta["segments"] = new_segments
+        self._meta["index"] = new_index
+        self._write_meta()
+        self._segment_cache = {}
+        for file_name in old_files:
+            (self.path / file_name).unlink()
+        self._open_last_segment()
+        self._load_index()
+
+    def _get_or_add_race_codes(self, race_identifiers: NDArray) -> NDArray[np.int32]:
+        # レース識別子をコードに変換する。未登録のレースはraces.txtに追記して登録する
+        uniques, inverse = np.unique(race_identifiers.astype(str), return_inverse=True)
+        unique_codes = np.empty(uniques.size, dtype=np.int32)
+        flag_added = False
+        for i, race_identifier in enumerate(uniques.tolist()):
+            code = self._race_codes.get(race_identifier)
+            if code is None:
+                if "\n" in race_identifier or "\r" in race_identifier:
+                    raise ValueError("race_identifier must not contain newline")
+                code = len(self._race_identifiers)
+                self._race_identifiers.append(race_identifier)
+                self._race_codes[race_identifier] = code
+                self._race_identifier_array = None
+                self._races_file.write(race_identifier + "\n")
+                flag_added = True
+            unique_codes[i] = code
+        if flag_added:
+            # セグメントが参照するレースが必ずraces.txtにあるよう、セグメントより先に書き出す
+            self._races_file.flush()
+        return unique_codes[inverse.ravel()]
+
+    def _read_race_identifiers(self) -> list[str]:
+        # 書き込み途中で終了した場合の末尾の不完全な行は切り詰める(その行を参照するセグメントはない)
+        races_path = self.path / _RACES_FILE_NAME
+        with open(races_path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                data = data[: data.rfind(b"\n") + 1]
+                f.truncate(len(data))
+        return data.decode("utf-8").splitlines()
+
+    def _get_race_entries(self, race_identifier: str) -> NDArray:
+        # レースのインデックスのエントリを(時刻, 追記順)の順に返す
+        code = self._race_codes.get(str(race_identifier))
+        if code is None:
+            return self._index_base[:0]
+        base_entries = self._index_base[:0]
+        if code + 1 < self._index_offsets.size:
+            base_entries = self._index_base[self._index_offsets[code] : self._index_offsets[code + 1]]
+        tail = self._get_index_tail()
+        tail_entries = tail[tail["race_code"] == code]
+        if tail_entries.size == 0:
+            return base_entries
+        entries = np.concatenate([base_entries, tail_entries])
+        return entries[np.argsort(entries["timestamp"], kind="stable")]
+
+    def _load_index(self) -> None:
+        # インデックスファイルを読み、セグメントとの件数のずれを補修してからメモリ上のインデックスを作る
+        if "index" not in self._meta:
+            self._meta["index"] = self._get_new_file_name("index")
+            (self.path / self._meta["index"]).touch()
+            self._write_meta()
+        index_path = self.path / self._meta["index"]
+        num_entries = os.path.getsize(index_path) // _INDEX_DTYPE.itemsize
+        segment_sizes = [self._get_segment_num_records(segment) for segment in self._meta["segments"]]
+        num_records = sum(segment_sizes)
+        # セグメントとインデックスのバッファは独立に書き出されるので、どちらが先に途切れてもよいようにする
+        num_entries = min(num_entries, num_records)
+        self._index_file = open(index_path, "ab")
+        self._index_file.truncate(num_entries * _INDEX_DTYPE.itemsize)
+        entries = np.fromfile(index_path, dtype=_INDEX_DTYPE, count=num_entries)
+        if num_entries < num_records:
+            missing = self._build_index_entries(segment_sizes, num_entries)
+            self._index_file.write(missing.tobytes())
+            self._index_file.flush()
+            entries = np.concatenate([entries, missing])
+
+        self._index_base = entries[:0]
+        self._index_offsets = np.zeros(1, dtype=np.int64)
+        # 末尾は倍々で確保したバッファの先頭_index_tail_size件
+        self._index_tail_buffer = np.empty(_MIN_INDEX_TAIL_SIZE, dtype=_INDEX_DTYPE)
+        self._index_tail_size = 0
+        self._add_index_entries(entries)
+        self._merge_index_tail()
+
+    def _build_index_entries(self, segment_sizes: list[int], start: int) -> NDArray:
+        # 追記順でstart番目以降のレコードのインデックスのエントリを、セグメントから作る
+        list_entries = []
+        segment_start = 0
+        for segment_id, (segment, size) in enumerate(zip(self._meta["segments"], segment_sizes)):
+            if segment_start + size > start:
+                records = self._load_segment(segment)[max(start - segment_start, 0) :]
+                entries = np.empty(records.size, dtype=_INDEX_DTYPE)
+                entries["race_code"] = records["race_code"]
+                entries["timestamp"] = records["timestamp"]
+                entries["segment_id"] = segment_id
+                entries["position"] = np.arange(size - records.size, size)
+                list_entries.append(entries)
+            segment_start += size
+        return np.concatenate(list_entries) if list_entries else np.zeros(0, dtype=_INDEX_DTYPE)
+
+    def _add_index_entries(self, entries: NDArray) -> None:
+        # 追記順のエントリを末尾に加え、末尾が大きくなったら本体にマージする
+        size = self._index_tail_size + entries.size
+        if size > self._index_tail_buffer.size:
+            buffer = np.empty(max(size, 2 * self._index_tail_buffer.size), dtype=_INDEX_DTYPE)
+            buffer[: self._index_tail_size] = self._get_index_tail()
+            self._index_tail_buffer = buffer
+        self._index_tail_buffer[self._index_tail_size : size] = entries
+        self._index_tail_size = size
+        if self._index_tail_size >= self._get_index_tail_limit():
+            self._merge_index_tail()
+
+    def _get_index_tail_limit(self) -> int:
+        return max(_MIN_INDEX_TAIL_SIZE, self._index_base.size // 64)
+
+    def _get_index_tail(self) -> NDArray:
+        # 本体にマージしていない追記順のエントリ
+        return self._index_tail_buffer[: self._index_tail_size]
+
+    def _merge_index_tail(self) -> None:
+        # 末尾を(レース, 時刻, 追記順)でソートし、本体の各レースの同じ時刻の行の後ろに挿入する
+        tail = self._get_index_tail().copy()
+        base = self._index_base
+        if tail.size > 0:
+            tail = tail[np.lexsort((np.arange(tail.size), tail["timestamp"], tail["race_code"]))]
+            if tail.size >= base.size:
+                merged = np.concatenate([base, tail])
+                base = merged[np.lexsort((np.arange(merged.size), merged["timestamp"], merged["race_code"]))]
+            else:
+                positions = np.empty(tail.size, dtype=np.int64)
+                race_starts = np.flatnonzero(~np.r_[False, tail["race_code"][1:] == tail["race_code"][:-1]])
+                for start, end in zip(race_starts.tolist(), [*race_starts[1:].tolist(), tail.size]):
+                    code = int(tail["race_code"][start])
+                    if code + 1 < self._index_offsets.size:
+                        lo, hi = self._index_offsets[code], self._index_offsets[code + 1]
+                    else:
+                        lo = hi = base.size
+                    positions[start:end] = lo + np.searchsorted(
+                        base["timestamp"][lo:hi], tail["timestamp"][start:end], side="right"
+                    )
+                base = np.insert(base, positions, tail)
+        self._index_base = base
+        self._index_offsets = np.searchsorted(base["race_code"], np.arange(len(self._race_identifiers) + 1))
+        self._index_tail_buffer = np.empty(self._get_index_tail_limit(), dtype=_INDEX_DTYPE)
+        self._index_tail_size = 0
+
+    def _gather_records(
+        self, segment_ids: NDArray[np.int64], positions: NDArray[np.int64], order_idx: int | None = None
+    ) -> NDArray:
+        # (セグメント番号, 位置)のレコードを、渡された順に集めて返す
+        dtype = self.record_dtype
+        if order_idx is not None:
+            dtype = np.dtype([("race_code", "<i4"), ("timestamp", "<i8"), ("odds", "<f8")])
+        gathered = np.empty(segment_ids.size, dtype=dtype)
+        for segment_id in np.unique(segment_ids).tolist():
+            flag_segment = segment_ids == segment_id
+            records = self._load_segment(self._meta["segments"][segment_id])[positions[flag_segment]]
+            gathered["race_code"][flag_segment] = records["race_code"]
+            gathered["timestamp"][flag_segment] = records["timestamp"]
+            gathered["odds"][flag_segment] = records["odds"] if order_idx is None else records["odds"][:, order_idx]
+        return gathered
+
+    def _to_snapshots(self, records: NDArray) -> OddsSnapshots:
+        if self._race_identifier_array is None:
+            self._race_identifier_array = np.array(self._race_identifiers, dtype=str)
+        return OddsSnapshots(
+            race_identifiers=self._race_identifier_array[records["race_code"]],
+            timestamps=np.ascontiguousarray(records["timestamp"]),
+            odds=np.ascontiguousarray(records["odds"]),
+        )
+
+    def _load_segment(self, segment: str) -> NDArray:
+        # セグメントファイルを構造化配列のmemmapとして読む
+        if segment not in self._segment_cache:
+            if self._segment_file is not None and segment == self._meta["segments"][-1]:
+                self._segment_file.flush()
+            num_records = self._get_segment_num_records(segment)
+            if num_records == 0:
+                records = np.zeros(0, dtype=self.record_dtype)
+            else:
+                records = np.memmap(self.path / segment, dtype=self.record_dtype, mode="r", shape=(num_records,))
+            self._segment_cache[segment] = records
+        return self._segment_cache[segment]
+
+    def _get_segment_num_records(self, segment: str) -> int:
+        # 書き込み途中で終了した場合の末尾の不完全なレコードは無視する
+        return os.path.getsize(self.path / segment) // self.record_dtype.itemsize
+
+    def _open_last_segment(self) -> None:
+        # 最後のセグメントを追記用に開く。末尾の不完全なレコードは切り詰める
+        if not self._meta["segments"]:
+            return
+        segment = self._meta["segments"][-1]
+        self._segment_num_records = self._get_segment_num_records(segment)
+        self._segment_file = open(self.path / segment, "ab")
+        self._segment_file.truncate(self._segment_num_records * self.record_dtype.itemsize)
+
+    def _open_new_segment(self) -> None:
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_cache.pop(self._meta["segments"][-1], None)
+        segment = self._get_new_file_name("segment")
+        # ファイルを作成してからメタデータに登録する
+        self._segment_file = open(self.path / segment, "ab")
+        self._segment_num_records = 0
+        self._meta["segments"].append(segment)
+        self._write_meta()
+
+    def _get_new_file_name(self, prefix: str) -> str:
+        # セグメント・インデックスのファイル名。番号は両者で共有する連番
+        file_name = f"{prefix}_{self._meta['next_segment_id']:06d}.bin"
+        self._meta["next_segment_id"] += 1
+        return file_name
+
+    def _write_meta(self) -> None:
+        # 一時ファイルに書いてから置き換えることで、メタデータの更新を原子的に行う
+        tmp_path = self.path / f"{_META_FILE_NAME}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._meta, f, indent=2)
+        os.replace(tmp_path, self.path / _META_FILE_NAME)
+
+
+def _flag_last_of_runs(values: NDArray) -> NDArray[np.bool_]:
+    # 同じ値が連続する区間の最後の要素のフラグ
+    flag_last = np.ones(values.size, dtype=np.bool_)
+    flag_last[:-1] = values[1:] != values[:-1]
+    return flag_last
+
+
+def _to_int_timestamps(timestamps: ArrayLike) -> NDArray[np.int64]:
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[ns]").astype(np.int64)
+    if timestamps.dtype.kind not in "iu":
+        raise ValueError("timestamps must be integer or datetime64 array")
+    return timestamps.astype(np.int64)
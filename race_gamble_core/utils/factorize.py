@@ -0,0 +1,233 @@
+from collections.abc import Hashable, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+# 整数値の範囲が要素数のこの倍率以下であれば、ソートせずにbincountで因子化する
+_DENSE_RANGE_FACTOR = 4
+
+_FNV_PRIME = np.uint64(0x100000001B3)
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+
+
+def factorize(values: ArrayLike) -> tuple[NDArray[np.intp], NDArray]:
+    """値の配列を0始まりの連番コードに因子化する
+
+    - 値の範囲が狭い整数配列: bincountのビットマップで因子化する(ソートなし)
+    - 文字列配列: 8バイト単位の整数列に詰め直して比較する。同じ値が連続して並んでいる場合はランの先頭だけを、
+      そうでない場合は全要素を、ハッシュの上位ビットと要素番号を詰めた64bit整数のソートで因子化する
+      (ハッシュ衝突は全要素を検証して厳密に扱う)。ハッシュ・ソート・検証でそれぞれ全要素を走査するため、
+      整数配列よりは遅い(1000万件・100万レースの並びがランダムな文字列で約1.5秒)
+    - それ以外: ソートして因子化する
+
+    Args:
+        values (ArrayLike): 1次元の値の配列
+
+    Returns:
+        tuple[NDArray[np.intp], NDArray]: (各要素のコード, コードに対応するユニーク値)
+            ユニーク値の並び順は入力の型によって異なり、保証しない
+    """
+    arr = np.asarray(values)
+    if arr.ndim != 1:
+        raise ValueError("values must be 1-dimensional array")
+
+    if arr.size == 0:
+        return np.zeros(0, dtype=np.intp), arr[:0]
+
+    if arr.dtype.kind in "iub":
+        min_value = int(arr.min())
+        value_range = int(arr.max()) - min_value + 1
+        if value_range <= _DENSE_RANGE_FACTOR * arr.size + 1024:
+            offsets = (arr - min_value).astype(np.intp, copy=False)
+            present = np.bincount(offsets, minlength=value_range) > 0
+            remap = np.cumsum(present, dtype=np.intp) - 1
+            uniques = (np.flatnonzero(present) + min_value).astype(arr.dtype, copy=False)
+            return remap[offsets], uniques
+
+    if arr.dtype.kind in "US":
+        factorized = _factorize_strings(arr)
+        if factorized is not None:
+            return factorized
+
+    return _factorize_by_sort(arr)
+
+
+def _factorize_by_sort(arr: NDArray) -> tuple[NDArray[np.intp], NDArray]:
+    # ソートして隣接要素を比較することで因子化する。ユニーク値は昇順になる
+    order = np.argsort(arr)
+    sorted_values = arr[order]
+    flag_new_values = np.empty(arr.size, dtype=np.bool_)
+    flag_new_values[0] = True
+    np.not_equal(sorted_values[1:], sorted_values[:-1], out=flag_new_values[1:])
+
+    codes = np.empty(arr.size, dtype=np.intp)
+    codes[order] = np.cumsum(flag_new_values, dtype=np.intp) - 1
+    return codes, sorted_values[flag_new_values]
+
+
+def _factorize_strings(arr: NDArray) -> tuple[NDArray[np.intp], NDArray] | None:
+    # 文字列配列の因子化。64bitハッシュまで衝突した場合はNoneを返し、ソートによる因子化にフォールバックさせる
+    words = _to_words(arr)
+
+    # 同じ値が連続して並んでいる(レース単位で行が並んでいる)場合は、ランの先頭だけを因子化すればよい
+    flag_run_starts = np.zeros(arr.size, dtype=np.bool_)
+    flag_run_starts[0] = True
+    for column in words:
+        flag_run_starts[1:] |= column[1:] != column[:-1]
+    run_starts = np.flatnonzero(flag_run_starts)
+    if run_starts.size * 2 <= arr.size:
+        factorized = _factorize_words(words[:, run_starts])
+        if factorized is None:
+            return None
+        run_codes, representatives = factorized
+        codes = run_codes[np.cumsum(flag_run_starts, dtype=np.intp) - 1]
+        return codes, arr[run_starts[representatives]]
+
+    factorized = _factorize_words(words)
+    if factorized is None:
+        return None
+    codes, representatives = factorized
+    return codes, arr[representatives]
+
+
+def _to_words(arr: NDArray) -> NDArray[np.uint64]:
+    # 固定長文字列配列を(ワード数, 要素数)の64bit整数配列に詰め直す。ワードごとに連続したメモリに並べる
+    # Unicode文字列でも全文字が1バイトに収まる場合は、1文字1バイトに詰めてワード数を減らす
+    raw = np.ascontiguousarray(arr).view(np.uint8).reshape(arr.size, arr.dtype.itemsize)
+    if arr.dtype.kind == "U" and raw.shape[1] > 0:
+        chars = raw.view(np.uint32)
+        if chars.max() < 256:
+            raw = chars.astype(np.uint8)
+    item_size = raw.shape[1]
+    if item_size < 8:
+        padded = np.zeros((arr.size, 8), dtype=np.uint8)
+        padded[:, :item_size] = raw
+        raw, item_size = padded, 8
+
+    # 末尾のワードは直前のワードと重なってもよいので、8バイト境界に揃えるためのコピーをせずに読み出す
+    num_words = -(-item_size // 8)
+    words = np.empty((num_words, arr.size), dtype=np.uint64)
+    for j in range(num_words):
+        offset = min(8 * j, item_size - 8)
+        words[j] = np.ndarray((arr.size,), dtype=np.uint64, buffer=raw, offset=offset, strides=(item_size,))
+    return words
+
+
+def _factorize_words(words: NDArray[np.uint64]) -> tuple[NDArray[np.intp], NDArray[np.intp]] | None:
+    # ワード列の行を因子化し、(各行のコード, コードごとの代表行の番号)を返す
+    # ハッシュの上位ビットと行番号を1つの64bit整数に詰めてソートすることで、argsortより高速に並べ替える
+    num_rows = words.shape[1]
+    index_bits = max(1, (num_rows - 1).bit_length())
+    index_mask = np.uint64((1 << index_bits) - 1)
+    keys = _hash_words(words) & ~index_mask
+    keys |= np.arange(num_rows, dtype=np.uint64)
+    keys.sort()
+    order = (keys & index_mask).astype(np.intp)
+    keys >>= np.uint64(index_bits)
+
+    flag_new_values = np.empty(num_rows, dtype=np.bool_)
+    flag_new_values[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=flag_new_values[1:])
+    codes = np.empty(num_rows, dtype=np.intp)
+    codes[order] = np.cumsum(flag_new_values, dtype=np.intp) - 1
+    representatives = order[flag_new_values]
+
+    # ハッシュの上位ビットが衝突したコードだけ、64bitハッシュ全体で因子化し直す
+    representative_rows = representatives[codes]
+    flag_collisions = np.zeros(num_rows, dtype=np.bool_)
+    for column in words:
+        flag_collisions |= column != np.take(column, representative_rows)
+    if not flag_collisions.any():
+        return codes, representatives
+
+    collided_rows = np.flatnonzero(np.isin(codes, codes[flag_collisions]))
+    collided_words = words[:, collided_rows]
+    sub_codes, sub_hashes = _factorize_by_sort(_hash_words(collided_words))
+    sub_representatives = np.empty(sub_hashes.size, dtype=np.intp)
+    sub_representatives[sub_codes] = np.arange(collided_rows.size, dtype=np.intp)
+    if not np.array_equal(collided_words[:, sub_representatives[sub_codes]], collided_words):
+        return None
+
+    num_codes = representatives.size
+    codes[collided_rows] = num_codes + sub_codes
+    all_representatives = np.concatenate([representatives, collided_rows[sub_representatives]])
+    present = np.bincount(codes, minlength=all_representatives.size) > 0
+    remap = np.cumsum(present, dtype=np.intp) - 1
+    return remap[codes], all_representatives[present]
+
+
+def _hash_words(words: NDArray[np.uint64]) -> NDArray[np.uint64]:
+    # ワード列の各行を、FNV系ハッシュで64bit整数に変換する
+    hashes = np.full(words.shape[1], _FNV_OFFSET, dtype=np.uint64)
+    shifted = np.empty_like(hashes)
+    for column in words:
+        hashes ^= column
+        hashes *= _FNV_PRIME
+        np.right_shift(hashes, np.uint64(29), out=shifted)
+        hashes ^= shifted
+    return hashes
+
+
+def factorize_multi(*values: ArrayLike) -> tuple[NDArray[np.intp], list[NDArray]]:
+    """複数キーの組み合わせを0始まりの連番コードに因子化する
+
+    Args:
+        *values (ArrayLike): 同じ長さの1次元配列(キーごと)
+
+    Returns:
+        tuple[NDArray[np.intp], list[NDArray]]: (各要素の組み合わせコード, キーごとのユニーク値の配列のリスト)
+            リストのi番目の配列のj番目の要素が、コードjの組み合わせにおけるi番目のキーの値
+    """
+    if not values:
+        raise ValueError("at least one key is required")
+
+    list_codes = []
+    list_uniques = []
+    for value in values:
+        codes, uniques = factorize(value)
+        if list_codes and codes.shape != list_codes[0].shape:
+            raise ValueError("length of keys must be the same")
+        list_codes.append(codes)
+        list_uniques.append(uniques)
+
+    if len(values) == 1:
+        return list_codes[0], list_uniques
+
+    # キーごとのコードを混合基数で1つの整数にまとめ、密なコードに因子化し直す
+    shape = tuple(uniques.size for uniques in list_uniques)
+    combined = np.ravel_multi_index(tuple(list_codes), shape)
+    group_codes, combined_uniques = factorize(combined)
+    key_codes = np.unravel_index(combined_uniques, shape)
+    return group_codes, [uniques[codes] for uniques, codes in zip(list_uniques, key_codes)]
+
+
+def factorize_group_keys(
+    group_keys: ArrayLike | Sequence[ArrayLike], num_rows: int
+) -> tuple[NDArray[np.intp], list[Hashable]]:
+    """`*_by`系のAPIに渡されたグループキーを因子化する
+
+    1次元配列のリスト(またはタプル)は複数キーとして扱い、それ以外は1つのキーの配列として扱う。
+
+    Args:
+        group_keys (ArrayLike | Sequence[ArrayLike]): 各行のグループキー。複数キーの場合はキーごとの配列のリスト
+        num_rows (int): 行数。各キーの配列の長さがこれと異なる場合はエラーにする
+
+    Returns:
+        tuple[NDArray[np.intp], list[Hashable]]: (各行のグループコード, コードに対応するグループキーのリスト)
+            グループキーは複数キーの場合はタプル、1つのキーの場合はPythonのスカラー
+    """
+    if isinstance(group_keys, (list, tuple)) and len(group_keys) > 0 and all(np.ndim(k) == 1 for k in group_keys):
+        list_group_keys = [np.asarray(k) for k in group_keys]
+        multi_keys = True
+    else:
+        list_group_keys = [np.asarray(group_keys)]
+        multi_keys = False
+    if any(k.shape != (num_rows,) for k in list_group_keys):
+        raise ValueError(f"length of group_keys must be the same as the number of rows ({num_rows})")
+
+    group_codes, group_uniques = factorize_multi(*list_group_keys)
+    if multi_keys:
+        keys = list(zip(*(uniques.tolist() for uniques in group_uniques)))
+    else:
+        keys = group_uniques[0].tolist()
+    return group_codes, keys
@@ -0,0 +1,23 @@
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_object_new = object.__new__
+_object_setattr = object.__setattr__
+
+
+def construct_without_validation(cls: type[ModelT], values: dict) -> ModelT:
+    """バリデーションを行わずにpydanticモデルのインスタンスを生成する
+
+    `model_construct`はデフォルト値の補完などをPythonで行うため、バリデーション付きの生成より遅いことがある。
+    valuesに全てのフィールドがフィールドの定義順で含まれており、PrivateAttrを持たないモデルに限って使える。
+    `model_post_init`は呼ばれないため、必要な値は呼び出し側でvaluesに含めること。
+    """
+    instance = _object_new(cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__pydantic_fields_set__", set(cls.model_fields))
+    _object_setattr(instance, "__pydantic_extra__", None)
+    _object_setattr(instance, "__pydantic_private__", None)
+    return instance
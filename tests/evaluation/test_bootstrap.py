@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.bootstrap import BootstrapMethod, bootstrap_statistic_results
+
+
+def _make_results() -> BetStrategyResults:
+    rng = np.random.default_rng(0)
+    num_records = 2000
+    return BetStrategyResults.from_arrays(
+        race_identifiers=rng.integers(0, 300, num_records),
+        confirmed_odds=rng.integers(4, 400, num_records) / 4,
+        flag_ground_truth_orders=rng.random(num_records) < 0.2,
+        bet_amounts=rng.integers(0, 3, num_records) * 100,
+    )
+
+
+class TestBootstrap:
+    @pytest.mark.parametrize("method", [BootstrapMethod.multinomial, BootstrapMethod.poisson])
+    def test_bootstrap_statistic_results(self, method):
+        results = _make_results()
+        point = results.calc_statistic_results()
+
+        bootstrap = bootstrap_statistic_results(results, num_resamples=500, seed=0, method=method)
+        assert bootstrap.num_resamples == 500
+
+        lower, upper = bootstrap.confidence_interval("total_roi", confidence_level=0.95)
+        assert lower < point.total_roi < upper
+        lower, upper = bootstrap.confidence_interval("tekityu_rate", confidence_level=0.95)
+        assert lower < point.tekityu_rate < upper
+        assert np.isclose(np.mean(bootstrap.total_roi), point.total_roi, atol=0.1)
+
+    def test_reproducible_across_workers(self):
+        results = _make_results()
+        # 複数チャンクに分かれるように上限を小さくする
+        serial = bootstrap_statistic_results(results, num_resamples=100, seed=42, max_chunk_elements=3000)
+        parallel = bootstrap_statistic_results(
+            results, num_resamples=100, seed=42, num_workers=2, max_chunk_elements=3000
+        )
+        np.testing.assert_array_equal(serial.total_roi, parallel.total_roi)
+        np.testing.assert_array_equal(serial.sharp_ratio, parallel.sharp_ratio)
+
+        other_seed = bootstrap_statistic_results(results, num_resamples=100, seed=43, max_chunk_elements=3000)
+        assert not np.array_equal(serial.total_roi, other_seed.total_roi)
+
+    def test_single_race_matches_point_estimate(self):
+        # レースが1つなら全リサンプルが元のデータと同じになり、点推定と一致する
+        # (オッズ2.3の払い戻しの丸めと、100万円単位の払い戻しでの分散の精度を確認する)
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=np.array(["race0"] * 4),
+            confirmed_odds=np.array([2.3, 10000.0, 10001.5, 3.0]),
+            flag_ground_truth_orders=np.array([True, True, True, False]),
+            bet_amounts=np.array([100, 100, 100, 200]),
+        )
+        point = results.calc_statistic_results()
+        bootstrap = bootstrap_statistic_results(results, num_resamples=20, seed=0)
+        assert np.all(bootstrap.total_profit == point.total_profit)
+        assert np.allclose(bootstrap.sharp_ratio, point.sharp_ratio, rtol=1e-12)
+
+    def test_invalid_metric(self):
+        bootstrap = bootstrap_statistic_results(_make_results(), num_resamples=10, seed=0)
+        with pytest.raises(ValueError):
+            bootstrap.confidence_interval("unknown")
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType
+from race_gamble_core.evaluation.calibration import calc_calibration_results, calc_calibration_results_by
+from race_gamble_core.probability.harville import calc_harville_probs
+
+
+def _make_boards(num_races: int = 500, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    win_probs = rng.dirichlet(np.full(6, 2.0), num_races)
+    probs = calc_harville_probs(win_probs, BetType.nirentan)
+    # 推定確率の分布から的中買い目をサンプリングする(キャリブレーションが取れている状態)
+    cumsums = np.cumsum(probs, axis=1)
+    winners = np.minimum((cumsums < rng.random((num_races, 1))).sum(axis=1), probs.shape[1] - 1)
+    return probs, winners
+
+
+def _reference(probs, winners, market_probs, num_bins):
+    valid = winners >= 0
+    probs, winners = probs[valid], winners[valid]
+    rows = np.arange(len(winners))
+    outcomes = np.zeros_like(probs)
+    outcomes[rows, winners] = 1
+    bin_idx = np.minimum((probs * num_bins).astype(int), num_bins - 1)
+    counts = np.array([np.sum(bin_idx == b) for b in range(num_bins)])
+    hits = np.array([outcomes[bin_idx == b].sum() for b in range(num_bins)])
+    market = market_probs[valid] / market_probs[valid].sum(axis=1, keepdims=True)
+    return {
+        "num_races": len(winners),
+        "log_loss": -np.mean(np.log(probs[rows, winners])),
+        "brier_score": np.mean(np.sum((probs - outcomes) ** 2, axis=1)),
+        "counts": counts,
+        "hits": hits,
+        "market_log_loss": -np.mean(np.log(market[rows, winners])),
+    }
+
+
+class TestCalcCalibrationResults:
+    def test_matches_reference(self):
+        probs, winners = _make_boards()
+        winners[:5] = -1  # 不成立のレース
+        market_probs = np.clip(probs + np.random.default_rng(1).normal(0, 0.01, probs.shape), 1e-4, None) * 1.3
+        results = calc_calibration_results(
+            probs, winners, BetType.nirentan, market_probs=market_probs, num_bins=5, max_chunk_elements=1000
+        )
+        expected = _reference(probs, winners, market_probs, 5)
+        assert results.num_races == expected["num_races"] == 495
+        assert np.isclose(results.log_loss, expected["log_loss"])
+        assert np.isclose(results.brier_score, expected["brier_score"])
+        assert np.array_equal(results.reliability.counts, expected["counts"])
+        assert np.allclose(
+            results.reliability.observed_frequencies * results.reliability.counts, expected["hits"]
+        )
+        assert np.isclose(results.market_log_loss, expected["market_log_loss"])
+        assert np.isclose(results.mean_log_likelihood_ratio, expected["market_log_loss"] - expected["log_loss"])
+        assert np.isclose(results.log_likelihood_ratio, results.mean_log_likelihood_ratio * 495)
+
+    def test_calibrated_model(self):
+        probs, winners = _make_boards(num_races=5000)
+        results = calc_calibration_results(probs, winners, BetType.nirentan)
+        assert results.market_log_loss is None
+        # 推定確率から的中を生成しているので、一様な確率よりもlog-lossが小さく、ECEも小さい
+        assert results.log_loss < np.log(30)
+        assert results.reliability.expected_calibration_error < 0.01
+
+    def test_invalid_inputs(self):
+        probs, winners = _make_boards(num_races=10)
+        with pytest.raises(ValueError):
+            calc_calibration_results(probs, winners, BetType.sanrentan)
+        with pytest.raises(ValueError):
+            calc_calibration_results(probs, winners[:5], BetType.nirentan)
+        with pytest.raises(ValueError):
+            calc_calibration_results(probs - 0.5, winners, BetType.nirentan)
+
+
+class TestCalcCalibrationResultsBy:
+    def test_by_groups(self):
+        probs, winners = _make_boards()
+        market_probs = probs[:, ::-1]
+        venues = np.random.default_rng(2).choice(["kiryu", "toda", "edogawa"], len(winners))
+        by_groups = calc_calibration_results_by(
+            probs, winners, BetType.nirentan, venues, market_probs=market_probs, num_bins=4
+        )
+        assert set(by_groups) == {"kiryu", "toda", "edogawa"}
+        for venue, results in by_groups.items():
+            mask = venues == venue
+            expected = calc_calibration_results(
+                probs[mask], winners[mask], BetType.nirentan, market_probs=market_probs[mask], num_bins=4
+            )
+            assert results.num_races == expected.num_races
+            for field in ["log_loss", "brier_score", "market_log_loss", "log_likelihood_ratio"]:
+                assert np.isclose(getattr(results, field), getattr(expected, field))
+            assert np.array_equal(results.reliability.counts, expected.reliability.counts)
+            assert np.allclose(results.reliability.observed_frequencies, expected.reliability.observed_frequencies)
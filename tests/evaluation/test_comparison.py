@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.comparison import ComparisonTest, compare_strategies
+
+
+def _make_dataset(num_records: int = 3000, num_strategies: int = 4, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    results = BetStrategyResults.from_arrays(
+        race_identifiers=np.array([f"race{i:04d}" for i in rng.integers(0, 500, num_records)]),
+        confirmed_odds=rng.integers(4, 60, num_records) / 4,
+        flag_ground_truth_orders=rng.random(num_records) < 0.15,
+        bet_amounts=np.zeros(num_records, dtype=np.int64),
+    )
+    bet_amount_matrix = rng.integers(0, 3, (num_strategies, num_records)) * 100
+    return results, bet_amount_matrix
+
+
+def _with_bet_amounts(results, bet_amounts):
+    return BetStrategyResults.from_arrays(
+        race_identifiers=results.race_identifiers,
+        confirmed_odds=results.confirmed_odds,
+        flag_ground_truth_orders=results.flag_ground_truth_orders,
+        bet_amounts=bet_amounts,
+    )
+
+
+class TestCompareStrategies:
+    @pytest.mark.parametrize("test", list(ComparisonTest))
+    def test_totals_and_overlap(self, test):
+        results, bet_amount_matrix = _make_dataset()
+        comparison = compare_strategies(
+            results, bet_amount_matrix, test=test, num_resamples=500, seed=0, max_chunk_elements=2000
+        )
+        assert comparison.pair_indices.tolist() == [[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]]
+        for k in range(4):
+            statistics = _with_bet_amounts(results, bet_amount_matrix[k]).calc_statistic_results()
+            assert comparison.total_bet_amounts[k] == statistics.total_bet_amount
+            assert abs(comparison.total_profits[k] - statistics.total_profit) <= 1
+
+        flag_bets = bet_amount_matrix > 0
+        for position, (i, j) in enumerate(comparison.pair_indices.tolist()):
+            assert comparison.get_pair_position(i, j) == position
+            assert comparison.num_common_bets[position] == np.count_nonzero(flag_bets[i] & flag_bets[j])
+            union = np.count_nonzero(flag_bets[i] | flag_bets[j])
+            assert np.isclose(comparison.bet_jaccard_indices[position], comparison.num_common_bets[position] / union)
+            assert np.isclose(
+                comparison.profit_differences[position], comparison.total_profits[i] - comparison.total_profits[j]
+            )
+            race_profit_differences = comparison.get_race_profit_differences(i, j)
+            assert np.isclose(race_profit_differences.sum(), comparison.profit_differences[position])
+        assert np.all((comparison.p_values > 0) & (comparison.p_values <= 1))
+
+    def test_race_profits(self):
+        results, bet_amount_matrix = _make_dataset()
+        comparison = compare_strategies(results, bet_amount_matrix, num_resamples=10, max_chunk_elements=1000)
+        race_identifiers = np.asarray(results.race_identifiers)
+        returns = bet_amount_matrix * np.asarray(results.confirmed_odds) * np.asarray(results.flag_ground_truth_orders)
+        for r in [0, 10, 100]:
+            mask = race_identifiers == comparison.race_identifiers[r]
+            expected = returns[:, mask].sum(axis=1) - bet_amount_matrix[:, mask].sum(axis=1)
+            assert np.allclose(comparison.race_profits[:, r], expected)
+
+    @pytest.mark.parametrize("test", list(ComparisonTest))
+    def test_detects_difference(self, test):
+        results, bet_amount_matrix = _make_dataset(num_records=5000, num_strategies=3)
+        # 戦略0は的中の買い目だけを買い足した(明らかに良い)戦略、戦略2は戦略1と同じ
+        bet_amount_matrix[0] = bet_amount_matrix[1] + np.asarray(results.flag_ground_truth_orders) * 100
+        bet_amount_matrix[2] = bet_amount_matrix[1]
+        comparison = compare_strategies(results, bet_amount_matrix, test=test, num_resamples=2000, seed=1)
+        assert comparison.p_values[comparison.get_pair_position(0, 1)] < 0.01
+        assert comparison.p_values[comparison.get_pair_position(1, 2)] == 1.0
+        assert comparison.bet_jaccard_indices[comparison.get_pair_position(1, 2)] == 1.0
+        if test == ComparisonTest.bootstrap:
+            lower, upper = comparison.profit_difference_intervals[comparison.get_pair_position(0, 1)]
+            assert 0 < lower < comparison.profit_differences[0] < upper
+        else:
+            assert comparison.profit_difference_intervals is None
+
+    def test_reproducible(self):
+        results, bet_amount_matrix = _make_dataset()
+        first = compare_strategies(results, bet_amount_matrix, num_resamples=300, seed=5)
+        second = compare_strategies(results, bet_amount_matrix, num_resamples=300, seed=5)
+        assert np.array_equal(first.p_values, second.p_values)
+        assert np.array_equal(first.roi_difference_intervals, second.roi_difference_intervals)
+
+    def test_invalid_inputs(self):
+        results, bet_amount_matrix = _make_dataset()
+        with pytest.raises(ValueError):
+            compare_strategies(results, bet_amount_matrix[:1])
+        with pytest.raises(ValueError):
+            compare_strategies(results, bet_amount_matrix[:, :10])
+        with pytest.raises(ValueError):
+            compare_strategies(results, bet_amount_matrix + 1)
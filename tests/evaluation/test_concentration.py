@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+import pytest
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.concentration import (
+    calc_concentration_arrays,
+    calc_concentration_results,
+    calc_concentration_results_by,
+)
+from race_gamble_core.evaluation.sweep import StrategySweepEvaluator
+
+
+def _make_results(num_records: int = 2000, seed: int = 0) -> BetStrategyResults:
+    rng = np.random.default_rng(seed)
+    return BetStrategyResults.from_arrays(
+        race_identifiers=rng.integers(0, 300, num_records),
+        confirmed_odds=rng.integers(4, 400, num_records) / 4,
+        flag_ground_truth_orders=rng.random(num_records) < 0.2,
+        bet_amounts=rng.integers(0, 3, num_records) * 100,
+    )
+
+
+def _reference(bet_amounts, confirmed_odds, flag_hits, top_hit_percents, top_k_hits):
+    # ソートによる素朴な実装
+    bet_amounts = np.asarray(bet_amounts)
+    return_amounts = bet_amounts * np.asarray(confirmed_odds) * np.asarray(flag_hits)
+    hit_returns = np.sort(return_amounts[(bet_amounts > 0) & np.asarray(flag_hits)])[::-1]
+    total_profit = math.trunc(return_amounts.sum()) - bet_amounts.sum()
+    n = hit_returns.size
+    total = hit_returns.sum()
+    shares = [hit_returns[: math.ceil(n * p / 100)].sum() / total if total > 0 else 0.0 for p in top_hit_percents]
+    profits = [total_profit - hit_returns[:k].sum() for k in top_k_hits]
+    if n > 0 and total > 0:
+        mean_abs_diff = np.abs(hit_returns[:, None] - hit_returns[None, :]).sum() / (n * n)
+        gini = mean_abs_diff / (2 * hit_returns.mean())
+    else:
+        gini = 0.0
+    return n, shares, profits, gini
+
+
+def _assert_matches(actual, expected):
+    n, shares, profits, gini = expected
+    assert actual.num_hits == n
+    assert np.allclose(actual.top_hit_return_shares, shares)
+    assert np.allclose(actual.profits_without_top_hits, profits)
+    assert np.isclose(actual.return_gini, gini)
+
+
+class TestCalcConcentrationArrays:
+    def test_known_values(self):
+        # 1行目: 的中が1件に集中、2行目: 均等、3行目: 的中なし
+        matrix = np.array([[0.0, 0.0, 0.0, 1000.0], [0.0, 200.0, 200.0, 200.0], [0.0, 0.0, 0.0, 0.0]])
+        arrays = calc_concentration_arrays(
+            matrix, num_hits=[4, 3, 0], total_profits=[500, 100, -300], top_hit_percents=[25.0], top_k_hits=[1, 10]
+        )
+        assert arrays.num_hits.tolist() == [4, 3, 0]
+        assert np.allclose(arrays.top_hit_return_shares[:, 0], [1.0, 1 / 3, 0.0])
+        assert np.allclose(arrays.profits_without_top_hits, [[-500, -500], [-100, -500], [-300, -300]])
+        # 4件中1件に集中: (n - 1) / n
+        assert np.allclose(arrays.return_gini, [0.75, 0.0, 0.0])
+        assert arrays[0].top_k_hits == [1, 10]
+
+    def test_invalid_inputs(self):
+        with pytest.raises(ValueError):
+            calc_concentration_arrays(np.zeros((2, 3)), [4, 0], [0, 0])
+        with pytest.raises(ValueError):
+            calc_concentration_arrays(np.zeros((1, 3)), [1], [0], top_hit_percents=[0.0])
+        with pytest.raises(ValueError):
+            calc_concentration_arrays(np.zeros((1, 3)), [1], [0], top_k_hits=[-1])
+
+
+class TestCalcConcentrationResults:
+    def test_matches_reference(self):
+        results = _make_results()
+        concentration = calc_concentration_results(results, top_hit_percents=[1.0, 10.0, 100.0], top_k_hits=[0, 3])
+        expected = _reference(
+            results.bet_amounts,
+            results.confirmed_odds,
+            results.flag_ground_truth_orders,
+            [1.0, 10.0, 100.0],
+            [0, 3],
+        )
+        _assert_matches(concentration, expected)
+        assert np.isclose(concentration.top_hit_return_shares[-1], 1.0)
+        assert concentration.profits_without_top_hits[0] == results.calc_statistic_results().total_profit
+
+    def test_by_groups(self):
+        results = _make_results()
+        rng = np.random.default_rng(5)
+        keys = rng.choice(["a", "b", "c", "d"], len(results.bet_amounts), p=[0.7, 0.2, 0.09, 0.01])
+        sub_keys = rng.integers(0, 2, len(results.bet_amounts))
+        # グループがチャンクに分かれるように小さな上限を指定する
+        by_groups = calc_concentration_results_by(results, [keys, sub_keys], max_chunk_elements=200)
+        assert len(by_groups) == len(set(zip(keys.tolist(), sub_keys.tolist())))
+
+        bet_amounts = np.asarray(results.bet_amounts)
+        confirmed_odds = np.asarray(results.confirmed_odds)
+        flag_hits = np.asarray(results.flag_ground_truth_orders)
+        for (key, sub_key), concentration in by_groups.items():
+            mask = (keys == key) & (sub_keys == sub_key)
+            expected = _reference(
+                bet_amounts[mask], confirmed_odds[mask], flag_hits[mask], [1.0, 5.0, 10.0], [1, 5, 10]
+            )
+            _assert_matches(concentration, expected)
+
+    def test_profits_match_statistic_results(self):
+        # 100 * 2.3のような浮動小数点誤差があるオッズでも、総利益金額はcalc_statistic_resultsと一致する
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=np.array([0, 0, 1, 2, 3]),
+            confirmed_odds=np.array([2.3, 4.6, 2.3, np.nan, 1.1]),
+            flag_ground_truth_orders=np.array([True, False, True, False, True]),
+            bet_amounts=np.array([100, 100, 300, 100, 300]),
+        )
+        concentration = calc_concentration_results(results, top_k_hits=[0])
+        assert concentration.profits_without_top_hits == [results.calc_statistic_results().total_profit]
+
+        keys = np.array(["a", "a", "b", "b", "a"])
+        by_groups = calc_concentration_results_by(results, keys, top_k_hits=[0])
+        for key, statistics in results.calc_statistic_results_by(keys).items():
+            assert by_groups[key].profits_without_top_hits == [statistics.total_profit]
+
+        evaluator = StrategySweepEvaluator.from_bet_strategy_results(results)
+        arrays = evaluator.evaluate_concentration(np.asarray(results.bet_amounts), top_k_hits=[0])
+        assert arrays[0].profits_without_top_hits == [results.calc_statistic_results().total_profit]
+
+    def test_no_hits(self):
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=[0, 1],
+            confirmed_odds=[2.0, 3.0],
+            flag_ground_truth_orders=[False, True],
+            bet_amounts=[100, 0],
+        )
+        concentration = calc_concentration_results(results)
+        assert concentration.num_hits == 0
+        assert concentration.top_hit_return_shares == [0.0, 0.0, 0.0]
+        assert concentration.profits_without_top_hits == [-100, -100, -100]
+        assert concentration.return_gini == 0.0
+
+
+class TestStrategySweepConcentration:
+    def test_evaluate_concentration(self):
+        results = _make_results(seed=3)
+        rng = np.random.default_rng(4)
+        bet_amount_matrix = rng.integers(0, 3, (6, len(results.bet_amounts))) * 100
+        bet_amount_matrix[2] = 0
+
+        evaluator = StrategySweepEvaluator.from_bet_strategy_results(
+            results, max_chunk_elements=len(results.bet_amounts) * 2
+        )
+        arrays = evaluator.evaluate_concentration(bet_amount_matrix, top_k_hits=[2])
+        assert len(arrays) == 6
+        for i in range(6):
+            expected = _reference(
+                bet_amount_matrix[i], results.confirmed_odds, results.flag_ground_truth_orders, [1.0, 5.0, 10.0], [2]
+            )
+            _assert_matches(arrays[i], expected)
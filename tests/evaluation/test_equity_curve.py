@@ -0,0 +1,179 @@
+import pickle
+
+import numpy as np
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.equity_curve import (
+    EquityCurveAccumulator,
+    calc_equity_curve,
+    calc_equity_curves_by,
+)
+
+
+def _make_results(num_records: int = 3000, seed: int = 0) -> BetStrategyResults:
+    rng = np.random.default_rng(seed)
+    return BetStrategyResults.from_arrays(
+        race_identifiers=np.array([f"race{i:04d}" for i in rng.integers(0, 400, num_records)]),
+        confirmed_odds=rng.integers(4, 60, num_records) / 4,
+        flag_ground_truth_orders=rng.random(num_records) < 0.15,
+        bet_amounts=rng.integers(0, 3, num_records) * 100,
+    )
+
+
+def _reference(race_profits, race_bets, race_returns, race_num_bets, rolling_window):
+    # ループによる素朴な実装
+    cumulative = np.cumsum(race_profits)
+    peak, peak_idx = 0.0, -1
+    drawdowns = []
+    max_drawdown, max_peak_idx, max_trough_idx = 0.0, -1, -1
+    for i, value in enumerate(cumulative):
+        if value >= peak:
+            peak, peak_idx = value, i
+        drawdowns.append(peak - value)
+        if peak - value > max_drawdown:
+            max_drawdown, max_peak_idx, max_trough_idx = peak - value, peak_idx, i
+
+    def _longest_run(flags):
+        longest = current = 0
+        for flag in flags:
+            current = current + 1 if flag else 0
+            longest = max(longest, current)
+        return longest
+
+    rolling_rois = []
+    for i in range(len(race_profits)):
+        lo = max(0, i - rolling_window + 1)
+        bets = race_bets[lo : i + 1].sum()
+        rolling_rois.append(race_returns[lo : i + 1].sum() / bets if bets > 0 else 0.0)
+    drawdowns = np.array(drawdowns)
+    return {
+        "cumulative_profits": cumulative,
+        "drawdowns": drawdowns,
+        "rolling_rois": np.array(rolling_rois),
+        "max_drawdown": max_drawdown,
+        "max_drawdown_peak_idx": max_peak_idx,
+        "max_drawdown_trough_idx": max_trough_idx,
+        "max_drawdown_duration": _longest_run(drawdowns > 0),
+        "num_races_under_water": int(np.count_nonzero(drawdowns > 0)),
+        "longest_losing_streak": _longest_run(race_profits[race_num_bets > 0] < 0),
+    }
+
+
+def _reference_from_results(bet_amounts, confirmed_odds, flag_hits, race_identifiers, rolling_window):
+    race_uniques, race_codes = np.unique(race_identifiers, return_inverse=True)
+    returns = bet_amounts * confirmed_odds * flag_hits
+    race_bets = np.bincount(race_codes, weights=bet_amounts, minlength=race_uniques.size)
+    race_returns = np.bincount(race_codes, weights=returns, minlength=race_uniques.size)
+    race_num_bets = np.bincount(race_codes, weights=bet_amounts > 0, minlength=race_uniques.size)
+    return race_uniques, _reference(race_returns - race_bets, race_bets, race_returns, race_num_bets, rolling_window)
+
+
+def _assert_matches(actual, expected_race_identifiers, expected):
+    assert actual.race_identifiers.tolist() == expected_race_identifiers.tolist()
+    for field in ["cumulative_profits", "drawdowns", "rolling_rois"]:
+        assert np.allclose(getattr(actual, field), expected[field])
+    assert np.isclose(actual.max_drawdown, expected["max_drawdown"])
+    for field in [
+        "max_drawdown_peak_idx",
+        "max_drawdown_trough_idx",
+        "max_drawdown_duration",
+        "num_races_under_water",
+        "longest_losing_streak",
+    ]:
+        assert getattr(actual, field) == expected[field], field
+
+
+class TestCalcEquityCurve:
+    def test_matches_reference(self):
+        results = _make_results()
+        curve = calc_equity_curve(results, rolling_window=30)
+        race_uniques, expected = _reference_from_results(
+            np.asarray(results.bet_amounts),
+            np.asarray(results.confirmed_odds),
+            np.asarray(results.flag_ground_truth_orders),
+            np.asarray(results.race_identifiers),
+            30,
+        )
+        _assert_matches(curve, race_uniques, expected)
+        assert np.isclose(curve.final_profit, results.calc_statistic_results().total_profit, atol=1)
+        assert 0 <= curve.time_under_water_rate <= 1
+
+    def test_known_values(self):
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=["r1", "r2", "r3", "r4", "r5", "r6"],
+            confirmed_odds=[3.0, 1.0, 1.0, 10.0, 1.0, 1.0],
+            flag_ground_truth_orders=[True, False, False, True, False, False],
+            bet_amounts=[100, 100, 100, 100, 0, 100],
+        )
+        curve = calc_equity_curve(results, rolling_window=2)
+        assert curve.cumulative_profits.tolist() == [200, 100, 0, 900, 900, 800]
+        assert curve.drawdowns.tolist() == [0, 100, 200, 0, 0, 100]
+        assert curve.max_drawdown == 200
+        assert (curve.max_drawdown_peak_idx, curve.max_drawdown_trough_idx) == (0, 2)
+        assert curve.max_drawdown_duration == 2
+        assert curve.num_races_under_water == 3
+        # 購入のないr5を挟んでも連敗は続く
+        assert curve.longest_losing_streak == 2
+        assert np.allclose(curve.rolling_rois, [3.0, 1.5, 0.0, 5.0, 10.0, 0.0])
+
+    def test_empty(self):
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=["r1"], confirmed_odds=[2.0], flag_ground_truth_orders=[False], bet_amounts=[0]
+        )
+        curve = calc_equity_curve(results)
+        assert curve.max_drawdown == 0
+        assert curve.max_drawdown_trough_idx == -1
+        assert curve.final_profit == 0
+
+
+class TestCalcEquityCurvesBy:
+    def test_by_groups(self):
+        results = _make_results(seed=1)
+        rng = np.random.default_rng(2)
+        keys = rng.choice(["a", "b", "c"], len(results.bet_amounts))
+        curves = calc_equity_curves_by(results, keys, rolling_window=10)
+        assert set(curves) == {"a", "b", "c"}
+
+        bet_amounts = np.asarray(results.bet_amounts)
+        confirmed_odds = np.asarray(results.confirmed_odds)
+        flag_hits = np.asarray(results.flag_ground_truth_orders)
+        race_identifiers = np.asarray(results.race_identifiers)
+        for key, curve in curves.items():
+            mask = keys == key
+            race_uniques, expected = _reference_from_results(
+                bet_amounts[mask], confirmed_odds[mask], flag_hits[mask], race_identifiers[mask], 10
+            )
+            _assert_matches(curve, race_uniques, expected)
+
+
+class TestEquityCurveAccumulator:
+    def test_update_and_merge(self):
+        results = _make_results(seed=3)
+        expected = calc_equity_curve(results)
+
+        def _chunk(start, stop):
+            return BetStrategyResults.from_arrays(
+                race_identifiers=np.asarray(results.race_identifiers)[start:stop],
+                confirmed_odds=np.asarray(results.confirmed_odds)[start:stop],
+                flag_ground_truth_orders=np.asarray(results.flag_ground_truth_orders)[start:stop],
+                bet_amounts=np.asarray(results.bet_amounts)[start:stop],
+            )
+
+        accumulator = EquityCurveAccumulator()
+        for start in range(0, 3000, 100):
+            accumulator.update(_chunk(start, start + 100))
+        actual = accumulator.finalize()
+        assert actual.race_identifiers.tolist() == expected.race_identifiers.tolist()
+        assert np.allclose(actual.cumulative_profits, expected.cumulative_profits)
+        assert actual.max_drawdown_duration == expected.max_drawdown_duration
+
+        shards = [EquityCurveAccumulator().update(_chunk(s, s + 1000)) for s in range(0, 3000, 1000)]
+        shards = [pickle.loads(pickle.dumps(shard)) for shard in shards]
+        merged = shards[0].merge(shards[1]).merge(shards[2]).finalize()
+        assert np.allclose(merged.drawdowns, expected.drawdowns)
+        assert merged.longest_losing_streak == expected.longest_losing_streak
+
+    def test_empty(self):
+        curve = EquityCurveAccumulator().finalize()
+        assert curve.num_races == 0
+        assert curve.max_drawdown == 0
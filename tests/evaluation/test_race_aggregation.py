@@ -0,0 +1,25 @@
+import numpy as np
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.race_aggregation import aggregate_by_race
+
+
+class TestRaceAggregation:
+    def test_aggregate_by_race(self):
+        results = BetStrategyResults(
+            race_identifiers=["race0", "race0", "race1", "race2"],
+            confirmed_odds=[2.0, 3.0, 4.0, 5.0],
+            flag_ground_truth_orders=[True, False, True, False],
+            bet_amounts=[100, 200, 0, 100],
+        )
+        aggregates = aggregate_by_race(results)
+
+        assert aggregates.num_races == 3
+        order = np.argsort(aggregates.race_identifiers)
+        np.testing.assert_array_equal(aggregates.race_identifiers[order], ["race0", "race1", "race2"])
+        np.testing.assert_array_equal(aggregates.num_bets[order], [2, 0, 1])
+        np.testing.assert_array_equal(aggregates.num_tekityu[order], [1, 0, 0])
+        np.testing.assert_array_equal(aggregates.bet_amounts[order], [300, 0, 100])
+        np.testing.assert_allclose(aggregates.return_amounts[order], [200, 0, 0])
+        np.testing.assert_allclose(aggregates.return_amount_sq_sums[order], [40000, 0, 0])
+        np.testing.assert_allclose(aggregates.profits[order], [-100, 0, -100])
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, Order
+from race_gamble_core.evaluation.settlement import get_winning_order_idx, settle_bets
+
+
+class TestSettlement:
+    def test_winning_order_idx(self):
+        finishing_orders = np.array([[3, 1, 5], [1, 2, 3], [0, 0, 0]])
+        for bet_type in BetType:
+            winning_order_idx = get_winning_order_idx(finishing_orders, bet_type)
+            for i, order_str in enumerate(["3-1-5", "1-2-3"]):
+                num_courses = 1 + (bet_type != BetType.tansyou) + (bet_type in (BetType.sanrentan, BetType.sanrenpuku))
+                order = Order.create_from_str_order("-".join(order_str.split("-")[:num_courses]), bet_type)
+                assert winning_order_idx[i] == order.to_order_idx()
+            # 不成立のレースは-1
+            assert winning_order_idx[2] == -1
+
+    def test_settle_bets(self):
+        finishing_orders = np.array([[3, 1, 5], [1, 2, 3]])
+        orders = [
+            (0, BetType.tansyou, "3", 100),
+            (0, BetType.nirenpuku, "1-3", 200),
+            (0, BetType.nirentan, "1-3", 100),
+            (1, BetType.sanrentan, "1-2-3", 300),
+            (1, BetType.sanrenpuku, "1-2-4", 100),
+        ]
+        payouts = {
+            BetType.tansyou: np.array([2.5, 1.5]),
+            BetType.nirentan: np.array([10.0, 5.0]),
+            BetType.nirenpuku: np.array([4.0, 3.0]),
+            BetType.sanrentan: np.array([50.0, 20.0]),
+            BetType.sanrenpuku: np.array([12.0, 8.0]),
+        }
+        results = settle_bets(
+            finishing_orders,
+            race_idx=[race for race, _, _, _ in orders],
+            bet_types=[bet_type for _, bet_type, _, _ in orders],
+            order_idx=[Order.create_from_str_order(s, bet_type).to_order_idx() for _, bet_type, s, _ in orders],
+            bet_amounts=[amount for _, _, _, amount in orders],
+            payouts=payouts,
+            race_identifiers=["race_a", "race_b"],
+        )
+
+        np.testing.assert_array_equal(results.flag_hits, [True, True, False, True, False])
+        np.testing.assert_array_equal(results.confirmed_odds, [2.5, 4.0, 0.0, 20.0, 0.0])
+        np.testing.assert_array_equal(results.return_amounts, [250.0, 800.0, 0.0, 6000.0, 0.0])
+
+        statistic_results = results.to_bet_strategy_results().calc_statistic_results()
+        assert statistic_results.num_bet_races == 2
+        assert statistic_results.num_tekityu == 3
+        assert statistic_results.total_bet_amount == 800
+        assert statistic_results.total_return_amount == 7050
+        assert results.to_bet_strategy_results().model_dump()["race_identifiers"] == ["race_a"] * 3 + ["race_b"] * 2
+
+    def test_full_payout_board(self):
+        finishing_orders = np.array([[2, 1, 3]])
+        board = np.arange(1, 31, dtype=np.float64)
+        payouts = {BetType.nirentan: board[np.newaxis, :]}
+        results = settle_bets(finishing_orders, [0, 0], BetType.nirentan, [5, 6], [100, 100], payouts)
+        np.testing.assert_array_equal(results.flag_hits, [True, False])
+        np.testing.assert_array_equal(results.confirmed_odds, [6.0, 7.0])
+        np.testing.assert_array_equal(results.return_amounts, [600.0, 0.0])
+
+    def test_invalid(self):
+        finishing_orders = np.array([[1, 2, 3]])
+        payouts = {BetType.tansyou: np.array([2.0])}
+        with pytest.raises(ValueError):
+            settle_bets(finishing_orders, [1], BetType.tansyou, [0], [100], payouts)
+        with pytest.raises(ValueError):
+            settle_bets(finishing_orders, [0], BetType.tansyou, [6], [100], payouts)
+        with pytest.raises(ValueError):
+            settle_bets(finishing_orders, [0], BetType.nirentan, [0], [100], payouts)
+        with pytest.raises(ValueError):
+            settle_bets(finishing_orders, [0], ["wide"], [0], [100], payouts)
@@ -0,0 +1,90 @@
+import pickle
+
+import numpy as np
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.streaming import EvaluationStatisticAccumulator
+
+
+def _make_results(start: int, stop: int) -> BetStrategyResults:
+    rng = np.random.default_rng(0)
+    num_records = 3000
+    race_identifiers = np.array([f"race{i:04d}" for i in np.sort(rng.integers(0, 500, num_records))])
+    confirmed_odds = rng.integers(4, 400, num_records) / 4
+    flag_ground_truth_orders = rng.random(num_records) < 0.2
+    bet_amounts = rng.integers(0, 3, num_records) * 100
+    return BetStrategyResults.from_arrays(
+        race_identifiers=race_identifiers[start:stop],
+        confirmed_odds=confirmed_odds[start:stop],
+        flag_ground_truth_orders=flag_ground_truth_orders[start:stop],
+        bet_amounts=bet_amounts[start:stop],
+    )
+
+
+def _assert_same_statistics(actual, expected):
+    for field in ["num_bet_races", "num_all_races", "num_bets", "num_tekityu", "total_bet_amount", "total_profit"]:
+        assert getattr(actual, field) == getattr(expected, field)
+    for field in ["tekityu_rate", "total_roi", "return_amount_average", "return_amount_variance", "sharp_ratio"]:
+        assert np.isclose(getattr(actual, field), getattr(expected, field))
+
+
+class TestEvaluationStatisticAccumulator:
+    def test_update(self):
+        expected = _make_results(0, 3000).calc_statistic_results()
+
+        accumulator = EvaluationStatisticAccumulator()
+        # チャンクの境界でレースが分割されるケースも含む
+        for start in range(0, 3000, 700):
+            accumulator.update(_make_results(start, min(start + 700, 3000)))
+
+        _assert_same_statistics(accumulator.finalize(), expected)
+
+    def test_merge(self):
+        expected = _make_results(0, 3000).calc_statistic_results()
+
+        shards = [EvaluationStatisticAccumulator().update(_make_results(s, s + 1000)) for s in range(0, 3000, 1000)]
+        # 別プロセスから受け取ることを想定してpickleを経由する
+        shards = [pickle.loads(pickle.dumps(shard)) for shard in shards]
+
+        left = shards[0].merge(shards[1]).merge(shards[2])
+        right = shards[0].merge(shards[1].merge(shards[2]))
+        _assert_same_statistics(left.finalize(), expected)
+        _assert_same_statistics(right.finalize(), expected)
+
+    def test_empty(self):
+        results = EvaluationStatisticAccumulator().finalize()
+        assert results.num_bets == 0
+        assert results.num_all_races == 0
+        assert results.return_amount_variance == 0
+
+    def test_exact_totals_and_varying_identifier_widths(self):
+        # 100 * 2.3のような浮動小数点誤差があるオッズでも、チャンク分割によらず一括計算と総額が一致する
+        # チャンクごとにレース識別子の文字列の幅(dtype)が異なっても、同じレースは同じレースとして数える
+        rng = np.random.default_rng(3)
+        num_records = 2000
+        race_identifiers = np.array([f"r{i}" for i in rng.integers(0, 300, num_records)], dtype=object)
+        confirmed_odds = rng.integers(10, 300, num_records) / 10
+        flag_ground_truth_orders = rng.random(num_records) < 0.3
+        bet_amounts = rng.integers(0, 4, num_records) * 100
+        expected = BetStrategyResults.from_arrays(
+            race_identifiers=race_identifiers.astype(str),
+            confirmed_odds=confirmed_odds,
+            flag_ground_truth_orders=flag_ground_truth_orders,
+            bet_amounts=bet_amounts,
+        ).calc_statistic_results()
+
+        accumulator = EvaluationStatisticAccumulator()
+        for start in range(0, num_records, 333):
+            chunk = slice(start, start + 333)
+            accumulator.update(
+                BetStrategyResults.from_arrays(
+                    race_identifiers=race_identifiers[chunk].astype(str),
+                    confirmed_odds=confirmed_odds[chunk],
+                    flag_ground_truth_orders=flag_ground_truth_orders[chunk],
+                    bet_amounts=bet_amounts[chunk],
+                )
+            )
+
+        actual = accumulator.finalize()
+        _assert_same_statistics(actual, expected)
+        assert actual.total_return_amount == expected.total_return_amount
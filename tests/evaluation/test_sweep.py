@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetStrategyResults
+from race_gamble_core.evaluation.sweep import StrategySweepEvaluator
+
+
+def _make_dataset(num_records: int = 1500, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    race_identifiers = np.array([f"race{i}" for i in rng.integers(0, 200, num_records)])
+    confirmed_odds = rng.integers(4, 400, num_records) / 4
+    flag_ground_truth_orders = rng.random(num_records) < 0.2
+    return race_identifiers, confirmed_odds, flag_ground_truth_orders
+
+
+def _assert_same_statistics(actual, expected):
+    for field in ["num_bet_races", "num_all_races", "num_bets", "num_tekityu", "total_bet_amount"]:
+        assert getattr(actual, field) == getattr(expected, field)
+    for field in ["total_return_amount", "total_profit"]:
+        assert getattr(actual, field) == getattr(expected, field)
+    for field in ["tekityu_rate", "total_roi", "return_amount_average", "return_amount_variance", "sharp_ratio"]:
+        assert np.isclose(getattr(actual, field), getattr(expected, field))
+
+
+class TestStrategySweepEvaluator:
+    def test_evaluate(self):
+        race_identifiers, confirmed_odds, flag_ground_truth_orders = _make_dataset()
+        rng = np.random.default_rng(1)
+        bet_amount_matrix = rng.integers(0, 3, (7, race_identifiers.size)) * 100
+        bet_amount_matrix[3] = 0  # 何も買わない戦略
+
+        # チャンク分割されるように小さな上限を指定する
+        evaluator = StrategySweepEvaluator(
+            race_identifiers, confirmed_odds, flag_ground_truth_orders, max_chunk_elements=race_identifiers.size * 2
+        )
+        sweep_results = evaluator.evaluate(bet_amount_matrix)
+        assert len(sweep_results) == 7
+
+        for i in range(7):
+            expected = BetStrategyResults.from_arrays(
+                race_identifiers=race_identifiers,
+                confirmed_odds=confirmed_odds,
+                flag_ground_truth_orders=flag_ground_truth_orders,
+                bet_amounts=bet_amount_matrix[i],
+            ).calc_statistic_results()
+            _assert_same_statistics(sweep_results[i], expected)
+
+    def test_evaluate_thresholds(self):
+        race_identifiers, confirmed_odds, flag_ground_truth_orders = _make_dataset()
+        rng = np.random.default_rng(2)
+        scores = rng.normal(size=race_identifiers.size)
+        scores[:10] = np.nan
+        thresholds = np.array([-np.inf, -1.0, 0.0, 0.5, 2.0, np.inf])
+
+        evaluator = StrategySweepEvaluator(race_identifiers, confirmed_odds, flag_ground_truth_orders)
+        threshold_results = evaluator.evaluate_thresholds(scores, thresholds, bet_amount=200)
+
+        bet_amount_matrix = np.where(scores[np.newaxis, :] > thresholds[:, np.newaxis], 200, 0)
+        matrix_results = evaluator.evaluate(bet_amount_matrix)
+        for i in range(thresholds.size):
+            _assert_same_statistics(threshold_results[i], matrix_results[i])
+
+    def test_rounding_odds_and_large_payouts(self):
+        # 100 * 2.3のような浮動小数点誤差があるオッズでも総払い戻し金額がcalc_statistic_resultsと一致し、
+        # 100万円単位の払い戻しでも分散の桁落ちが起きない
+        rng = np.random.default_rng(3)
+        num_records = 2000
+        race_identifiers = np.array([f"race{i}" for i in rng.integers(0, 300, num_records)])
+        confirmed_odds = np.where(rng.random(num_records) < 0.5, 2.3, rng.integers(20000, 20100, num_records) / 10)
+        flag_ground_truth_orders = rng.random(num_records) < 0.5
+        scores = rng.normal(size=num_records)
+        thresholds = np.array([-np.inf, -0.5, 0.0, 1.0])
+
+        evaluator = StrategySweepEvaluator(race_identifiers, confirmed_odds, flag_ground_truth_orders)
+        bet_amount_matrix = np.where(scores[np.newaxis, :] > thresholds[:, np.newaxis], 500, 0)
+        matrix_results = evaluator.evaluate(bet_amount_matrix)
+        threshold_results = evaluator.evaluate_thresholds(scores, thresholds, bet_amount=500)
+        for i in range(thresholds.size):
+            expected = BetStrategyResults.from_arrays(
+                race_identifiers=race_identifiers,
+                confirmed_odds=confirmed_odds,
+                flag_ground_truth_orders=flag_ground_truth_orders,
+                bet_amounts=bet_amount_matrix[i],
+            ).calc_statistic_results()
+            _assert_same_statistics(matrix_results[i], expected)
+            _assert_same_statistics(threshold_results[i], expected)
+            assert np.isclose(threshold_results[i].return_amount_variance, expected.return_amount_variance, rtol=1e-12)
+
+    def test_evaluate_invalid(self):
+        race_identifiers, confirmed_odds, flag_ground_truth_orders = _make_dataset(num_records=10)
+        evaluator = StrategySweepEvaluator(race_identifiers, confirmed_odds, flag_ground_truth_orders)
+
+        with pytest.raises(ValueError):
+            evaluator.evaluate(np.full((2, 10), 110))
+        with pytest.raises(ValueError):
+            evaluator.evaluate(np.full((2, 9), 100))
+        with pytest.raises(ValueError):
+            evaluator.evaluate_thresholds(np.zeros(10), [0.0], bet_amount=150)
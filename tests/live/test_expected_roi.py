@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType
+from race_gamble_core.live.expected_roi import ExpectedRoiEventType, IncrementalExpectedRoiEngine
+
+
+class TestIncrementalExpectedRoiEngine:
+    def test_matches_full_recalculation(self):
+        rng = np.random.default_rng(0)
+        engine = IncrementalExpectedRoiEngine(BetType.nirentan, 6, threshold=0.1)
+        race_identifiers = [f"r{i}" for i in range(20)]
+        odds = rng.uniform(1, 100, (20, 30))
+        odds[:, 0] = 0.0
+        probs = rng.dirichlet(np.ones(30), size=20)
+
+        value_bets = set()
+        for i, race in enumerate(race_identifiers):
+            for event in engine.add_race(race, odds[i], probs[i]):
+                assert event.event_type == ExpectedRoiEventType.new_value
+                value_bets.add((event.race_identifier, event.order_idx))
+
+        for _ in range(50):
+            races = rng.integers(0, 20, 5)
+            order_idx = rng.integers(0, 30, 5)
+            if rng.random() < 0.5:
+                new_values = rng.uniform(1, 100, 5)
+                events = engine.update_odds(np.array(race_identifiers)[races], order_idx, new_values)
+                odds[races, order_idx] = new_values
+            else:
+                new_values = rng.uniform(0, 0.1, 5)
+                events = engine.update_estimated_probs(np.array(race_identifiers)[races], order_idx, new_values)
+                probs[races, order_idx] = new_values
+
+            for event in events:
+                key = (event.race_identifier, event.order_idx)
+                if event.event_type == ExpectedRoiEventType.new_value:
+                    assert key not in value_bets
+                    value_bets.add(key)
+                else:
+                    value_bets.remove(key)
+
+            expected_rois = probs * odds - 1
+            flag_value = (odds > 0) & (expected_rois > 0.1)
+            assert value_bets == {(race_identifiers[r], int(o)) for r, o in zip(*np.nonzero(flag_value))}
+            assert engine.num_value_bets == len(value_bets)
+            np.testing.assert_allclose(engine.get_expected_rois("r3"), expected_rois[3])
+
+            # 上位k個はバリューベットの中で期待ROI倍率が高い順
+            top = engine.get_top_value_bets(5)
+            expected_top = np.sort(expected_rois[flag_value])[::-1][:5]
+            np.testing.assert_allclose([roi for _, _, roi in top], expected_top)
+
+    def test_remove_race(self):
+        engine = IncrementalExpectedRoiEngine(BetType.tansyou, 3)
+        events = engine.add_race("r1", [2.0, 3.0, 0.0], [0.6, 0.2, 0.2])
+        assert [(e.event_type, e.order_idx) for e in events] == [(ExpectedRoiEventType.new_value, 0)]
+        np.testing.assert_allclose(engine.get_implied_probs("r1"), [0.375, 0.25, 0.0])
+
+        events = engine.remove_race("r1")
+        assert [(e.event_type, e.order_idx) for e in events] == [(ExpectedRoiEventType.no_longer_value, 0)]
+        assert engine.num_races == 0
+        assert engine.num_value_bets == 0
+        assert engine.get_top_value_bets(3) == []
+
+        # 削除したレースの行は再利用される
+        engine.add_race("r2", [2.0, 3.0, 4.0], [0.1, 0.1, 0.8])
+        assert engine.get_top_value_bets(3) == [("r2", 2, pytest.approx(2.2))]
+
+    def test_invalid(self):
+        engine = IncrementalExpectedRoiEngine(BetType.tansyou, 3)
+        engine.add_race("r1", [2.0, 3.0, 4.0], [0.5, 0.3, 0.2])
+        with pytest.raises(ValueError):
+            engine.add_race("r1", [2.0, 3.0, 4.0], [0.5, 0.3, 0.2])
+        with pytest.raises(KeyError):
+            engine.update_odds("r2", [0], [2.0])
+        with pytest.raises(ValueError):
+            engine.update_odds("r1", [3], [2.0])
+        with pytest.raises(ValueError):
+            engine.update_odds("r1", [0], [0.5])
+        np.testing.assert_allclose(engine.get_expected_rois("r1"), [0.0, -0.1, -0.2])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, Order
+from race_gamble_core.orders.aggregation import (
+    aggregate_rentan_to_renpuku,
+    expand_renpuku_to_rentan,
+    get_renpuku_member_table,
+    get_rentan_to_renpuku_table,
+)
+
+
+class TestAggregation:
+    @pytest.mark.parametrize(
+        "rentan_bet_type, renpuku_bet_type",
+        [(BetType.nirentan, BetType.nirenpuku), (BetType.sanrentan, BetType.sanrenpuku)],
+    )
+    @pytest.mark.parametrize("num_racers", [3, 6, 9])
+    def test_tables_match_orders(self, rentan_bet_type, renpuku_bet_type, num_racers):
+        rentan_to_renpuku = get_rentan_to_renpuku_table(rentan_bet_type, num_racers)
+        for rentan_order_idx, renpuku_order_idx in enumerate(rentan_to_renpuku.tolist()):
+            rentan_order = Order.idx_to_order(rentan_order_idx, rentan_bet_type, num_racers)
+            renpuku_order = Order.create_from_str_order(str(rentan_order), renpuku_bet_type)
+            assert renpuku_order.to_order_idx(num_racers=num_racers) == renpuku_order_idx
+
+        members = get_renpuku_member_table(renpuku_bet_type, num_racers)
+        np.testing.assert_array_equal(np.sort(members.ravel()), np.arange(rentan_to_renpuku.size))
+        np.testing.assert_array_equal(
+            rentan_to_renpuku[members], np.broadcast_to(np.arange(members.shape[0])[:, np.newaxis], members.shape)
+        )
+
+    def test_aggregate_and_expand(self):
+        rng = np.random.default_rng(0)
+        values = rng.random((4, 120))
+
+        rentan_to_renpuku = get_rentan_to_renpuku_table(BetType.sanrentan, 6)
+        aggregated = aggregate_rentan_to_renpuku(values, BetType.sanrentan)
+        assert aggregated.shape == (4, 20)
+        expected = np.zeros((20, 4))
+        np.add.at(expected, rentan_to_renpuku, values.T)
+        np.testing.assert_allclose(aggregated, expected.T)
+        np.testing.assert_allclose(aggregated.sum(axis=1), values.sum(axis=1))
+
+        expanded = expand_renpuku_to_rentan(aggregated, BetType.sanrenpuku)
+        assert expanded.shape == (4, 120)
+        np.testing.assert_allclose(expanded, aggregated[:, rentan_to_renpuku])
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            aggregate_rentan_to_renpuku(np.zeros(20), BetType.sanrenpuku)
+        with pytest.raises(ValueError):
+            aggregate_rentan_to_renpuku(np.zeros(30), BetType.sanrentan)
+        with pytest.raises(ValueError):
+            expand_renpuku_to_rentan(np.zeros(30), BetType.nirenpuku)
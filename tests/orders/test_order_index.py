@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, Order
+from race_gamble_core.orders.order_index import (
+    courses_to_order_idx,
+    get_num_combinations,
+    get_order_courses_table,
+    order_idx_to_courses,
+)
+from race_gamble_core.schemas.order import _prepare_order_idx_map
+
+
+class TestOrderIndex:
+    @pytest.mark.parametrize("bet_type", list(BetType))
+    @pytest.mark.parametrize("num_racers", [3, 6, 9, 12, 18])
+    def test_table_matches_order_idx_map(self, bet_type, num_racers):
+        order_idx_map = _prepare_order_idx_map(num_racers, bet_type)
+        courses_table = get_order_courses_table(bet_type, num_racers)
+
+        assert courses_table.shape[0] == len(order_idx_map) == get_num_combinations(bet_type, num_racers)
+        for order_str, order_idx in order_idx_map.items():
+            assert "-".join(map(str, courses_table[order_idx])) == order_str
+
+        np.testing.assert_array_equal(
+            courses_to_order_idx(courses_table, bet_type, num_racers), np.arange(courses_table.shape[0])
+        )
+
+    def test_table_is_read_only(self):
+        courses_table = get_order_courses_table(BetType.sanrentan, 6)
+        with pytest.raises(ValueError):
+            courses_table[0, 0] = 2
+
+    def test_courses_to_order_idx(self):
+        # 連複系はソートされていなくても変換できる
+        np.testing.assert_array_equal(
+            courses_to_order_idx([[3, 2, 1], [1, 2, 3], [6, 4, 5]], BetType.sanrenpuku, num_racers=6), [0, 0, 19]
+        )
+        np.testing.assert_array_equal(courses_to_order_idx([1, 6], BetType.tansyou, num_racers=6), [0, 5])
+
+        with pytest.raises(ValueError):
+            courses_to_order_idx([[1, 1, 2]], BetType.sanrentan, num_racers=6)
+        with pytest.raises(ValueError):
+            courses_to_order_idx([[1, 2, 7]], BetType.sanrentan, num_racers=6)
+        with pytest.raises(ValueError):
+            courses_to_order_idx([[1, 2]], BetType.sanrentan, num_racers=6)
+
+        np.testing.assert_array_equal(
+            courses_to_order_idx([[1, 1], [0, 2], [2, 1]], BetType.nirentan, num_racers=6, allow_invalid=True),
+            [-1, -1, 5],
+        )
+
+    def test_order_idx_to_courses(self):
+        np.testing.assert_array_equal(
+            order_idx_to_courses([0, 119], BetType.sanrentan, num_racers=6), [[1, 2, 3], [6, 5, 4]]
+        )
+        assert order_idx_to_courses(np.zeros((2, 3), dtype=np.int64), BetType.nirentan).shape == (2, 3, 2)
+
+        with pytest.raises(ValueError):
+            order_idx_to_courses([120], BetType.sanrentan, num_racers=6)
+
+    def test_consistent_with_order(self):
+        for order_idx in range(get_num_combinations(BetType.sanrenpuku, 8)):
+            order = Order.idx_to_order(order_idx, bet_type=BetType.sanrenpuku, num_racers=8)
+            assert order.to_order_idx(num_racers=8) == order_idx
+            assert order.get_courses() == tuple(order_idx_to_courses(order_idx, BetType.sanrenpuku, 8).tolist())
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, Order
+from race_gamble_core.orders.order_index import get_order_courses_table
+from race_gamble_core.orders.parser import parse_order_strings
+
+
+class TestParser:
+    @pytest.mark.parametrize("bet_type", list(BetType))
+    @pytest.mark.parametrize("num_racers", [6, 12])
+    def test_matches_order(self, bet_type, num_racers):
+        courses_table = get_order_courses_table(bet_type, num_racers)
+        order_strs = ["-".join(map(str, courses[::-1])) for courses in courses_table]
+
+        for values in [order_strs, np.array(order_strs), np.array(order_strs, dtype=np.bytes_)]:
+            parsed = parse_order_strings(values, bet_type, num_racers=num_racers, chunk_size=7)
+            assert len(parsed) == len(order_strs)
+            assert parsed.invalid_positions.size == 0
+            expected = [
+                Order.create_from_str_order(order_str, bet_type).to_order_idx(num_racers=num_racers)
+                for order_str in order_strs
+            ]
+            np.testing.assert_array_equal(parsed.order_idx, expected)
+
+        if bet_type in (BetType.nirenpuku, BetType.sanrenpuku):
+            # 連複系はコースが昇順に並べ替えられる
+            np.testing.assert_array_equal(parsed.courses, courses_table)
+
+    def test_invalid_rows(self):
+        order_strs = ["1-2-3", "1-2", "1-2-3-4", "1-1-2", "0-1-2", "1-2-7", "1--2", "a-b-c", "1-2-3 ", "", "001-2-3"]
+        parsed = parse_order_strings(np.array(order_strs, dtype=object), BetType.sanrentan)
+
+        np.testing.assert_array_equal(parsed.invalid_positions, np.arange(1, 10))
+        np.testing.assert_array_equal(parsed.order_idx[1:10], -1)
+        np.testing.assert_array_equal(parsed.courses[1:10], 0)
+        np.testing.assert_array_equal(parsed.courses[[0, 10]], [[1, 2, 3], [1, 2, 3]])
+        assert parsed.order_idx[0] == parsed.order_idx[10] == 0
+
+    def test_missing_values(self):
+        # pandasの列の欠損値(None, NaN)は、全体を例外にせず不正な行として報告する
+        for order_strs in [["1-2-3", None, "4-5-6", np.nan], [b"1-2-3", None, b"4-5-6", np.nan]]:
+            parsed = parse_order_strings(np.array(order_strs, dtype=object), BetType.sanrentan)
+            np.testing.assert_array_equal(parsed.invalid_positions, [1, 3])
+            np.testing.assert_array_equal(parsed.courses, [[1, 2, 3], [0, 0, 0], [4, 5, 6], [0, 0, 0]])
+
+        parsed = parse_order_strings(np.array([None, None], dtype=object), BetType.tansyou)
+        np.testing.assert_array_equal(parsed.invalid_positions, [0, 1])
+
+    def test_empty(self):
+        parsed = parse_order_strings([], BetType.tansyou)
+        assert len(parsed) == 0
+        assert parsed.courses.shape == (0, 1)
@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, Order
+from race_gamble_core.orders.order_index import get_num_combinations
+from race_gamble_core.probability.harville import calc_harville_probs
+
+
+def _harville_loop(win_probs, bet_type, num_racers):
+    # Orderを使った素朴な実装
+    probs = []
+    for order in Order.get_all_order_patterns(bet_type, num_racers):
+        courses = [order.get_first_course()]
+        if bet_type != BetType.tansyou:
+            courses.append(order.get_second_course())
+        if bet_type in (BetType.sanrentan, BetType.sanrenpuku):
+            courses.append(order.get_third_course())
+
+        if bet_type in (BetType.nirenpuku, BetType.sanrenpuku):
+            list_courses = list(itertools.permutations(courses))
+        else:
+            list_courses = [courses]
+
+        prob = 0.0
+        for cs in list_courses:
+            p, remaining = 1.0, 1.0
+            for c in cs:
+                p *= win_probs[c - 1] / remaining
+                remaining -= win_probs[c - 1]
+            prob += p
+        probs.append((order.to_order_idx(num_racers=num_racers), prob))
+    return np.array([p for _, p in sorted(probs)])
+
+
+class TestHarville:
+    @pytest.mark.parametrize("bet_type", list(BetType))
+    def test_matches_loop(self, bet_type):
+        rng = np.random.default_rng(0)
+        win_probs = rng.dirichlet(np.ones(6), size=5)
+
+        probs = calc_harville_probs(win_probs, bet_type, max_chunk_elements=50)
+        assert probs.shape == (5, get_num_combinations(bet_type, 6))
+        np.testing.assert_allclose(probs.sum(axis=1), 1.0)
+        for i in range(5):
+            np.testing.assert_allclose(probs[i], _harville_loop(win_probs[i], bet_type, 6))
+
+    def test_discount_exponents(self):
+        win_probs = np.array([0.6, 0.2, 0.1, 0.05, 0.03, 0.02])
+        harville = calc_harville_probs(win_probs, BetType.sanrentan)
+        discounted = calc_harville_probs(win_probs, BetType.sanrentan, discount_exponents=(0.8, 0.7))
+
+        assert harville.shape == (120,)
+        np.testing.assert_allclose(discounted.sum(), 1.0)
+        # 指数1はHarvilleモデルと一致する
+        np.testing.assert_allclose(
+            calc_harville_probs(win_probs, BetType.sanrentan, discount_exponents=(1.0, 1.0)), harville
+        )
+        # 補正により2着・3着の強さが平らになり、人気薄が2着・3着に来る確率が上がる
+        assert discounted[0] < harville[0]
+        assert discounted[-1] > harville[-1]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            calc_harville_probs(np.array([[0.5, -0.1, 0.6]]), BetType.tansyou)
+        with pytest.raises(ValueError):
+            calc_harville_probs(np.zeros((1, 3)), BetType.tansyou)
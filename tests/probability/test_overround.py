@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, OddsBoard
+from race_gamble_core.probability.overround import (
+    OverroundMethod,
+    normalize_implied_probs,
+    normalize_odds_board_collection,
+)
+from race_gamble_core.schemas.odds_board_collection import OddsBoardCollection
+
+
+def _make_odds(num_boards: int = 50, num_combinations: int = 30, unsold_rate: float = 0.05, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet(np.full(num_combinations, 0.8), num_boards)
+    # オッズは0.1倍単位で切り捨て、発売なし(0)の買い目を混ぜる
+    odds = np.floor(0.75 / np.maximum(probs, 1e-6) * 10) / 10
+    odds = np.maximum(odds, 1.0)
+    odds[rng.random(odds.shape) < unsold_rate] = 0.0
+    return odds
+
+
+class TestNormalizeImpliedProbs:
+    @pytest.mark.parametrize("method", list(OverroundMethod))
+    def test_normalized(self, method):
+        odds = _make_odds()
+        normalized = normalize_implied_probs(odds, method)
+        assert normalized.probs.shape == odds.shape
+        assert np.allclose(normalized.probs.sum(axis=1), 1.0)
+        # 発売なしの買い目は確率0
+        assert np.all(normalized.probs[odds == 0] == 0)
+        assert np.all((normalized.effective_takeouts > 0) & (normalized.effective_takeouts < 0.5))
+        assert np.allclose(normalized.booksums, np.sum(np.where(odds > 0, 1 / np.where(odds > 0, odds, 1), 0), axis=1))
+
+    def test_effective_takeouts(self):
+        # 控除率25%のオッズを0.1倍単位で切り捨てているので、実効控除率は25%以上になる
+        odds = _make_odds(num_combinations=6, unsold_rate=0.0)
+        normalized = normalize_implied_probs(odds)
+        assert np.all(normalized.effective_takeouts >= 0.25 - 1e-9)
+        assert np.all(normalized.effective_takeouts < 0.3)
+
+    def test_proportional(self):
+        odds = np.array([2.0, 4.0, 4.0, 0.0])
+        normalized = normalize_implied_probs(odds)
+        assert np.allclose(normalized.probs, [0.5, 0.25, 0.25, 0.0])
+        assert np.isclose(normalized.effective_takeouts[0], 0.0)
+
+    def test_power_and_shin_discount_longshots(self):
+        odds = _make_odds(num_boards=20)
+        proportional = normalize_implied_probs(odds, OverroundMethod.proportional).probs
+        for method in [OverroundMethod.power, OverroundMethod.shin]:
+            normalized = normalize_implied_probs(odds, method)
+            # 各ボードで最も人気の買い目の確率は上がり、最も人気薄の買い目の確率は下がる
+            favorite = np.argmax(proportional, axis=1)
+            longshot = np.argmin(np.where(odds > 0, proportional, np.inf), axis=1)
+            rows = np.arange(len(odds))
+            assert np.all(normalized.probs[rows, favorite] > proportional[rows, favorite])
+            assert np.all(normalized.probs[rows, longshot] < proportional[rows, longshot])
+
+        power = normalize_implied_probs(odds, OverroundMethod.power)
+        raw_probs = np.where(odds > 0, 1 / np.where(odds > 0, odds, 1), 0)
+        assert np.allclose(np.sum(raw_probs ** power.parameters[:, np.newaxis] * (odds > 0), axis=1), 1.0)
+        assert np.all(power.parameters > 1)
+        shin = normalize_implied_probs(odds, OverroundMethod.shin)
+        assert np.all((shin.parameters > 0) & (shin.parameters < 1))
+
+    def test_unsold_boards(self):
+        odds = np.array([[0.0, 0.0, 0.0], [0.0, 3.0, 0.0], [1.5, 3.0, 0.0]])
+        for method in OverroundMethod:
+            normalized = normalize_implied_probs(odds, method)
+            assert np.allclose(normalized.probs[0], 0.0)
+            assert np.allclose(normalized.probs[1], [0.0, 1.0, 0.0])
+            assert np.isclose(normalized.probs[2].sum(), 1.0)
+            assert normalized.effective_takeouts[0] == 0.0
+
+
+class TestNormalizeOddsBoardCollection:
+    def test_matches_per_board(self):
+        rng = np.random.default_rng(1)
+        odds_boards = [
+            OddsBoard(bet_type=BetType.nirentan, num_racers=6, odds=_make_odds(1, 30, seed=i)[0])
+            if i % 2 == 0
+            else OddsBoard(bet_type=BetType.tansyou, num_racers=6, odds=rng.uniform(1.5, 20, 6))
+            for i in range(6)
+        ]
+        collection = OddsBoardCollection.from_odds_boards([f"race{i}" for i in range(6)], odds_boards)
+        normalized = normalize_odds_board_collection(collection, OverroundMethod.shin)
+        assert normalized.probs.shape == collection.odds.shape
+        for i, board in enumerate(odds_boards):
+            expected = normalize_implied_probs(board.odds, OverroundMethod.shin)
+            start, end = collection.offsets[i], collection.offsets[i + 1]
+            assert np.allclose(normalized.probs[start:end], expected.probs)
+            assert np.isclose(normalized.effective_takeouts[i], expected.effective_takeouts[0])
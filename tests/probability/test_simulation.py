@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType
+from race_gamble_core.orders.order_index import courses_to_order_idx
+from race_gamble_core.probability.harville import calc_harville_probs
+from race_gamble_core.probability.simulation import (
+    estimate_order_probs,
+    finishing_orders_to_order_idx,
+    sample_finishing_orders,
+    simulate_hits,
+    simulate_profits,
+)
+
+WIN_PROBS = np.array(
+    [
+        [0.45, 0.2, 0.15, 0.1, 0.06, 0.04],
+        [0.1, 0.1, 0.3, 0.2, 0.2, 0.1],
+    ]
+)
+
+
+class TestSampleFinishingOrders:
+    def test_shape_and_validity(self):
+        finishing_orders = sample_finishing_orders(WIN_PROBS, num_sims=500, seed=0)
+        assert finishing_orders.shape == (500, 2, 3)
+        assert finishing_orders.min() >= 1 and finishing_orders.max() <= 6
+        # 同じレースで同じコースが2回出ない
+        assert np.all(np.diff(np.sort(finishing_orders, axis=-1), axis=-1) > 0)
+
+    def test_zero_strength_never_places(self):
+        strengths = [0.5, 0.3, 0.2, 0.0, 0.0, 0.0]
+        finishing_orders = sample_finishing_orders(strengths, num_sims=200, seed=1)
+        assert set(np.unique(finishing_orders).tolist()) == {1, 2, 3}
+
+    def test_seed(self):
+        assert np.array_equal(
+            sample_finishing_orders(WIN_PROBS, 10, seed=3), sample_finishing_orders(WIN_PROBS, 10, seed=3)
+        )
+
+    def test_invalid_strengths(self):
+        with pytest.raises(ValueError):
+            sample_finishing_orders([0.5, 0.5, 0.0, 0.0], 10)
+        with pytest.raises(ValueError):
+            sample_finishing_orders([0.5, -0.1, 0.3, 0.3], 10)
+
+
+class TestFinishingOrdersToOrderIdx:
+    @pytest.mark.parametrize("bet_type", list(BetType))
+    def test_matches_courses_to_order_idx(self, bet_type):
+        finishing_orders = sample_finishing_orders(WIN_PROBS, num_sims=50, seed=2)
+        order_idx = finishing_orders_to_order_idx(finishing_orders, bet_type)
+        num_courses = {BetType.tansyou: 1, BetType.nirentan: 2, BetType.nirenpuku: 2}.get(bet_type, 3)
+        expected = courses_to_order_idx(finishing_orders.reshape(-1, 3)[:, :num_courses], bet_type, 6)
+        assert np.array_equal(order_idx, expected.reshape(50, 2))
+
+
+class TestEstimateOrderProbs:
+    @pytest.mark.parametrize("bet_type", [BetType.tansyou, BetType.nirenpuku, BetType.sanrentan])
+    def test_converges_to_harville(self, bet_type):
+        # チャンクに分かれるように小さな上限を指定する
+        probs = estimate_order_probs(WIN_PROBS, bet_type, num_sims=40000, seed=0, max_chunk_elements=10000)
+        expected = calc_harville_probs(WIN_PROBS, bet_type)
+        assert probs.shape == expected.shape
+        assert np.allclose(probs.sum(axis=1), 1.0)
+        assert np.abs(probs - expected).max() < 0.01
+
+
+class TestSimulateHits:
+    def test_joint_hits(self):
+        # 同じレースの単勝1と3連複1-2-3が同時に的中する確率
+        sanrenpuku_idx = courses_to_order_idx([[1, 2, 3]], BetType.sanrenpuku, 6)[0]
+        hits = simulate_hits(
+            WIN_PROBS,
+            race_idx=[0, 0],
+            bet_types=[BetType.tansyou, BetType.sanrenpuku],
+            order_idx=[0, sanrenpuku_idx],
+            num_sims=40000,
+            seed=0,
+        )
+        assert hits.shape == (40000, 2)
+        sanrentan_probs = calc_harville_probs(WIN_PROBS[0], BetType.sanrentan)
+        first_courses = [[1, 2, 3], [1, 3, 2]]
+        expected = sanrentan_probs[courses_to_order_idx(first_courses, BetType.sanrentan, 6)].sum()
+        assert abs((hits[:, 0] & hits[:, 1]).mean() - expected) < 0.01
+
+    def test_invalid_book(self):
+        with pytest.raises(ValueError):
+            simulate_hits(WIN_PROBS, [2], BetType.tansyou, [0], num_sims=10)
+        with pytest.raises(ValueError):
+            simulate_hits(WIN_PROBS, [0], BetType.tansyou, [6], num_sims=10)
+        with pytest.raises(ValueError):
+            simulate_hits(WIN_PROBS, [0], ["unknown"], [0], num_sims=10)
+
+
+class TestSimulateProfits:
+    def _simulate(self, **kwargs):
+        return simulate_profits(
+            WIN_PROBS,
+            race_idx=[0, 0, 1],
+            bet_types=[BetType.tansyou, BetType.nirentan, BetType.tansyou],
+            order_idx=[0, 0, 2],
+            bet_amounts=[100, 200, 100],
+            odds=[2.0, 8.0, 3.0],
+            num_sims=3000,
+            race_groups=["day1", "day2"],
+            seed=0,
+            max_chunk_elements=1000,
+            **kwargs,
+        )
+
+    def test_profits(self):
+        simulated = self._simulate()
+        assert simulated.profits.shape == (3000, 2)
+        assert sorted(simulated.group_identifiers.tolist()) == ["day1", "day2"]
+        # day2は単勝1点なので、損益は的中時+200, ハズレ時-100のどちらか
+        day2 = simulated.group_identifiers.tolist().index("day2")
+        assert set(np.unique(simulated.profits[:, day2]).tolist()) == {-100.0, 200.0}
+        expected_mean = 100 * (2.0 * 0.45 - 1) + 200 * (8.0 * 0.45 * 0.2 / 0.55 - 1) + 100 * (3.0 * 0.3 - 1)
+        assert abs(simulated.total_profits.mean() - expected_mean) < 20
+        assert simulated.num_hits.max() <= 3
+
+    def test_reproducible_across_workers(self):
+        single = self._simulate()
+        parallel = self._simulate(num_workers=2)
+        assert np.array_equal(single.profits, parallel.profits)
+        assert np.array_equal(single.num_hits, parallel.num_hits)
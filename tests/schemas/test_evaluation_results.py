@@ -54,3 +54,203 @@ class TestEvaluationResults:
 
         assert np.isclose(eval_results.return_amount_average, 500)
         assert np.isclose(eval_results.return_amount_variance, 375000)  # 1000000+0+250000+250000/4
+
+    def test_from_arrays(self):
+        race_identifiers = np.array([f"race{i}" for i in range(10)])
+        confirmed_odds = np.array([15, 5, 2, 3, 4, 5, 6, 7, 8, 9], dtype=np.float64)
+        flag_ground_truth_orders = np.array([True, True] + [False] * 8)
+        bet_amounts = np.array([100, 100, 100, 300, 0, 0, 0, 0, 0, 0], dtype=np.int64)
+
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=race_identifiers,
+            confirmed_odds=confirmed_odds,
+            flag_ground_truth_orders=flag_ground_truth_orders,
+            bet_amounts=bet_amounts,
+        )
+        # コピーされずにそのまま保持される
+        assert results.bet_amounts is bet_amounts
+        assert results.confirmed_odds is confirmed_odds
+
+        expected = BetStrategyResults(
+            race_identifiers=race_identifiers.tolist(),
+            confirmed_odds=confirmed_odds.tolist(),
+            flag_ground_truth_orders=flag_ground_truth_orders.tolist(),
+            bet_amounts=bet_amounts.tolist(),
+        )
+        assert results.calc_statistic_results() == expected.calc_statistic_results()
+        assert results.model_dump() == expected.model_dump()
+
+    def test_from_arrays_categorical(self):
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=np.array([0, 0, 1, 2]),
+            race_categories=np.array(["raceA", "raceB", "raceC"]),
+            confirmed_odds=np.array([2.0, 3.0, 4.0, 5.0]),
+            flag_ground_truth_orders=np.array([True, False, False, False]),
+            bet_amounts=np.array([100, 100, 0, 0]),
+        )
+        assert results.model_dump()["race_identifiers"] == ["raceA", "raceA", "raceB", "raceC"]
+
+        stats = results.calc_statistic_results()
+        assert stats.num_bet_races == 1
+        assert stats.num_all_races == 3
+
+        with pytest.raises(ValueError):
+            BetStrategyResults.from_arrays(
+                race_identifiers=np.array([0, 3]),
+                race_categories=np.array(["raceA", "raceB"]),
+                confirmed_odds=np.array([2.0, 3.0]),
+                flag_ground_truth_orders=np.array([True, False]),
+                bet_amounts=np.array([100, 100]),
+            )
+
+    def test_from_arrays_invalid(self):
+        with pytest.raises(ValueError):
+            BetStrategyResults.from_arrays(
+                race_identifiers=np.array(["race0"]),
+                confirmed_odds=np.array([15.0]),
+                flag_ground_truth_orders=np.array([True]),
+                bet_amounts=np.array([110]),
+            )
+
+        with pytest.raises(ValueError):
+            BetStrategyResults.from_arrays(
+                race_identifiers=np.array(["race0", "race1"]),
+                confirmed_odds=np.array([15.0]),
+                flag_ground_truth_orders=np.array([True]),
+                bet_amounts=np.array([100]),
+            )
+
+    def test_calc_statistic_results_matches_loop(self):
+        # Pythonループでの素朴な計算結果と一致することを確認する
+        rng = np.random.default_rng(0)
+        num_records = 2000
+        race_identifiers = [f"race{i}" for i in rng.integers(0, 300, num_records)]
+        confirmed_odds = (rng.integers(4, 400, num_records) / 4).tolist()
+        flag_ground_truth_orders = (rng.random(num_records) < 0.2).tolist()
+        bet_amounts = (rng.integers(0, 3, num_records) * 100).tolist()
+
+        results = BetStrategyResults(
+            race_identifiers=race_identifiers,
+            confirmed_odds=confirmed_odds,
+            flag_ground_truth_orders=flag_ground_truth_orders,
+            bet_amounts=bet_amounts,
+        ).calc_statistic_results()
+
+        list_return_amount = [
+            bet_amount * odds if hit else 0
+            for bet_amount, odds, hit in zip(bet_amounts, confirmed_odds, flag_ground_truth_orders)
+            if bet_amount > 0
+        ]
+        assert results.num_bet_races == len({r for r, b in zip(race_identifiers, bet_amounts) if b > 0})
+        assert results.num_all_races == len(set(race_identifiers))
+        assert results.num_bets == len(list_return_amount)
+        assert results.num_tekityu == sum(1 for r in list_return_amount if r > 0)
+        assert results.total_return_amount == int(sum(list_return_amount))
+        assert results.total_bet_amount == sum(bet_amounts)
+        assert results.return_amount_average == float(np.mean(list_return_amount))
+        assert results.return_amount_variance == float(np.var(list_return_amount))
+        assert results.return_amount_std == float(np.std(list_return_amount))
+
+    def test_calc_statistic_results_no_bets(self):
+        eval_results = BetStrategyResults(
+            race_identifiers=["race0", "race1"],
+            confirmed_odds=[1.5, 2.0],
+            flag_ground_truth_orders=[True, False],
+            bet_amounts=[0, 0],
+        ).calc_statistic_results()
+
+        assert eval_results.num_bets == 0
+        assert eval_results.num_bet_races == 0
+        assert eval_results.num_all_races == 2
+        assert eval_results.total_roi == 0
+        assert eval_results.sharp_ratio == 0
+
+    def test_calc_statistic_results_nan_odds_on_miss(self):
+        # 払い戻しデータでは外れの買い目のオッズがNaNのことがあるが、払い戻しは0として扱う
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=np.array(["race0", "race0", "race1", "race2"]),
+            confirmed_odds=np.array([3.0, np.nan, np.inf, 2.5]),
+            flag_ground_truth_orders=np.array([True, False, False, True]),
+            bet_amounts=np.array([100, 200, 100, 100]),
+        )
+
+        eval_results = results.calc_statistic_results()
+        assert eval_results.total_return_amount == 550
+        assert eval_results.total_profit == 50
+        assert np.isclose(eval_results.return_amount_average, 137.5)
+
+        by_race = results.calc_statistic_results_by(np.array(["a", "a", "b", "b"]))
+        assert by_race["a"].total_return_amount == 300
+        assert by_race["b"].total_return_amount == 250
+        assert np.isfinite(by_race["b"].return_amount_variance)
+
+    def test_total_return_amount_rounding(self):
+        # 100 * 2.3 = 229.99999999999997 は、1/10000円単位に丸めて合計するので230円になる
+        # (floatのまま合計して切り捨てていた以前の計算では229円だった)
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=np.array(["race0", "race1", "race2"]),
+            confirmed_odds=np.array([2.3, 1.1, 5.0]),
+            flag_ground_truth_orders=np.array([True, True, False]),
+            bet_amounts=np.array([100, 300, 100]),
+        )
+        assert int(100 * 2.3) == 229
+
+        eval_results = results.calc_statistic_results()
+        assert eval_results.total_return_amount == 560
+        assert eval_results.total_profit == 60
+
+        by_race = results.calc_statistic_results_by(np.array(["a", "b", "b"]))
+        assert by_race["a"].total_return_amount == 230
+        assert by_race["b"].total_return_amount == 330
+
+    def test_calc_statistic_results_by(self):
+        rng = np.random.default_rng(1)
+        num_records = 3000
+        race_identifiers = np.array([f"race{i}" for i in rng.integers(0, 400, num_records)])
+        venues = np.array(["kiryu", "toda", "edogawa"])[rng.integers(0, 3, num_records)]
+        months = rng.integers(1, 4, num_records)
+        confirmed_odds = rng.integers(4, 400, num_records) / 4
+        flag_ground_truth_orders = rng.random(num_records) < 0.2
+        bet_amounts = rng.integers(0, 3, num_records) * 100
+
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=race_identifiers,
+            confirmed_odds=confirmed_odds,
+            flag_ground_truth_orders=flag_ground_truth_orders,
+            bet_amounts=bet_amounts,
+        )
+
+        by_venue = results.calc_statistic_results_by(venues)
+        assert set(by_venue) == {"kiryu", "toda", "edogawa"}
+
+        by_venue_month = results.calc_statistic_results_by([venues, months])
+        assert len(by_venue_month) == 9
+
+        for (venue, month), grouped in by_venue_month.items():
+            mask = (venues == venue) & (months == month)
+            expected = BetStrategyResults.from_arrays(
+                race_identifiers=race_identifiers[mask],
+                confirmed_odds=confirmed_odds[mask],
+                flag_ground_truth_orders=flag_ground_truth_orders[mask],
+                bet_amounts=bet_amounts[mask],
+            ).calc_statistic_results()
+
+            for field in ["num_bet_races", "num_all_races", "num_bets", "num_tekityu"]:
+                assert getattr(grouped, field) == getattr(expected, field)
+            for field in ["total_bet_amount", "total_return_amount", "total_profit"]:
+                assert getattr(grouped, field) == getattr(expected, field)
+            float_fields = [
+                "tekityu_rate", "total_roi", "return_amount_average", "return_amount_variance", "sharp_ratio"
+            ]
+            for field in float_fields:
+                assert np.isclose(getattr(grouped, field), getattr(expected, field))
+
+    def test_calc_statistic_results_by_invalid_length(self):
+        results = BetStrategyResults(
+            race_identifiers=["race0", "race1"],
+            confirmed_odds=[1.5, 2.0],
+            flag_ground_truth_orders=[True, False],
+            bet_amounts=[100, 0],
+        )
+        with pytest.raises(ValueError):
+            results.calc_statistic_results_by(["a"])
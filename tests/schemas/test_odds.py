@@ -6,6 +6,12 @@ class TestOdds:
     def test_construct(self):
         _ = Odds(order=Order(first_course=1, second_course=2, bet_type=BetType.nirentan), odds=1.4)
 
+    def test_construct_trusted(self):
+        order = Order(first_course=1, second_course=2, bet_type=BetType.nirentan)
+        trusted = Odds.construct_trusted(order, 1.4)
+        assert trusted == Odds(order=order, odds=1.4)
+        assert trusted.model_dump() == {"order": "1-2", "odds": 1.4}
+
     def test_invalid_odds(self):
         with pytest.raises(ValueError):
             _ = Odds(order=Order(first_course=1, second_course=2, bet_type=BetType.nirentan), odds=-1)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType, Odds, OddsBoard, Order
+from race_gamble_core.schemas.odds_board import calc_expected_rois, convert_odds_to_probs
+
+
+class TestOddsBoard:
+    def test_construct(self):
+        board = OddsBoard(bet_type=BetType.nirentan, num_racers=6, odds=np.linspace(1.5, 100, 30))
+        assert len(board) == 30
+
+        with pytest.raises(ValueError):
+            OddsBoard(bet_type=BetType.nirentan, num_racers=6, odds=np.ones(29))
+        with pytest.raises(ValueError):
+            OddsBoard(bet_type=BetType.nirentan, num_racers=6, odds=-np.ones(30))
+
+    def test_odds_list_round_trip(self):
+        list_odds = [
+            Odds(order=Order(first_course=1, second_course=2, bet_type=BetType.nirenpuku), odds=3.5),
+            Odds(order=Order(first_course=6, second_course=5, bet_type=BetType.nirenpuku), odds=120.0),
+        ]
+        board = OddsBoard.from_odds_list(list_odds, num_racers=6)
+        assert board.bet_type == BetType.nirenpuku
+        assert board.odds[0] == 3.5
+        assert board.odds[14] == 120.0
+        assert np.count_nonzero(board.odds) == 2
+        assert board.get_odds(Order(first_course=5, second_course=6, bet_type=BetType.nirenpuku)) == 120.0
+
+        round_trip = board.to_odds_list()
+        assert len(round_trip) == 15
+        assert round_trip[0] == list_odds[0]
+        assert round_trip[14] == list_odds[1]
+
+        with pytest.raises(ValueError):
+            OddsBoard.from_odds_list(list_odds + [list_odds[0]], num_racers=6)
+
+    def test_odds_to_probs(self):
+        board = OddsBoard(bet_type=BetType.tansyou, num_racers=3, odds=[1.5, 0.0, 3.0])
+        np.testing.assert_allclose(board.odds_to_probs(), [0.5, 0.0, 0.25])
+        for odds, prob in zip(board.odds, board.odds_to_probs()):
+            assert np.isclose(Odds.convert_odds_value_to_prob(odds), prob)
+
+        with pytest.raises(ValueError):
+            convert_odds_to_probs([0.5])
+
+    def test_expected_rois_and_top_k(self):
+        board = OddsBoard(bet_type=BetType.tansyou, num_racers=4, odds=[1.5, 10.0, 0.0, 4.0])
+        estimated_probs = np.array([0.5, 0.15, 0.2, 0.15])
+        np.testing.assert_allclose(board.get_expected_rois(estimated_probs), [-0.25, 0.5, -1.0, -0.4])
+        np.testing.assert_allclose(
+            calc_expected_rois(board.odds, estimated_probs), board.get_expected_rois(estimated_probs)
+        )
+
+        np.testing.assert_array_equal(board.get_top_k_order_idx(estimated_probs, k=2), [1, 0])
+        # オッズ0の買い目は選ばれない
+        np.testing.assert_array_equal(board.get_top_k_order_idx(estimated_probs, k=10), [1, 0, 3])
+
+    def test_batch_conversion(self):
+        odds = np.array([[1.5, 3.0], [0.0, 7.5]])
+        np.testing.assert_allclose(convert_odds_to_probs(odds), [[0.5, 0.25], [0.0, 0.1]])
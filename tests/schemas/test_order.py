@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from race_gamble_core import BetType, Order
@@ -195,3 +196,116 @@ class TestBaseOrder:
         assert o == Order(
             first_course=6, second_course=5, third_course=4, bet_type=BetType.sanrentan
         )
+
+    def test_hash(self):
+        o1 = Order(first_course=6, second_course=1, bet_type=BetType.nirenpuku)
+        o2 = Order(first_course=1, second_course=6, bet_type=BetType.nirenpuku)
+        assert o1 == o2
+        assert hash(o1) == hash(o2)
+        assert len({o1, o2}) == 1
+
+        # 券種が異なれば同じコースでも別の着順として扱う
+        assert Order(first_course=1, second_course=2, bet_type=BetType.nirentan) != Order(
+            first_course=1, second_course=2, bet_type=BetType.nirenpuku
+        )
+
+    def test_lt_numeric(self):
+        # コース番号は数値として比較される
+        assert Order(first_course=1, second_course=2, bet_type=BetType.nirentan) < Order(
+            first_course=1, second_course=10, bet_type=BetType.nirentan
+        )
+        assert Order(first_course=9, bet_type=BetType.tansyou) < Order(first_course=10, bet_type=BetType.tansyou)
+
+    def test_lt_not_order(self):
+        with pytest.raises(TypeError):
+            _ = Order(first_course=1, bet_type=BetType.tansyou) < 1
+
+    def test_model_copy_updates_code(self):
+        o = Order(first_course=1, second_course=2, bet_type=BetType.nirentan).model_copy(update={"first_course": 3})
+        expected = Order(first_course=3, second_course=2, bet_type=BetType.nirentan)
+        assert str(o) == "3-2"
+        assert o.get_first_course() == 3
+        assert o == expected
+        assert hash(o) == hash(expected)
+
+    def test_invalid_course_number(self):
+        with pytest.raises(ValueError):
+            Order(first_course=0, bet_type=BetType.tansyou)
+        with pytest.raises(ValueError):
+            Order(first_course=256, bet_type=BetType.tansyou)
+
+    def test_create_from_str_order_interned(self):
+        o1 = Order.create_from_str_order("1-2-3", bet_type=BetType.sanrentan)
+        o2 = Order.create_from_str_order("1-2-3", bet_type=BetType.sanrentan)
+        assert o1 is o2
+
+        # 連複系はコースを渡された順のまま保持し、同じ組み合わせであれば等しい
+        o3 = Order.create_from_str_order("3-1-2", bet_type=BetType.sanrenpuku)
+        o4 = Order.create_from_str_order("1-2-3", bet_type=BetType.sanrenpuku)
+        assert o3 is Order.create_from_str_order("3-1-2", bet_type=BetType.sanrenpuku)
+        assert (o3.first_course, o3.second_course, o3.third_course) == (3, 1, 2)
+        assert o3 == o4
+        assert hash(o3) == hash(o4)
+        assert str(o3) == "1-2-3"
+        assert Order.intern(BetType.nirenpuku, 3, 1).first_course == 3
+
+        assert o1 is not o4
+
+        with pytest.raises(ValueError):
+            Order.create_from_str_order("1-2", bet_type=BetType.sanrentan)
+        with pytest.raises(ValueError):
+            Order.create_from_str_order("1-2-3-4", bet_type=BetType.sanrentan)
+
+    def test_interned_orders_bounded(self, monkeypatch):
+        import race_gamble_core.schemas.order as order_module
+
+        # 上限に達した後はキャッシュせずに新しいインスタンスを返す
+        monkeypatch.setattr(order_module, "_INTERNED_ORDERS", {})
+        monkeypatch.setattr(order_module, "_MAX_INTERNED_ORDERS", 2)
+        orders = [Order.intern(BetType.nirentan, i, 6) for i in range(1, 6)]
+        assert len(order_module._INTERNED_ORDERS) == 2
+        assert Order.intern(BetType.nirentan, 1, 6) is orders[0]
+        assert Order.intern(BetType.nirentan, 5, 6) is not orders[4]
+        assert Order.intern(BetType.nirentan, 5, 6) == orders[4]
+
+    def test_create_rentan_orders_from_renpuku_invalid(self):
+        # 連単は昇順のコースの並べ替えの順で返す
+        orders = Order.create_rentan_orders_from_renpuku("3-1")
+        assert [str(o) for o in orders] == ["1-3", "3-1"]
+
+        for order_str in ["1", "1-1", "0-2", "1-2-2", "a-b", "1-2-3-4"]:
+            with pytest.raises(ValueError):
+                Order.create_rentan_orders_from_renpuku(order_str)
+
+    def test_construct_trusted(self):
+        validated = Order(first_course=3, second_course=1, third_course=2, bet_type=BetType.sanrenpuku)
+        trusted = Order.construct_trusted(BetType.sanrenpuku, 3, 1, 2)
+        assert trusted == validated
+        assert hash(trusted) == hash(validated)
+        assert str(trusted) == "1-2-3"
+        assert trusted.model_dump() == validated.model_dump()
+        assert repr(trusted) == repr(validated)
+
+        # internと同じ共有インスタンスを返す
+        o = Order.construct_interned_trusted(BetType.sanrentan, 4, 5, 6)
+        assert o is Order.intern(BetType.sanrentan, 4, 5, 6)
+        assert Order.idx_to_order(0, bet_type=BetType.nirentan) is Order.intern(BetType.nirentan, 1, 2)
+
+    def test_get_all_order_patterns(self):
+        for bet_type in BetType:
+            for num_racers in [3, 6, 12]:
+                orders = Order.get_all_order_patterns(bet_type, num_racers)
+                assert isinstance(orders, tuple)
+                assert list(orders) == sorted(set(orders))
+                assert [o.to_order_idx(num_racers=num_racers) for o in orders] == list(range(len(orders)))
+                # キャッシュされた同じタプルを返す
+                assert Order.get_all_order_patterns(bet_type, num_racers) is orders
+                assert list(Order.iter_order_patterns(bet_type, num_racers)) == list(orders)
+
+                courses = Order.get_all_order_patterns(bet_type, num_racers, as_array=True)
+                assert courses.dtype == np.int8
+                assert [tuple(c) for c in courses.tolist()] == [o.get_courses() for o in orders]
+
+        # 出走数が10以上の場合は、文字列のソート順ではなくコース番号の数値順
+        orders = Order.get_all_order_patterns(BetType.nirentan, 10)
+        assert [str(o) for o in orders[:10]] == ["1-2", "1-3", "1-4", "1-5", "1-6", "1-7", "1-8", "1-9", "1-10", "2-1"]
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from race_gamble_core.staking.kelly import KellyMethod, allocate_kelly_stakes, calc_kelly_fractions
+
+
+def _expected_log_wealth(fractions, probs, odds):
+    # 排反な買い目に割合fractionsを賭けたときの対数資産の期待値(いずれも的中しない確率も含む)
+    remaining = 1 - fractions.sum()
+    wealths = remaining + fractions * odds
+    return np.sum(probs * np.log(wealths)) + (1 - probs.sum()) * np.log(remaining)
+
+
+def _make_boards(num_races: int = 200, num_combinations: int = 30, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    probs = rng.dirichlet(np.full(num_combinations, 0.7), num_races)
+    # 市場の確率は推定確率にノイズを加えたものとし、控除率25%のオッズにする
+    market_probs = probs * rng.lognormal(0, 0.4, probs.shape)
+    market_probs /= market_probs.sum(axis=1, keepdims=True)
+    odds = np.floor(0.75 / market_probs * 10) / 10
+    odds[rng.random(odds.shape) < 0.05] = 0.0
+    return probs, odds
+
+
+class TestCalcKellyFractions:
+    def test_single_outcome(self):
+        # p=0.6, オッズ2倍の単独の賭けのKelly基準は0.2
+        fractions = calc_kelly_fractions([0.6, 0.4], [2.0, 0.0])
+        assert np.allclose(fractions, [0.2, 0.0])
+        fractions = calc_kelly_fractions([0.6, 0.4], [2.0, 0.0], KellyMethod.independent)
+        assert np.allclose(fractions, [0.2, 0.0])
+
+    def test_simultaneous_is_optimal(self):
+        probs, odds = _make_boards(num_races=30)
+        fractions = calc_kelly_fractions(probs, odds)
+        rng = np.random.default_rng(1)
+        for race in range(30):
+            assert fractions[race].sum() < 1
+            best = _expected_log_wealth(fractions[race], probs[race], odds[race])
+            assert best >= -1e-12  # 何も買わない(対数資産0)以上
+            flag_valid = odds[race] > 1
+            for _ in range(20):
+                perturbed = np.maximum(fractions[race] + rng.normal(0, 0.002, probs.shape[1]) * flag_valid, 0)
+                if perturbed.sum() < 1:
+                    assert _expected_log_wealth(perturbed, probs[race], odds[race]) <= best + 1e-12
+
+    def test_no_value(self):
+        # 全ての買い目の期待値が1以下なら買わない
+        probs = np.array([[0.5, 0.3, 0.2]])
+        odds = 0.75 / probs
+        assert np.all(calc_kelly_fractions(probs, odds) == 0)
+        assert np.all(calc_kelly_fractions(probs, odds, KellyMethod.independent) == 0)
+
+    def test_independent_capped_per_race(self):
+        probs, odds = _make_boards()
+        fractions = calc_kelly_fractions(probs, odds, KellyMethod.independent)
+        assert np.all(fractions.sum(axis=1) <= 1 + 1e-12)
+        assert np.all(fractions[odds <= 1] == 0)
+
+    def test_invalid_inputs(self):
+        with pytest.raises(ValueError):
+            calc_kelly_fractions([0.5, 0.5], [2.0])
+        with pytest.raises(ValueError):
+            calc_kelly_fractions([1.5, 0.5], [2.0, 2.0])
+
+
+class TestAllocateKellyStakes:
+    def test_unit_and_caps(self):
+        probs, odds = _make_boards(num_races=500)
+        allocation = allocate_kelly_stakes(
+            probs,
+            odds,
+            bankroll=100000,
+            kelly_fraction=0.5,
+            budget=300000,
+            max_race_amount=5000,
+            max_bet_amount=2000,
+        )
+        bet_amounts = allocation.bet_amounts
+        assert bet_amounts.shape == probs.shape and bet_amounts.dtype == np.int64
+        assert np.all(bet_amounts % 100 == 0)
+        assert bet_amounts.max() <= 2000
+        assert bet_amounts.sum(axis=1).max() <= 5000
+        assert allocation.total_bet_amount <= 300000
+        assert np.all(bet_amounts[odds <= 1] == 0)
+        assert np.allclose(allocation.fractions, calc_kelly_fractions(probs, odds) * 0.5)
+
+    def test_caps_with_rounding_up(self):
+        # 小さな値を足して切り上がった分も、買い目・レースの上限と予算を超えない
+        probs = np.array([[0.5, 0.5], [0.5, 0.5]])
+        odds = np.array([[3.0, 3.0], [3.0, 3.0]])
+        allocation = allocate_kelly_stakes(probs, odds, bankroll=1000, max_bet_amount=199.9999999999)
+        assert allocation.bet_amounts.max() == 100
+
+        allocation = allocate_kelly_stakes(probs, odds, bankroll=1000, max_race_amount=399.9999999999)
+        assert allocation.bet_amounts.sum(axis=1).tolist() == [300, 300]
+
+        allocation = allocate_kelly_stakes(probs, odds, bankroll=1000, budget=799.9999999999)
+        assert allocation.total_bet_amount == 700
+
+    def test_without_caps(self):
+        probs, odds = _make_boards(num_races=50)
+        bankrolls = np.linspace(10000, 100000, 50)
+        allocation = allocate_kelly_stakes(probs, odds, bankroll=bankrolls, method=KellyMethod.independent)
+        expected = np.floor(allocation.fractions * bankrolls[:, np.newaxis] / 100) * 100
+        assert np.abs(allocation.bet_amounts - expected).max() <= 100
+
+    def test_single_race(self):
+        allocation = allocate_kelly_stakes([0.6, 0.4], [2.0, 0.0], bankroll=10050)
+        assert allocation.bet_amounts.tolist() == [2000, 0]
+
+    def test_batch(self):
+        # 1回の呼び出しで1万レースの3連単を配分できる
+        probs, odds = _make_boards(num_races=10000, num_combinations=120)
+        allocation = allocate_kelly_stakes(probs, odds, bankroll=100000, kelly_fraction=0.25, budget=1_000_000)
+        assert allocation.bet_amounts.shape == (10000, 120)
+        assert allocation.total_bet_amount <= 1_000_000
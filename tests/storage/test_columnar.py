@@ -0,0 +1,110 @@
+import json
+
+import numpy as np
+import pytest
+
+from race_gamble_core import BetStrategyResults, BetType, OddsBoard
+from race_gamble_core.schemas.odds_board_collection import OddsBoardCollection
+from race_gamble_core.storage.columnar import (
+    load_bet_strategy_results,
+    load_odds_boards,
+    save_bet_strategy_results,
+    save_odds_boards,
+)
+
+
+class TestColumnar:
+    def test_bet_strategy_results_round_trip(self, tmp_path):
+        rng = np.random.default_rng(0)
+        num_rows = 1000
+        race_identifiers = np.array([f"race_{i}" for i in rng.integers(0, 50, num_rows)])
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=race_identifiers,
+            confirmed_odds=rng.uniform(1, 100, num_rows),
+            flag_ground_truth_orders=rng.random(num_rows) < 0.1,
+            bet_amounts=rng.integers(0, 3, num_rows) * 100,
+        )
+        save_bet_strategy_results(results, tmp_path / "results")
+
+        loaded = load_bet_strategy_results(tmp_path / "results")
+        # memmapをコピーせずにバッキングストアにしている
+        assert isinstance(loaded.confirmed_odds.base, np.memmap)
+        assert loaded.calc_statistic_results() == results.calc_statistic_results()
+        assert loaded.model_dump() == results.model_dump()
+
+        meta = json.loads((tmp_path / "results" / "meta.json").read_text())
+        assert meta["schema_version"] == 1
+        assert meta["num_rows"] == num_rows
+
+        # 上書きしない場合は既存のディレクトリがあればエラー
+        with pytest.raises(FileExistsError):
+            save_bet_strategy_results(results, tmp_path / "results")
+        save_bet_strategy_results(results, tmp_path / "results", overwrite=True)
+
+        # 種類が違うディレクトリは読み込めない
+        with pytest.raises(ValueError):
+            load_odds_boards(tmp_path / "results")
+
+    def test_overwrite_interrupted(self, tmp_path, monkeypatch):
+        results = BetStrategyResults.from_arrays(
+            race_identifiers=np.array([0, 0, 1]),
+            confirmed_odds=np.array([1.5, 2.0, 3.0]),
+            flag_ground_truth_orders=np.array([True, False, False]),
+            bet_amounts=np.array([100, 0, 200]),
+        )
+        save_bet_strategy_results(results, tmp_path / "results")
+
+        # 列の書き込み途中で失敗した場合、古いmeta.jsonは残らず、ディレクトリは読み込めない
+        def failing_save(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(np, "save", failing_save)
+        with pytest.raises(OSError):
+            save_bet_strategy_results(results, tmp_path / "results", overwrite=True)
+        monkeypatch.undo()
+        with pytest.raises(FileNotFoundError):
+            load_bet_strategy_results(tmp_path / "results")
+
+        save_bet_strategy_results(results, tmp_path / "results", overwrite=True)
+        assert load_bet_strategy_results(tmp_path / "results").model_dump() == results.model_dump()
+        assert sorted(p.name for p in (tmp_path / "results").iterdir() if not p.name.endswith(".npy")) == ["meta.json"]
+
+    def test_list_results_round_trip(self, tmp_path):
+        results = BetStrategyResults(
+            race_identifiers=["a", "a", "b"],
+            confirmed_odds=[1.5, 2.0, 3.0],
+            flag_ground_truth_orders=[True, False, False],
+            bet_amounts=[100, 0, 200],
+        )
+        save_bet_strategy_results(results, tmp_path / "results")
+        loaded = load_bet_strategy_results(tmp_path / "results", mmap=False, validate=True)
+        assert loaded.model_dump() == results.model_dump()
+
+    def test_odds_boards_round_trip(self, tmp_path):
+        rng = np.random.default_rng(0)
+        boards = [
+            OddsBoard(bet_type=BetType.sanrentan, num_racers=6, odds=rng.uniform(1, 500, 120)),
+            OddsBoard(bet_type=BetType.nirenpuku, num_racers=6, odds=rng.uniform(1, 50, 15)),
+            OddsBoard(bet_type=BetType.tansyou, num_racers=12, odds=rng.uniform(1, 20, 12)),
+        ]
+        collection = OddsBoardCollection.from_odds_boards(["r1", "r1", "r2"], boards)
+        save_odds_boards(collection, tmp_path / "boards")
+
+        loaded = load_odds_boards(tmp_path / "boards")
+        assert len(loaded) == 3
+        assert loaded.race_identifiers.tolist() == ["r1", "r1", "r2"]
+        for board, loaded_board in zip(boards, [loaded[0], loaded[1], loaded[-1]]):
+            assert loaded_board.bet_type == board.bet_type
+            assert loaded_board.num_racers == board.num_racers
+            np.testing.assert_array_equal(loaded_board.odds, board.odds)
+        with pytest.raises(IndexError):
+            loaded[3]
+
+    def test_schema_version(self, tmp_path):
+        save_odds_boards(OddsBoardCollection.from_odds_boards([], []), tmp_path / "boards")
+        meta_path = tmp_path / "boards" / "meta.json"
+        meta = json.loads(meta_path.read_text())
+        meta["schema_version"] = 999
+        meta_path.write_text(json.dumps(meta))
+        with pytest.raises(ValueError):
+            load_odds_boards(tmp_path / "boards")
@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from race_gamble_core import BetType
+from race_gamble_core.storage import odds_timeseries
+from race_gamble_core.storage.odds_timeseries import OddsTimeSeriesStore
+
+
+def _make_store(path, max_segment_records=4):
+    return OddsTimeSeriesStore(path, bet_type=BetType.nirenpuku, num_racers=6, max_segment_records=max_segment_records)
+
+
+class TestOddsTimeSeriesStore:
+    def test_append_and_query(self, tmp_path):
+        rng = np.random.default_rng(0)
+        odds = rng.uniform(1, 100, (10, 15))
+        race_identifiers = ["r1", "r2"] * 5
+        timestamps = np.arange(10) * 10
+
+        with _make_store(tmp_path / "store") as store:
+            store.append_many(race_identifiers[:7], timestamps[:7], odds[:7])
+            for i in range(7, 10):
+                store.append(race_identifiers[i], int(timestamps[i]), odds[i])
+            assert store.num_snapshots == 10
+
+            snapshots = store.get_snapshots("r2")
+            np.testing.assert_array_equal(snapshots.timestamps, [10, 30, 50, 70, 90])
+            np.testing.assert_array_equal(snapshots.odds, odds[1::2])
+            assert snapshots.race_identifiers.tolist() == ["r2"] * 5
+            assert len(store.get_snapshots("unknown")) == 0
+
+            trajectory = store.get_trajectory("r1", 3)
+            np.testing.assert_array_equal(trajectory.odds, odds[::2, 3])
+
+            latest = store.get_latest_before(55)
+            assert latest.race_identifiers.tolist() == ["r1", "r2"]
+            np.testing.assert_array_equal(latest.timestamps, [40, 50])
+            np.testing.assert_array_equal(latest.odds, odds[[4, 5]])
+
+        # 開き直しても同じ内容が読める
+        with OddsTimeSeriesStore(tmp_path / "store") as store:
+            assert store.bet_type == BetType.nirenpuku
+            np.testing.assert_array_equal(store.get_snapshots("r1").odds, odds[::2])
+
+    def test_compact(self, tmp_path):
+        odds = np.arange(5 * 15, dtype=np.float64).reshape(5, 15)
+        with _make_store(tmp_path) as store:
+            # 時刻順ではない追記と、同じ時刻の重複を含む
+            store.append_many(["r1", "r1", "r2", "r1", "r1"], [30, 10, 10, 20, 10], odds)
+            store.compact()
+            assert store.num_snapshots == 4
+            assert len(list(tmp_path.glob("segment_*.bin"))) == 1
+
+            snapshots = store.get_snapshots("r1")
+            np.testing.assert_array_equal(snapshots.timestamps, [10, 20, 30])
+            # 同じ時刻のスナップショットは最後に追記したものが残る
+            np.testing.assert_array_equal(snapshots.odds, odds[[4, 3, 0]])
+
+            store.append("r2", 20, odds[0])
+            np.testing.assert_array_equal(store.get_snapshots("r2").timestamps, [10, 20])
+
+    def test_datetime_timestamps(self, tmp_path):
+        with _make_store(tmp_path) as store:
+            t = np.datetime64("2025-01-01T10:00:00")
+            store.append("r1", t, np.ones(15))
+            assert store.get_snapshots("r1").timestamps[0] == t.astype("datetime64[ns]").astype(np.int64)
+            assert len(store.get_latest_before(t - np.timedelta64(1, "s"))) == 0
+
+    def test_invalid(self, tmp_path):
+        with pytest.raises(ValueError):
+            OddsTimeSeriesStore(tmp_path / "new")
+        with _make_store(tmp_path) as store:
+            with pytest.raises(ValueError):
+                store.append("r1", 0, np.ones(14))
+            with pytest.raises(ValueError):
+                store.append("r1", 0, -np.ones(15))
+        with pytest.raises(ValueError):
+            OddsTimeSeriesStore(tmp_path, bet_type=BetType.sanrentan)
+
+    def test_interleaved_append_and_query(self, tmp_path, monkeypatch):
+        # 追記と検索を交互に行い、インデックスの末尾のマージを挟んでも素朴な計算と一致する
+        monkeypatch.setattr(odds_timeseries, "_MIN_INDEX_TAIL_SIZE", 8)
+        rng = np.random.default_rng(1)
+        num_snapshots = 300
+        race_identifiers = np.array([f"r{i}" for i in rng.integers(0, 12, num_snapshots)])
+        timestamps = rng.integers(0, 50, num_snapshots)
+        odds = rng.uniform(1, 100, (num_snapshots, 15))
+
+        with _make_store(tmp_path, max_segment_records=16) as store:
+            start = 0
+            for size in rng.integers(1, 20, 100).tolist():
+                chunk = slice(start, start + size)
+                store.append_many(race_identifiers[chunk], timestamps[chunk], odds[chunk])
+                start += size
+                if start >= num_snapshots:
+                    break
+                race_identifier = race_identifiers[rng.integers(0, start)]
+                expected = np.flatnonzero(race_identifiers[:start] == race_identifier)
+                expected = expected[np.argsort(timestamps[expected], kind="stable")]
+                snapshots = store.get_snapshots(race_identifier)
+                np.testing.assert_array_equal(snapshots.timestamps, timestamps[expected])
+                np.testing.assert_array_equal(snapshots.odds, odds[expected])
+
+            latest = store.get_latest_before(25)
+            for race_identifier, timestamp, board in zip(latest.race_identifiers, latest.timestamps, latest.odds):
+                candidates = np.flatnonzero((race_identifiers == race_identifier) & (timestamps <= 25))
+                expected = candidates[timestamps[candidates] == timestamps[candidates].max()][-1]
+                assert timestamp == timestamps[expected]
+                np.testing.assert_array_equal(board, odds[expected])
+
+    def test_recover_index(self, tmp_path):
+        odds = np.arange(6 * 15, dtype=np.float64).reshape(6, 15)
+        with _make_store(tmp_path) as store:
+            store.append_many(["r1", "r2", "r1", "r2", "r1", "r2"], np.arange(6), odds)
+            index_path = tmp_path / store._meta["index"]
+            segment_path = tmp_path / store._meta["segments"][-1]
+            entry_size = odds_timeseries._INDEX_DTYPE.itemsize
+
+        # インデックスの書き出し前に終了した場合は、セグメントから補修する
+        with open(index_path, "r+b") as f:
+            f.truncate(3 * entry_size)
+        with OddsTimeSeriesStore(tmp_path) as store:
+            np.testing.assert_array_equal(store.get_snapshots("r1").odds, odds[[0, 2, 4]])
+        assert index_path.stat().st_size == 6 * entry_size
+
+        # セグメントの書き出し前に終了した場合は、レコードのないインデックスを切り詰める
+        with open(segment_path, "r+b") as f:
+            f.truncate(f.seek(0, 2) - store.record_dtype.itemsize + 1)
+        with open(tmp_path / "races.txt", "a") as f:
+            f.write("r3-incomplete")
+        with OddsTimeSeriesStore(tmp_path) as store:
+            assert store.num_snapshots == 5
+            np.testing.assert_array_equal(store.get_snapshots("r2").odds, odds[[1, 3]])
+            store.append("r3", 10, odds[0])
+            assert len(store.get_snapshots("r3")) == 1
+        assert (tmp_path / "races.txt").read_text().splitlines() == ["r1", "r2", "r3"]
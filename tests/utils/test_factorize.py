@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from race_gamble_core.utils.factorize import factorize, factorize_group_keys, factorize_multi
+
+
+class TestFactorize:
+    @pytest.mark.parametrize(
+        "values",
+        [
+            np.array([5, 3, 5, 10, 3]),
+            np.array([10**15, 3, 10**15, -(10**12)]),
+            np.array(["b", "a", "b", "c"]),
+            np.array(["a", "a", "b", "b", "b", "c"]),  # 同じ値が連続しているケース
+            np.array(["a", "a", "b", "b", "a", "a"]),  # 同じ値が離れて再登場するケース
+            np.array(["202401010101", "202401010102", "202401010101", "2024010101"]),  # 8バイトを超える文字列
+            np.array(["桐生01", "戸田01", "桐生01", "桐生02"]),  # 1バイトに収まらない文字
+            np.array([b"kiryu", b"toda", b"kiryu"]),
+            np.array([1.5, 0.5, 1.5]),
+        ],
+    )
+    def test_factorize(self, values):
+        codes, uniques = factorize(values)
+        assert codes.shape == values.shape
+        assert uniques.size == np.unique(values).size
+        np.testing.assert_array_equal(uniques[codes], values)
+
+    @pytest.mark.parametrize(
+        "hash_words",
+        [
+            lambda words: words[0] >> np.uint64(32),  # 上位ビットだけが衝突するハッシュ
+            lambda words: words[0] % np.uint64(3),  # 64bit全体が衝突するハッシュ
+        ],
+    )
+    def test_factorize_string_hash_collisions(self, monkeypatch, hash_words):
+        # ハッシュが衝突しても、値ごとに異なるコードが割り当てられる
+        import race_gamble_core.utils.factorize as factorize_module
+
+        monkeypatch.setattr(factorize_module, "_hash_words", hash_words)
+        rng = np.random.default_rng(0)
+        values = np.array([f"race{i}" for i in rng.integers(0, 20, 200)])
+        for arr in [values, np.sort(values)]:
+            codes, uniques = factorize(arr)
+            assert uniques.size == np.unique(arr).size
+            np.testing.assert_array_equal(uniques[codes], arr)
+
+    def test_factorize_empty(self):
+        codes, uniques = factorize(np.array([], dtype=np.int64))
+        assert codes.size == 0
+        assert uniques.size == 0
+
+    def test_factorize_invalid_dim(self):
+        with pytest.raises(ValueError):
+            factorize(np.zeros((2, 2)))
+
+    def test_factorize_multi(self):
+        venues = np.array(["kiryu", "toda", "kiryu", "toda", "kiryu"])
+        months = np.array([1, 1, 1, 2, 2])
+        codes, uniques = factorize_multi(venues, months)
+
+        assert codes.max() + 1 == 4
+        np.testing.assert_array_equal(uniques[0][codes], venues)
+        np.testing.assert_array_equal(uniques[1][codes], months)
+
+        with pytest.raises(ValueError):
+            factorize_multi(venues, months[:2])
+
+    def test_factorize_group_keys(self):
+        venues = np.array(["kiryu", "toda", "kiryu", "toda", "kiryu"])
+        months = np.array([1, 1, 1, 2, 2])
+
+        codes, keys = factorize_group_keys(venues, 5)
+        assert [keys[c] for c in codes] == venues.tolist()
+        assert all(type(key) is str for key in keys)
+
+        codes, keys = factorize_group_keys([venues, months], 5)
+        assert len(keys) == 4
+        assert [keys[c] for c in codes] == list(zip(venues.tolist(), months.tolist()))
+
+        with pytest.raises(ValueError):
+            factorize_group_keys([venues, months], 4)